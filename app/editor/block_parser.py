@@ -0,0 +1,357 @@
+import re
+import sys
+import time
+from bisect import bisect_left, bisect_right
+
+from PyQt5.QtCore import QObject, QTimer, pyqtSignal
+
+from .markdown_renderer import iter_blocks, block_text
+
+# 行状态（低4位为类型，围栏代码块的围栏长度保存在高位），与语法高亮的文本块状态一致
+STATE_NORMAL = 0
+STATE_FENCE_BACKTICK = 1
+STATE_FENCE_TILDE = 2
+STATE_HTML_BLOCK = 3
+STATE_HTML_COMMENT = 4
+STATE_MASK = 0xF
+
+# 可以开始HTML块的块级标签
+HTML_BLOCK_TAGS = (
+    "address|article|aside|blockquote|center|details|dialog|div|dl|fieldset|"
+    "figcaption|figure|footer|form|h[1-6]|header|hr|main|nav|ol|p|pre|section|"
+    "style|summary|svg|table|tbody|td|tfoot|th|thead|tr|ul"
+)
+
+FENCE_LINE_RE = re.compile(r'^ {0,3}(`{3,}|~{3,})\s*(\S*)')
+HTML_BLOCK_RE = re.compile(rf'^ {{0,3}}</?(?:{HTML_BLOCK_TAGS})(?:\s|/?>|$)', re.IGNORECASE)
+COMMENT_START_RE = re.compile(r'^ {0,3}<!--')
+HEADING_RE = re.compile(r'^ {0,3}(#{1,6})\s+(.*?)(?:\s+#+)?\s*$')
+
+
+def classify_line(text, previous):
+    """根据上一行的状态计算当前行结束时的状态"""
+    kind = previous & STATE_MASK
+
+    if kind in (STATE_FENCE_BACKTICK, STATE_FENCE_TILDE):
+        m = FENCE_LINE_RE.match(text)
+        if m and not m.group(2):
+            fence = m.group(1)
+            fence_char = '`' if kind == STATE_FENCE_BACKTICK else '~'
+            if fence[0] == fence_char and len(fence) >= previous >> 4:
+                return STATE_NORMAL
+        return previous
+
+    if kind == STATE_HTML_COMMENT:
+        return STATE_NORMAL if '-->' in text else STATE_HTML_COMMENT
+
+    if kind == STATE_HTML_BLOCK:
+        # HTML块在空行处结束
+        return STATE_HTML_BLOCK if text.strip() else STATE_NORMAL
+
+    # 绝大多数行不以这些字符开头，跳过正则匹配
+    stripped = text.lstrip(' ')
+    if not stripped or stripped[0] not in '`~<':
+        return STATE_NORMAL
+
+    m = FENCE_LINE_RE.match(text)
+    if m:
+        fence = m.group(1)
+        # 反引号围栏的信息字符串中不能再出现反引号
+        if fence[0] == '~' or '`' not in text[m.end(1):]:
+            fence_kind = STATE_FENCE_BACKTICK if fence[0] == '`' else STATE_FENCE_TILDE
+            return fence_kind | (len(fence) << 4)
+
+    if COMMENT_START_RE.match(text) and '-->' not in text:
+        return STATE_HTML_COMMENT
+
+    if HTML_BLOCK_RE.match(text):
+        return STATE_HTML_BLOCK
+
+    return STATE_NORMAL
+
+
+class MarkdownBlockParser(QObject):
+    """
+    编辑器文档的增量Markdown块解析器
+    维护每一行的状态、顶层块的行范围和标题列表，根据 contentsChange 只重新解析改动附近的行。
+    语法高亮、预览渲染和标题大纲共用同一份解析结果。
+    必须在语法高亮器之前创建，保证高亮时解析结果已是最新的。
+    整篇替换的长文档（打开、分块加载完成）在空闲时按时间片从头解析，打开后可以立即编辑；
+    解析完成前 lines 只包含已解析的前缀，超出部分的 line_state 返回None
+    """
+
+    # 整篇替换的文档超过该行数时分片解析
+    SLICED_PARSE_LINES = 10000
+    # 每个时间片的处理时长（秒）
+    SLICE_SECONDS = 0.008
+
+    # 标题列表发生变化：(起始序号, 移除的标题数, 新增的标题数)
+    # 只是行号整体平移时不发出，需要行号时从 headings 中读取
+    headings_changed = pyqtSignal(int, int, int)
+    # 分片解析完成
+    parse_finished = pyqtSignal()
+
+    def __init__(self, document, parent=None):
+        super().__init__(parent)
+        self.document = document
+        # 每一行的文本和行末状态
+        self.lines = []
+        self.states = []
+        # 顶层块的行范围 [(起始行号, 结束行号), ...]，结束行号不包含在块内
+        self.block_ranges = []
+        # 标题 [(行号, 级别, 标题文字), ...]
+        self.headings = []
+        self.suspended = False
+        # 文档的行数（分片解析进行中时多于 lines）
+        self.line_count = 0
+        # 分片解析进行中；顶层块已划分到的行号
+        self.parsing = False
+        self.blocks_until = 0
+
+        self.parse_timer = QTimer(self)
+        self.parse_timer.setInterval(0)
+        self.parse_timer.timeout.connect(self.parse_slice)
+
+        self.document.contentsChange.connect(self.on_contents_change)
+        self.on_contents_change(0, 0, self.document.characterCount())
+
+    def suspend(self):
+        """暂停增量解析，例如分块加载大文件时，避免每追加一块都重新扫描"""
+        if not self.suspended:
+            self.suspended = True
+            self.parsing = False
+            self.parse_timer.stop()
+            self.document.contentsChange.disconnect(self.on_contents_change)
+
+    def resume(self):
+        """恢复增量解析，并对当前文档完整解析一次"""
+        if not self.suspended:
+            return
+        self.suspended = False
+        self.lines = []
+        self.states = []
+        self.block_ranges = []
+        self.line_count = 0
+        removed = len(self.headings)
+        self.headings = []
+        if removed:
+            self.headings_changed.emit(0, removed, 0)
+        self.document.contentsChange.connect(self.on_contents_change)
+        self.on_contents_change(0, 0, self.document.characterCount())
+
+    def state_before(self, line):
+        """第 line 行开始时的状态"""
+        if line <= 0 or line > len(self.states):
+            return STATE_NORMAL
+        return self.states[line - 1]
+
+    def line_state(self, line):
+        """第 line 行结束时的状态，行号超出范围时返回None"""
+        if 0 <= line < len(self.states):
+            return self.states[line]
+        return None
+
+    def blocks(self):
+        """顶层块列表 [(起始行号, 块文本), ...]，与 split_blocks 的结果一致（分片解析未完成时先解析完）"""
+        self.finish_parse()
+        return [(start, block_text(self.lines, start, end)) for start, end in self.block_ranges]
+
+    def on_contents_change(self, position, removed, added):
+        document = self.document
+        count = document.blockCount()
+        # 行数变化量；改动之后的行号整体平移 delta
+        delta = count - self.line_count
+        self.line_count = count
+        if position == 0 and added >= document.characterCount() - 1 and count > self.SLICED_PARSE_LINES:
+            # 整篇文档被替换
+            self.start_parse()
+            return
+
+        first_block = document.findBlock(position)
+        if not first_block.isValid():
+            first_block = document.lastBlock()
+        last_block = document.findBlock(position + added)
+        if not last_block.isValid():
+            last_block = document.lastBlock()
+
+        first = first_block.blockNumber()
+        last = last_block.blockNumber()
+        old_last = last - delta
+
+        if self.parsing:
+            parsed = len(self.lines)
+            if first >= parsed:
+                # 尚未解析到这里，稍后从文档中读取
+                return
+            if old_last >= parsed:
+                # 改动越过已解析的部分，从改动处重新解析
+                self.truncate(first)
+                return
+
+        new_lines = []
+        block = first_block
+        while block.isValid():
+            new_lines.append(block.text())
+            if block == last_block:
+                break
+            block = block.next()
+        self.lines[first:old_last + 1] = new_lines
+        self.states[first:old_last + 1] = [None] * len(new_lines)
+
+        end = self.update_states(first, last)
+        self.update_headings(first, end, delta)
+        if self.parsing:
+            # 顶层块只在全部行读取之后划分，已划分的部分从改动之前的块开始重新划分
+            self.drop_blocks(first)
+        else:
+            self.update_blocks(first, last, delta)
+
+    def start_parse(self):
+        """丢弃原有结果，在空闲时按时间片从头解析"""
+        removed = len(self.headings)
+        self.lines = []
+        self.states = []
+        self.block_ranges = []
+        self.headings = []
+        self.blocks_until = 0
+        if removed:
+            self.headings_changed.emit(0, removed, 0)
+        self.parsing = True
+        self.parse_timer.start()
+
+    def finish_parse(self):
+        """立即完成分片解析的剩余部分"""
+        while self.parsing:
+            self.parse_slice(float('inf'))
+
+    def parse_slice(self, deadline=None):
+        """
+        分片解析的一个时间片：先逐行读取文本并计算行状态和标题，全部读取后再划分顶层块
+        """
+        if deadline is None:
+            deadline = time.perf_counter() + self.SLICE_SECONDS
+        lines = self.lines
+        states = self.states
+        if len(lines) < self.line_count:
+            block = self.document.findBlockByNumber(len(lines))
+            state = self.state_before(len(lines))
+            found = []
+            while block.isValid():
+                text = block.text()
+                if state == STATE_NORMAL and text[:4].lstrip(' ').startswith('#'):
+                    m = HEADING_RE.match(text)
+                    if m:
+                        found.append((len(lines), len(m.group(1)), m.group(2)))
+                state = classify_line(text, state)
+                lines.append(text)
+                states.append(state)
+                block = block.next()
+                if len(lines) % 64 == 0 and time.perf_counter() >= deadline:
+                    break
+            if found:
+                index = len(self.headings)
+                self.headings.extend(found)
+                self.headings_changed.emit(index, 0, len(found))
+            return
+
+        # 块的划分只依赖起始行之后的内容，可以从上一个块的结束处继续
+        for start, end in iter_blocks(lines, self.blocks_until):
+            self.block_ranges.append((start, end))
+            self.blocks_until = end
+            if time.perf_counter() >= deadline:
+                return
+        self.parsing = False
+        self.parse_timer.stop()
+        self.parse_finished.emit()
+
+    def truncate(self, first):
+        """分片解析时丢弃 first 行及之后已解析的结果，稍后重新解析"""
+        del self.lines[first:]
+        del self.states[first:]
+        index = bisect_left(self.headings, (first,))
+        removed = len(self.headings) - index
+        del self.headings[index:]
+        if removed:
+            self.headings_changed.emit(index, removed, 0)
+        self.drop_blocks(first)
+
+    def drop_blocks(self, first):
+        """分片解析时丢弃可能受第 first 行改动影响的已划分的块"""
+        # 前一个块可能通过向后查找把改动的行并入，因此从它开始
+        index = max(bisect_right(self.block_ranges, (first, sys.maxsize)) - 2, 0)
+        if index < len(self.block_ranges):
+            self.blocks_until = self.block_ranges[index][0]
+            del self.block_ranges[index:]
+
+    def update_states(self, first, last):
+        """
+        从 first 行开始重新计算行状态，越过改动范围后状态与原来一致即停止
+        返回受影响范围之后的行号（状态收敛的那一行的开始状态可能已变化，也算在内）
+        """
+        states = self.states
+        lines = self.lines
+        count = len(lines)
+        state = self.state_before(first)
+        i = first
+        while i < count:
+            state = classify_line(lines[i], state)
+            if i > last and state == states[i]:
+                return i + 1
+            states[i] = state
+            i += 1
+        return i
+
+    def update_headings(self, first, end, delta):
+        """替换 [first, end) 行范围内的标题，之后的标题行号平移 delta"""
+        old_end = end - delta
+        start_index = bisect_left(self.headings, (first,))
+        end_index = bisect_left(self.headings, (old_end,))
+
+        found = []
+        state = self.state_before(first)
+        for i in range(first, end):
+            line = self.lines[i]
+            if state == STATE_NORMAL and line[:4].lstrip(' ').startswith('#'):
+                m = HEADING_RE.match(line)
+                if m:
+                    found.append((i, len(m.group(1)), m.group(2)))
+            state = self.states[i]
+
+        tail = self.headings[end_index:]
+        if delta:
+            tail = [(line + delta, level, title) for line, level, title in tail]
+        old = self.headings[start_index:end_index]
+        changed = [heading[1:] for heading in old] != [heading[1:] for heading in found]
+        self.headings[start_index:] = found + tail
+        if changed:
+            self.headings_changed.emit(start_index, len(old), len(found))
+
+    def update_blocks(self, first, last, delta):
+        """
+        从改动位置之前的一个块开始重新划分顶层块，
+        直到新产生的块与原有块在改动之后的某一行重合为止
+        """
+        old = self.block_ranges
+        # 前一个块可能通过向后查找把改动的行并入，因此从它开始
+        index = bisect_right(old, (first, sys.maxsize)) - 2
+        if index < 0:
+            index = 0
+            restart = 0
+        else:
+            restart = old[index][0]
+
+        produced = []
+        tail = []
+        tail_index = len(old)
+        for start, end in iter_blocks(self.lines, restart):
+            if start > last:
+                j = bisect_left(old, (start - delta,))
+                if j < len(old) and old[j][0] == start - delta:
+                    tail_index = j
+                    tail = old[j:]
+                    if delta:
+                        tail = [(a + delta, b + delta) for a, b in tail]
+                    break
+            produced.append((start, end))
+
+        self.block_ranges = old[:index] + produced + tail
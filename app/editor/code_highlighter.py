@@ -0,0 +1,236 @@
+import os
+import re
+import threading
+from collections import OrderedDict, deque
+from html import escape, unescape
+
+from markdown.extensions import Extension
+from markdown.postprocessors import Postprocessor
+from PyQt5.QtCore import QThread, QMutex, QWaitCondition, pyqtSignal
+
+from app.utils.config_manager import ConfigManager
+from app.utils.disk_cache import DiskCache, content_hash
+
+try:
+    import pygments
+    from pygments import highlight
+    from pygments.formatters import HtmlFormatter
+    from pygments.lexers import get_lexer_by_name, guess_lexer
+    from pygments.util import ClassNotFound
+except ImportError:
+    # 未安装Pygments时代码块保持为普通 <pre>
+    pygments = None
+
+
+# fenced_code 扩展输出的代码块
+CODE_BLOCK_RE = re.compile(
+    r'<pre><code(?: class="language-([^"]*)")?>(.*?)</code></pre>',
+    re.DOTALL
+)
+
+
+class CodeHighlighter:
+    """
+    代码块语法高亮
+    高亮结果按（语言, 代码内容）的哈希缓存在内存和磁盘中，跨会话保留。
+    get_cached 在界面线程中调用，highlight 在 CodeHighlightWorker 的后台线程中调用
+    """
+
+    # 修改高亮输出格式时递增，使旧的磁盘缓存失效
+    CACHE_VERSION = 1
+
+    def __init__(self, style='default', max_memory_entries=2000):
+        self.style = style
+        self.max_memory_entries = max_memory_entries
+        self.memory_cache = OrderedDict()
+        # 保护内存缓存，界面线程和高亮线程都会访问
+        self.lock = threading.Lock()
+        self.disk_cache = DiskCache(
+            os.path.join(ConfigManager().cache_dir, 'code_highlight'),
+            max_size=50 * 1024 * 1024
+        )
+        self.formatter = None
+        if pygments is not None:
+            self.formatter = HtmlFormatter(style=style, cssclass='codehilite', wrapcode=True)
+
+    @property
+    def available(self):
+        """是否可以进行语法高亮"""
+        return self.formatter is not None
+
+    def style_defs(self):
+        """预览页面中代码高亮使用的CSS"""
+        if not self.available:
+            return ""
+        return self.formatter.get_style_defs('.codehilite')
+
+    def cache_key(self, lang, code):
+        return content_hash(self.CACHE_VERSION, pygments.__version__, self.style, lang, code)
+
+    def get_cached(self, lang, code):
+        """只从缓存中查找高亮结果，未命中时返回None"""
+        if not self.available:
+            return None
+        key = self.cache_key(lang, code)
+        with self.lock:
+            html = self.memory_cache.get(key)
+            if html is not None:
+                self.memory_cache.move_to_end(key)
+                return html
+        html = self.disk_cache.get(key)
+        if html is not None:
+            self._remember(key, html)
+        return html
+
+    def highlight(self, lang, code):
+        """返回代码块的高亮HTML，优先使用缓存（未指定语言时需要猜测，较慢，不要在界面线程中调用）"""
+        if not self.available:
+            return ""
+        html = self.get_cached(lang, code)
+        if html is not None:
+            return html
+
+        try:
+            if lang:
+                lexer = get_lexer_by_name(lang)
+            else:
+                lexer = guess_lexer(code)
+        except ClassNotFound:
+            lexer = get_lexer_by_name('text')
+        html = highlight(code, lexer, self.formatter)
+
+        key = self.cache_key(lang, code)
+        self._remember(key, html)
+        self.disk_cache.set(key, html)
+        return html
+
+    def _remember(self, key, html):
+        with self.lock:
+            self.memory_cache[key] = html
+            self.memory_cache.move_to_end(key)
+            while len(self.memory_cache) > self.max_memory_entries:
+                self.memory_cache.popitem(last=False)
+
+
+class CodeHighlightWorker(QThread):
+    """
+    在后台线程中依次高亮预览页面请求的代码块
+    Pygments（特别是未指定语言时的 guess_lexer）可能耗时数十毫秒，放在界面线程中会卡住编辑器；
+    结果通过信号送回，由请求者（预览通信桥）推送给页面
+    """
+    # (请求者, 请求编号, 高亮HTML)
+    code_highlighted = pyqtSignal(object, str, str)
+
+    def __init__(self, highlighter):
+        super().__init__()
+        self.highlighter = highlighter
+        self.running = True
+        self.mutex = QMutex()
+        self.condition = QWaitCondition()
+        # 等待高亮的 (请求者, 请求编号, 语言, 代码)，按请求顺序处理
+        self.pending = deque()
+
+    def request(self, owner, request_id, lang, code):
+        self.mutex.lock()
+        self.pending.append((owner, request_id, lang, code))
+        self.condition.wakeOne()
+        self.mutex.unlock()
+
+    def cancel(self, owner):
+        """丢弃 owner 尚未处理的请求（预览页面已重新加载或关闭）"""
+        self.mutex.lock()
+        self.pending = deque(job for job in self.pending if job[0] is not owner)
+        self.mutex.unlock()
+
+    def run(self):
+        while True:
+            self.mutex.lock()
+            # 没有请求时一直等待，由 request 和 stop 唤醒
+            while not self.pending and self.running:
+                self.condition.wait(self.mutex)
+            if not self.running:
+                self.mutex.unlock()
+                break
+            owner, request_id, lang, code = self.pending.popleft()
+            self.mutex.unlock()
+            try:
+                html = self.highlighter.highlight(lang, code)
+            except Exception as e:
+                print(f"代码高亮失败: {str(e)}")
+                html = ""
+            self.code_highlighted.emit(owner, request_id, html)
+
+    def stop(self):
+        self.mutex.lock()
+        self.running = False
+        self.condition.wakeAll()
+        self.mutex.unlock()
+
+
+_shared_highlighter = None
+
+
+def shared_code_highlighter():
+    """所有编辑器标签页共用的代码高亮器，同一代码块只在内存中缓存一份"""
+    global _shared_highlighter
+    if _shared_highlighter is None:
+        _shared_highlighter = CodeHighlighter()
+    return _shared_highlighter
+
+
+_highlight_worker = None
+
+
+def shared_code_highlight_worker():
+    """所有预览页面共用的后台高亮线程，第一次请求高亮时启动"""
+    global _highlight_worker
+    if _highlight_worker is None:
+        _highlight_worker = CodeHighlightWorker(shared_code_highlighter())
+        _highlight_worker.start()
+    return _highlight_worker
+
+
+def stop_code_highlight_worker():
+    """停止后台高亮线程（退出程序时调用），当前的代码块高亮完后即退出"""
+    global _highlight_worker
+    if _highlight_worker is not None:
+        _highlight_worker.stop()
+        _highlight_worker.wait()
+        _highlight_worker = None
+
+
+class LazyCodePostprocessor(Postprocessor):
+    """
+    代码块后处理：缓存命中时直接替换为高亮结果，
+    否则输出带 data-highlight="pending" 标记的普通 <pre>，由预览页面稍后请求高亮
+    """
+
+    def __init__(self, md, highlighter):
+        super().__init__(md)
+        self.highlighter = highlighter
+
+    def run(self, text):
+        if not self.highlighter.available:
+            return text
+        return CODE_BLOCK_RE.sub(self._replace, text)
+
+    def _replace(self, match):
+        lang = match.group(1) or ''
+        code = unescape(match.group(2))
+        html = self.highlighter.get_cached(lang, code)
+        if html is not None:
+            return html
+        code_class = f' class="language-{escape(lang)}"' if lang else ''
+        return (f'<pre data-highlight="pending" data-lang="{escape(lang)}">'
+                f'<code{code_class}>{match.group(2)}</code></pre>')
+
+
+class LazyCodeExtension(Extension):
+    """替代 codehilite 的延迟代码高亮扩展"""
+
+    def __init__(self, highlighter, **kwargs):
+        self.highlighter = highlighter
+        super().__init__(**kwargs)
+
+    def extendMarkdown(self, md):
+        md.postprocessors.register(LazyCodePostprocessor(md, self.highlighter), 'lazy_code', 5)
@@ -0,0 +1,310 @@
+import re
+from html import unescape
+
+
+class HtmlSanitizer:
+    """
+    基于白名单的HTML安全过滤器
+    使用单遍流式分词代替多次正则替换，每个字符最多被扫描常数次，
+    保证在大型（含大量SVG的）笔记上也是线性时间
+    """
+
+    # 允许的HTML标签
+    HTML_TAGS = {
+        'a', 'abbr', 'article', 'aside', 'b', 'bdi', 'bdo', 'blockquote', 'br',
+        'caption', 'center', 'cite', 'code', 'col', 'colgroup', 'dd', 'del',
+        'details', 'dfn', 'div', 'dl', 'dt', 'em', 'figcaption', 'figure',
+        'font', 'footer', 'h1', 'h2', 'h3', 'h4', 'h5', 'h6', 'header', 'hr',
+        'i', 'img', 'ins', 'kbd', 'li', 'main', 'mark', 'nav', 'ol', 'p', 'pre',
+        'q', 'rp', 'rt', 'ruby', 's', 'samp', 'section', 'small', 'span',
+        'strike', 'strong', 'style', 'sub', 'summary', 'sup', 'table', 'tbody',
+        'td', 'tfoot', 'th', 'thead', 'time', 'tr', 'tt', 'u', 'ul', 'var', 'wbr',
+    }
+
+    # 允许的SVG标签（不包含animate/set等可改写属性的动画元素和foreignObject）
+    SVG_TAGS = {
+        'svg', 'g', 'defs', 'symbol', 'use', 'path', 'rect', 'circle',
+        'ellipse', 'line', 'polyline', 'polygon', 'text', 'tspan', 'textpath',
+        'title', 'desc', 'lineargradient', 'radialgradient', 'stop', 'pattern',
+        'clippath', 'mask', 'marker', 'image', 'filter', 'feblend',
+        'fecolormatrix', 'fecomposite', 'fedropshadow', 'feflood',
+        'fegaussianblur', 'femerge', 'femergenode', 'feoffset',
+    }
+
+    ALLOWED_TAGS = HTML_TAGS | SVG_TAGS
+
+    # 连同内容一起丢弃的标签
+    DROP_CONTENT_TAGS = {
+        'script', 'iframe', 'object', 'embed', 'applet', 'noscript',
+        'noembed', 'noframes', 'frameset', 'template', 'xmp',
+    }
+
+    # 内容按原始文本处理的标签
+    RAW_TEXT_TAGS = {'style'}
+
+    # 所有标签通用的属性
+    GLOBAL_ATTRIBUTES = {
+        'id', 'class', 'style', 'title', 'lang', 'dir', 'align', 'width',
+        'height', 'role', 'hidden', 'data-line',
+    }
+
+    # 特定HTML标签的属性
+    TAG_ATTRIBUTES = {
+        'a': {'href', 'name', 'target', 'rel'},
+        'img': {'src', 'alt', 'loading'},
+        'td': {'colspan', 'rowspan', 'valign'},
+        'th': {'colspan', 'rowspan', 'valign', 'scope'},
+        'col': {'span'},
+        'colgroup': {'span'},
+        'ol': {'start', 'type', 'reversed'},
+        'pre': {'data-highlight', 'data-lang'},
+        'ul': {'type'},
+        'li': {'value'},
+        'table': {'border', 'cellpadding', 'cellspacing', 'summary'},
+        'details': {'open'},
+        'font': {'color', 'face', 'size'},
+        'blockquote': {'cite'},
+        'q': {'cite'},
+        'del': {'cite', 'datetime'},
+        'ins': {'cite', 'datetime'},
+        'time': {'datetime'},
+        'abbr': {'title'},
+    }
+
+    # SVG标签的属性（统一以小写比较）
+    SVG_ATTRIBUTES = {
+        'viewbox', 'xmlns', 'xmlns:xlink', 'version', 'x', 'y', 'x1', 'y1',
+        'x2', 'y2', 'cx', 'cy', 'r', 'rx', 'ry', 'fx', 'fy', 'd', 'points',
+        'fill', 'fill-opacity', 'fill-rule', 'stroke', 'stroke-width',
+        'stroke-linecap', 'stroke-linejoin', 'stroke-dasharray',
+        'stroke-dashoffset', 'stroke-opacity', 'stroke-miterlimit', 'opacity',
+        'transform', 'font-family', 'font-size', 'font-weight', 'font-style',
+        'text-anchor', 'dominant-baseline', 'alignment-baseline',
+        'letter-spacing', 'word-spacing', 'text-decoration', 'dx', 'dy',
+        'rotate', 'textlength', 'lengthadjust', 'preserveaspectratio',
+        'gradientunits', 'gradienttransform', 'spreadmethod', 'offset',
+        'stop-color', 'stop-opacity', 'markerwidth', 'markerheight', 'refx',
+        'refy', 'orient', 'markerunits', 'marker-start', 'marker-mid',
+        'marker-end', 'clip-path', 'clip-rule', 'clippathunits', 'mask',
+        'maskunits', 'maskcontentunits', 'patternunits', 'patterncontentunits',
+        'patterntransform', 'filter', 'filterunits', 'primitiveunits',
+        'stddeviation', 'in', 'in2', 'result', 'mode', 'operator', 'k1', 'k2',
+        'k3', 'k4', 'values', 'type', 'color', 'display', 'visibility',
+        'pathlength', 'href', 'xlink:href', 'xml:space', 'flood-color',
+        'flood-opacity', 'startoffset', 'method', 'spacing', 'vector-effect',
+    }
+
+    # 值为URL、需要检查协议的属性
+    URL_ATTRIBUTES = {'href', 'src', 'xlink:href', 'cite'}
+
+    # 允许的URL协议（相对链接和锚点总是允许）
+    SAFE_SCHEMES = {'http', 'https', 'mailto', 'ftp', 'file', 'qrc'}
+
+    _NAME_RE = re.compile(r'[^\s"\'<>/=]+')
+    _TAG_NAME_RE = re.compile(r'[A-Za-z][^\s/>]*')
+    _SPACE_RE = re.compile(r'[\s/]*')
+    _WS_RE = re.compile(r'\s*')
+    _UNQUOTED_RE = re.compile(r'[^\s>]*')
+    _SCHEME_RE = re.compile(r'([a-z][a-z0-9+.\-]*):')
+    _CONTROL_RE = re.compile(r'[\x00-\x20\x7f]+')
+    _RAW_TEXT_END_RE = {tag: re.compile(rf'</{tag}[\s/>]') for tag in RAW_TEXT_TAGS}
+
+    def sanitize(self, html):
+        """过滤HTML，返回只包含白名单标签和属性的安全HTML"""
+        out = []
+        lower = html.lower()
+        n = len(html)
+        pos = 0
+
+        while pos < n:
+            lt = html.find('<', pos)
+            if lt == -1:
+                out.append(html[pos:])
+                break
+            if lt > pos:
+                out.append(html[pos:lt])
+
+            nxt = html[lt + 1:lt + 2]
+
+            # 注释
+            if html.startswith('<!--', lt):
+                end = html.find('-->', lt + 4)
+                if end == -1:
+                    break
+                pos = end + 3
+                continue
+
+            # 文档类型、CDATA和处理指令
+            if nxt in ('!', '?'):
+                end = html.find('>', lt + 2)
+                if end == -1:
+                    break
+                pos = end + 1
+                continue
+
+            # 结束标签
+            if nxt == '/':
+                m = self._TAG_NAME_RE.match(html, lt + 2)
+                if not m:
+                    out.append('&lt;')
+                    pos = lt + 1
+                    continue
+                end = html.find('>', m.end())
+                if end == -1:
+                    break
+                if m.group(0).lower() in self.ALLOWED_TAGS:
+                    out.append(f'</{m.group(0)}>')
+                pos = end + 1
+                continue
+
+            # 开始标签
+            m = self._TAG_NAME_RE.match(html, lt + 1)
+            if not m:
+                # 不是标签，只是一个普通的小于号
+                out.append('&lt;')
+                pos = lt + 1
+                continue
+
+            tag = m.group(0)
+            tag_lower = tag.lower()
+            parsed = self._parse_attributes(html, m.end(), n)
+            if parsed is None:
+                # 标签未闭合，浏览器会把剩余内容都当作标签的一部分，直接丢弃
+                break
+            attrs, pos, self_closing = parsed
+
+            if tag_lower in self.DROP_CONTENT_TAGS:
+                # 跳过到对应的结束标签，只向前查找一次
+                close = lower.find(f'</{tag_lower}', pos)
+                if close == -1:
+                    break
+                end = html.find('>', close)
+                if end == -1:
+                    break
+                pos = end + 1
+                continue
+
+            if tag_lower not in self.ALLOWED_TAGS:
+                continue
+
+            if tag_lower in self.RAW_TEXT_TAGS:
+                # HTML中 <style/> 并不自闭合，同样按原始文本处理
+                out.append(self._build_start_tag(tag, tag_lower, attrs, False))
+                # 只有后面紧跟空白、/ 或 > 的结束标签才会结束原始文本，</style= 不会
+                m = self._RAW_TEXT_END_RE[tag_lower].search(lower, pos)
+                close = m.start() if m else n
+                # 在SVG中<style>的内容会被当作标签解析，转义小于号以避免逃逸
+                text = html[pos:close].replace('<', '&lt;')
+                out.append(self._neutralize_css(text))
+                # 总是由过滤器输出结束标签，未闭合的原始文本不会吞掉后面拼接的内容
+                out.append(f'</{tag}>')
+                if not m:
+                    break
+                end = html.find('>', m.end() - 1)
+                if end == -1:
+                    break
+                pos = end + 1
+                continue
+
+            out.append(self._build_start_tag(tag, tag_lower, attrs, self_closing))
+
+        return ''.join(out)
+
+    def _parse_attributes(self, html, pos, n):
+        """
+        解析标签属性，返回 (属性列表, 标签结束后的位置, 是否自闭合)
+        标签未闭合时返回None
+        """
+        attrs = []
+        while True:
+            pos = self._SPACE_RE.match(html, pos).end()
+            if pos >= n:
+                return None
+
+            c = html[pos]
+            if c == '>':
+                return attrs, pos + 1, html[pos - 1] == '/'
+
+            m = self._NAME_RE.match(html, pos)
+            if not m:
+                # 孤立的引号、等号或小于号，跳过
+                pos += 1
+                continue
+
+            name = m.group(0)
+            pos = self._WS_RE.match(html, m.end()).end()
+            value = None
+            if pos < n and html[pos] == '=':
+                pos = self._WS_RE.match(html, pos + 1).end()
+                if pos >= n:
+                    return None
+                quote = html[pos]
+                if quote in ('"', "'"):
+                    end = html.find(quote, pos + 1)
+                    if end == -1:
+                        return None
+                    value = html[pos + 1:end]
+                    pos = end + 1
+                else:
+                    m = self._UNQUOTED_RE.match(html, pos)
+                    value = m.group(0)
+                    pos = m.end()
+            attrs.append((name, value))
+
+    def _build_start_tag(self, tag, tag_lower, attrs, self_closing):
+        """根据白名单重新生成开始标签"""
+        parts = [f'<{tag}']
+        seen = set()
+        for name, value in attrs:
+            name_lower = name.lower()
+            if name_lower in seen or not self._is_allowed_attribute(tag_lower, name_lower):
+                continue
+            if value is not None and not self._is_safe_value(name_lower, value):
+                continue
+            seen.add(name_lower)
+            if value is None:
+                parts.append(f' {name}')
+            else:
+                # 属性值中的尖括号也转义，避免被再次解析（mXSS）时逃逸出属性
+                value = value.replace('"', '&quot;').replace('<', '&lt;').replace('>', '&gt;')
+                parts.append(f' {name}="{value}"')
+        parts.append(' />' if self_closing else '>')
+        return ''.join(parts)
+
+    def _is_allowed_attribute(self, tag_lower, name_lower):
+        """检查属性是否在白名单中"""
+        if name_lower.startswith('on'):
+            return False
+        if name_lower in self.GLOBAL_ATTRIBUTES or name_lower.startswith('aria-'):
+            return True
+        if tag_lower in self.SVG_TAGS:
+            return name_lower in self.SVG_ATTRIBUTES
+        return name_lower in self.TAG_ATTRIBUTES.get(tag_lower, ())
+
+    def _is_safe_value(self, name_lower, value):
+        """检查属性值，拒绝javascript:等危险协议和CSS表达式"""
+        if name_lower in self.URL_ATTRIBUTES:
+            url = self._CONTROL_RE.sub('', unescape(value)).lower()
+            m = self._SCHEME_RE.match(url)
+            if m:
+                scheme = m.group(1)
+                if scheme == 'data':
+                    return url.startswith('data:image/') and not url.startswith('data:image/svg')
+                return scheme in self.SAFE_SCHEMES
+            return True
+        if name_lower == 'style':
+            css = self._CONTROL_RE.sub('', unescape(value)).lower()
+            return 'javascript:' not in css and 'expression(' not in css
+        return True
+
+    def _neutralize_css(self, css):
+        """禁用样式表中的javascript:协议"""
+        return re.sub(r'(?i)javascript:', 'disabled-javascript:', css)
+
+
+_default_sanitizer = HtmlSanitizer()
+
+
+def sanitize_html(html):
+    """使用默认白名单过滤HTML"""
+    return _default_sanitizer.sanitize(html)
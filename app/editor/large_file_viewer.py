@@ -0,0 +1,438 @@
+import mmap
+import os
+from bisect import bisect_left
+
+from PyQt5.QtWidgets import (QWidget, QVBoxLayout, QHBoxLayout, QPlainTextEdit, QScrollBar,
+                             QLabel, QLineEdit, QPushButton, QProgressBar)
+from PyQt5.QtCore import Qt, QEvent, QThread, pyqtSignal
+from PyQt5.QtGui import QFont, QTextCursor
+
+
+def utf16_length(text):
+    """文本在Qt中的长度：QTextCursor的位置以UTF-16码元计，emoji等BMP以外的字符占两个"""
+    return len(text.encode('utf-16-le')) // 2
+
+
+class LineIndex:
+    """
+    大文件的稀疏行索引
+    只记录每个固定大小的字节块开始处之前的换行符数量，内存占用与文件大小基本无关。
+    定位某一行时先二分找到所在字节块，再在块内逐个查找换行符
+    """
+
+    # 索引粒度（字节）
+    BLOCK_SIZE = 64 * 1024
+
+    def __init__(self, data):
+        self.data = data
+        self.size = len(data)
+        # line_counts[i] 为第 i 个字节块之前的换行符总数
+        self.line_counts = [0]
+        self.indexed_size = 0
+
+    @property
+    def finished(self):
+        return self.indexed_size >= self.size
+
+    def line_count(self):
+        """已建立索引部分的行数"""
+        return self.line_counts[-1] + 1
+
+    def build(self, should_continue=None, progress=None):
+        """逐块统计换行符，可以在后台线程中调用"""
+        data = self.data
+        while self.indexed_size < self.size:
+            if should_continue is not None and not should_continue():
+                return
+            end = min(self.indexed_size + self.BLOCK_SIZE, self.size)
+            count = data[self.indexed_size:end].count(b'\n')
+            self.indexed_size = end
+            self.line_counts.append(self.line_counts[-1] + count)
+            if progress is not None and len(self.line_counts) % 256 == 0:
+                progress(self.indexed_size, self.size)
+
+    def line_offset(self, line):
+        """第 line 行（从0开始）起始处的字节偏移，行号超出已索引范围时返回None"""
+        if line <= 0:
+            return 0
+        # 第 line 行从第 line 个换行符之后开始，先找到该换行符所在的字节块
+        block = bisect_left(self.line_counts, line) - 1
+        if block < 0 or block + 1 >= len(self.line_counts):
+            return None
+        position = block * self.BLOCK_SIZE
+        for _ in range(line - self.line_counts[block]):
+            position = self.data.find(b'\n', position) + 1
+        return position
+
+    def line_at(self, offset):
+        """字节偏移 offset 所在的行号"""
+        block = min(offset // self.BLOCK_SIZE, len(self.line_counts) - 1)
+        start = block * self.BLOCK_SIZE
+        return self.line_counts[block] + self.data[start:offset].count(b'\n')
+
+
+class LineIndexWorker(QThread):
+    """在后台线程中建立行索引"""
+    progress_update = pyqtSignal(int, int)
+    index_finished = pyqtSignal()
+
+    def __init__(self, index):
+        super().__init__()
+        self.index = index
+        self.running = True
+
+    def run(self):
+        self.index.build(lambda: self.running, self.progress_update.emit)
+        if self.running:
+            self.index_finished.emit()
+
+    def stop(self):
+        self.running = False
+
+
+class TextSearchWorker(QThread):
+    """
+    在后台线程中查找关键字的字节序列
+    从 start 查找到文件末尾，未找到时再从头查找到 start；每次只查找一个数据块，块之间检查是否已取消
+    """
+    progress_update = pyqtSignal(int, int)
+    # 结果的字节偏移，未找到时为-1；被取消时不发出
+    search_finished = pyqtSignal(int)
+
+    # 每次查找的字节数
+    CHUNK_SIZE = 4 * 1024 * 1024
+
+    def __init__(self, data, needle, start):
+        super().__init__()
+        self.data = data
+        self.needle = needle
+        self.start_offset = start
+        self.running = True
+
+    def run(self):
+        size = len(self.data)
+        # 回到开头查找时，结果可能从 start 之前开始而跨过 start
+        ranges = [(self.start_offset, size)]
+        if self.start_offset > 0:
+            ranges.append((0, min(size, self.start_offset + len(self.needle) - 1)))
+        total = sum(end - begin for begin, end in ranges)
+        done = 0
+        for begin, end in ranges:
+            position = begin
+            while position < end:
+                if not self.running:
+                    return
+                chunk_end = min(position + self.CHUNK_SIZE, end)
+                # 相邻的块重叠 len(needle)-1 字节，跨块的结果也能找到
+                offset = self.data.find(self.needle, position, min(chunk_end + len(self.needle) - 1, end))
+                if offset != -1:
+                    self.search_finished.emit(offset)
+                    return
+                done += chunk_end - position
+                position = chunk_end
+                self.progress_update.emit(done, total)
+        self.search_finished.emit(-1)
+
+    def stop(self):
+        self.running = False
+
+
+class LargeFileViewer(QWidget):
+    """
+    超大笔记（如导出的日志）的只读查看器
+    文件通过mmap映射，只解码并显示视口中可见的若干行，内存占用与文件大小无关
+    """
+
+    # 单行最多显示的字节数，超长的行会被截断
+    MAX_LINE_BYTES = 10000
+    # 滚轮每滚动一行的角度（八分之一度），标准滚轮的一格为120，即三行
+    WHEEL_DELTA_PER_LINE = 40
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.file_path = None
+        self.file = None
+        self.data = None
+        self.index = None
+        self.index_worker = None
+        self.search_worker = None
+        self.top_line = 0
+        # 最近一次查找结果的字节偏移
+        self.search_offset = -1
+        # 触控板等设备的滚动量不足一行时累积起来
+        self.wheel_delta = 0
+        self.setup_ui()
+
+    def setup_ui(self):
+        layout = QVBoxLayout(self)
+        layout.setContentsMargins(0, 0, 0, 0)
+
+        # 顶部信息栏和查找
+        top_layout = QHBoxLayout()
+        self.info_label = QLabel("")
+        top_layout.addWidget(self.info_label, 1)
+        self.index_progress = QProgressBar()
+        self.index_progress.setMaximumWidth(150)
+        self.index_progress.setRange(0, 100)
+        self.index_progress.hide()
+        top_layout.addWidget(self.index_progress)
+        self.search_input = QLineEdit()
+        self.search_input.setPlaceholderText("在文件中查找")
+        self.search_input.returnPressed.connect(self.find_next)
+        top_layout.addWidget(self.search_input)
+        self.find_button = QPushButton("查找下一个")
+        self.find_button.clicked.connect(self.on_find_clicked)
+        top_layout.addWidget(self.find_button)
+        layout.addLayout(top_layout)
+
+        # 文本区只显示可见窗口内的行，滚动由独立的滚动条按行号控制
+        view_layout = QHBoxLayout()
+        self.view = QPlainTextEdit()
+        self.view.setReadOnly(True)
+        self.view.setFont(QFont("Microsoft YaHei", 11))
+        self.view.setLineWrapMode(QPlainTextEdit.NoWrap)
+        self.view.setVerticalScrollBarPolicy(Qt.ScrollBarAlwaysOff)
+        self.view.viewport().installEventFilter(self)
+        self.view.installEventFilter(self)
+        view_layout.addWidget(self.view)
+        self.scrollbar = QScrollBar(Qt.Vertical)
+        self.scrollbar.valueChanged.connect(self.scroll_to_line)
+        view_layout.addWidget(self.scrollbar)
+        layout.addLayout(view_layout)
+
+        self.setLayout(layout)
+
+    def open_file(self, file_path):
+        """映射文件并在后台建立行索引"""
+        self.close_file()
+        try:
+            self.file = open(file_path, 'rb')
+            if os.path.getsize(file_path) > 0:
+                self.data = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ)
+            else:
+                self.data = b''
+        except (OSError, ValueError) as e:
+            self.close_file()
+            return False, str(e)
+
+        self.file_path = file_path
+        self.index = LineIndex(self.data)
+        self.top_line = 0
+        self.search_offset = -1
+        self.wheel_delta = 0
+        self.index_progress.setValue(0)
+        self.index_progress.show()
+        self.index_worker = LineIndexWorker(self.index)
+        self.index_worker.progress_update.connect(self.on_index_progress)
+        self.index_worker.index_finished.connect(self.on_index_finished)
+        self.index_worker.start()
+        self.update_info()
+        self.render_window()
+        return True, file_path
+
+    def close_file(self):
+        """停止建立索引和查找并释放映射"""
+        # 后台线程每处理一个数据块检查一次是否已停止，释放映射前必须等它们退出
+        self.stop_search()
+        if self.index_worker is not None:
+            self.index_worker.stop()
+            self.index_worker.wait()
+            self.index_worker = None
+        if isinstance(self.data, mmap.mmap):
+            self.data.close()
+        self.data = None
+        if self.file is not None:
+            self.file.close()
+            self.file = None
+        self.index = None
+        self.file_path = None
+        self.view.clear()
+
+    def on_index_progress(self, indexed, total):
+        if total > 0:
+            self.index_progress.setValue(int(indexed * 100 / total))
+        self.update_scroll_range()
+        self.update_info()
+
+    def on_index_finished(self):
+        self.index_progress.hide()
+        self.update_scroll_range()
+        self.update_info()
+        self.render_window()
+
+    def update_info(self):
+        if self.index is None:
+            self.info_label.setText("")
+            return
+        size_mb = self.index.size / (1024 * 1024)
+        lines = self.index.line_count()
+        state = "" if self.index.finished else "（正在建立索引）"
+        self.info_label.setText(
+            f"只读查看: {os.path.basename(self.file_path)}  {size_mb:.1f} MB  {lines} 行{state}"
+        )
+
+    def visible_line_count(self):
+        return max(1, self.view.viewport().height() // self.view.fontMetrics().lineSpacing())
+
+    def update_scroll_range(self):
+        if self.index is None:
+            return
+        visible = self.visible_line_count()
+        self.scrollbar.blockSignals(True)
+        self.scrollbar.setRange(0, max(0, self.index.line_count() - visible))
+        self.scrollbar.setPageStep(visible)
+        self.scrollbar.setValue(self.top_line)
+        self.scrollbar.blockSignals(False)
+
+    def scroll_to_line(self, line):
+        self.top_line = max(0, int(line))
+        self.render_window()
+
+    def read_lines(self, line, count):
+        """从第 line 行开始读取并解码最多 count 行"""
+        offset = self.index.line_offset(line)
+        if offset is None:
+            return []
+        lines = []
+        size = self.index.size
+        while len(lines) < count and offset <= size:
+            end = self.data.find(b'\n', offset)
+            if end == -1:
+                end = size
+            text = self.data[offset:min(end, offset + self.MAX_LINE_BYTES)].decode('utf-8', errors='replace')
+            if end - offset > self.MAX_LINE_BYTES:
+                text += " …"
+            lines.append(text.rstrip('\r'))
+            if end >= size:
+                break
+            offset = end + 1
+        return lines
+
+    def render_window(self):
+        """只显示视口中可见的行"""
+        if self.index is None:
+            return
+        self.view.setPlainText('\n'.join(self.read_lines(self.top_line, self.visible_line_count())))
+        self.highlight_search_result()
+
+    def highlight_search_result(self):
+        """在当前窗口中选中最近一次的查找结果"""
+        if self.search_offset < 0:
+            return
+        line = self.index.line_at(self.search_offset)
+        if not self.top_line <= line < self.top_line + self.visible_line_count():
+            return
+        line_start = self.index.line_offset(line)
+        column = utf16_length(self.data[line_start:self.search_offset].decode('utf-8', errors='replace'))
+        block = self.view.document().findBlockByNumber(line - self.top_line)
+        # 超长行被截断显示时结果可能在截断处之后
+        end = min(column + utf16_length(self.search_input.text()), block.length() - 1)
+        cursor = QTextCursor(block)
+        cursor.setPosition(block.position() + min(column, end))
+        cursor.setPosition(block.position() + end, QTextCursor.KeepAnchor)
+        self.view.setTextCursor(cursor)
+
+    def on_find_clicked(self):
+        """查找进行中时按钮用于取消"""
+        if self.search_worker is not None:
+            self.stop_search()
+            self.update_info()
+        else:
+            self.find_next()
+
+    def find_next(self):
+        """
+        从上一次结果之后查找关键字（区分大小写），到达末尾后从头开始
+        查找在后台线程中进行，几百MB的文件也不会卡住界面
+        """
+        keyword = self.search_input.text()
+        if not keyword or self.index is None:
+            return
+        if not self.index.finished:
+            self.info_label.setText("正在建立索引，请稍后再查找")
+            return
+        self.stop_search()
+        start = self.search_offset + 1 if self.search_offset >= 0 else self.index.line_offset(self.top_line)
+        self.search_worker = TextSearchWorker(self.data, keyword.encode('utf-8'), start)
+        self.search_worker.progress_update.connect(self.on_search_progress)
+        self.search_worker.search_finished.connect(self.on_search_finished)
+        self.index_progress.setValue(0)
+        self.index_progress.show()
+        self.find_button.setText("取消查找")
+        self.info_label.setText(f"正在查找: {keyword}")
+        self.search_worker.start()
+
+    def stop_search(self):
+        """取消正在进行的查找（线程在当前数据块查找完后即退出）"""
+        if self.search_worker is None:
+            return
+        self.search_worker.stop()
+        self.search_worker.wait()
+        self.search_worker = None
+        self.index_progress.hide()
+        self.find_button.setText("查找下一个")
+
+    def on_search_progress(self, done, total):
+        if self.sender() is not self.search_worker:
+            return
+        if total > 0:
+            self.index_progress.setValue(int(done * 100 / total))
+
+    def on_search_finished(self, offset):
+        # 已取消的查找在取消前发出、仍在排队的结果
+        if self.sender() is not self.search_worker:
+            return
+        keyword = self.search_worker.needle.decode('utf-8')
+        self.search_worker.wait()
+        self.search_worker = None
+        self.index_progress.hide()
+        self.find_button.setText("查找下一个")
+        if offset == -1:
+            self.info_label.setText(f"未找到: {keyword}")
+            return
+
+        self.search_offset = offset
+        line = self.index.line_at(offset)
+        visible = self.visible_line_count()
+        if not self.top_line <= line < self.top_line + visible:
+            # 把结果所在行滚动到视口上部三分之一处
+            self.top_line = max(0, line - visible // 3)
+            self.update_scroll_range()
+        self.update_info()
+        self.render_window()
+
+    def eventFilter(self, obj, event):
+        """文本区的滚轮和翻页键改为按行号滚动"""
+        if self.index is not None:
+            if event.type() == QEvent.Wheel:
+                delta = event.angleDelta().y()
+                if delta * self.wheel_delta < 0:
+                    # 改变方向时丢弃另一方向上不足一行的累积量
+                    self.wheel_delta = 0
+                self.wheel_delta += delta
+                # 向零取整，上下两个方向的滚动量对称
+                steps = int(self.wheel_delta / self.WHEEL_DELTA_PER_LINE)
+                self.wheel_delta -= steps * self.WHEEL_DELTA_PER_LINE
+                if steps:
+                    self.scrollbar.setValue(self.scrollbar.value() - steps)
+                return True
+            if event.type() == QEvent.KeyPress and obj is self.view:
+                key = event.key()
+                page = self.visible_line_count()
+                moves = {
+                    Qt.Key_PageDown: page, Qt.Key_PageUp: -page,
+                    Qt.Key_Down: 1, Qt.Key_Up: -1,
+                }
+                if key in moves:
+                    self.scrollbar.setValue(self.scrollbar.value() + moves[key])
+                    return True
+                if key == Qt.Key_Home and event.modifiers() & Qt.ControlModifier:
+                    self.scrollbar.setValue(0)
+                    return True
+                if key == Qt.Key_End and event.modifiers() & Qt.ControlModifier:
+                    self.scrollbar.setValue(self.scrollbar.maximum())
+                    return True
+            if event.type() == QEvent.Resize and obj is self.view.viewport():
+                self.update_scroll_range()
+                self.render_window()
+        return super().eventFilter(obj, event)
@@ -1,13 +1,25 @@
-from PyQt5.QtWidgets import QWidget, QVBoxLayout, QHBoxLayout, QSplitter, QTextEdit, QLabel, QScrollBar, QCheckBox
+from PyQt5.QtWidgets import QWidget, QVBoxLayout, QHBoxLayout, QSplitter, QPlainTextEdit, QLabel, QScrollBar, QCheckBox
 from PyQt5.QtCore import Qt, QTimer
 from PyQt5.QtGui import QFont, QColor, QTextCursor
 from PyQt5.QtWebEngineWidgets import QWebEngineView, QWebEnginePage
-import markdown
-import re
+from .block_parser import MarkdownBlockParser
+from .plain_text_editor import MarkdownTextEdit
 from .markdown_highlighter import MarkdownHighlighter
+from .viewport_highlighter import ViewportHighlighter
+from .html_sanitizer import sanitize_html
+from .markdown_renderer import MarkdownRenderer, collect_references
+from .preview_scripts import SCROLL_SYNC_SCRIPT, VIRTUAL_PREVIEW_SCRIPT, LAZY_HIGHLIGHT_SCRIPT
+from .preview_bridge import PreviewBridge, install_preview_bridge
 from .context_menu import ChineseContextMenu
 
 class MarkdownEditor(QWidget):
+    # 超过该字符数的文档使用按视口渲染的大文档预览模式
+    LARGE_DOCUMENT_THRESHOLD = 1000000
+    # 大文档预览中未渲染区段每行源码的估算高度（像素）
+    ESTIMATED_LINE_HEIGHT = 24
+    # 超过该行数的文档改为按视口分片进行语法高亮
+    LARGE_HIGHLIGHT_LINES = 10000
+    
     def __init__(self):
         super().__init__()
         self.setup_ui()
@@ -20,9 +32,33 @@ class MarkdownEditor(QWidget):
         self.editor_scrolling = False
         self.preview_scrolling = False
         
+        # 正在分块加载文件时为True，期间不更新预览
+        self.loading = False
+        
+        # 该编辑器（标签页）打开的文件路径
+        self.file_path = None
+        # 后台标签页的预览页面被释放后为True，再次切换到该标签页时重建
+        self.preview_released = False
+        # 预览最近一次滚动到的源码行号，以及预览加载完成后需要恢复到的行号
+        self.preview_line = None
+        self.pending_preview_line = None
+        
         # HTML 支持标志
         self.html_enabled = False
         
+        # Markdown渲染器
+        self.renderer = MarkdownRenderer()
+        
+        # 大文档预览的区段数据
+        self.preview_generation = 0
+        self.preview_sections = []
+        self.preview_references = {}
+        self.preview_bridge.section_provider = self.render_preview_section
+        
+        # 最近一次渲染的 (缓存键, 正文HTML)
+        self.last_preview = None
+        self.editor.document().modificationChanged.connect(self.on_modification_changed)
+        
     def setup_ui(self):
         # 创建主布局
         self.layout = QVBoxLayout(self)
@@ -34,11 +70,11 @@ class MarkdownEditor(QWidget):
         # 创建分隔器
         self.splitter = QSplitter(self.current_layout)
         
-        # 创建编辑器
-        self.editor = QTextEdit()
+        # 创建编辑器（基于QPlainTextEdit，带行号栏和当前行高亮）
+        self.editor = MarkdownTextEdit()
         self.editor.setFont(QFont("Microsoft YaHei", 11))
         self.editor.setTabStopWidth(40)
-        self.editor.setLineWrapMode(QTextEdit.WidgetWidth)
+        self.editor.setLineWrapMode(QPlainTextEdit.WidgetWidth)
         self.editor.textChanged.connect(self.on_text_changed)
         # 设置编辑器的自定义右键菜单
         self.editor.setContextMenuPolicy(Qt.CustomContextMenu)
@@ -50,21 +86,27 @@ class MarkdownEditor(QWidget):
         self.preview.setContextMenuPolicy(Qt.CustomContextMenu)
         self.preview.customContextMenuRequested.connect(self.show_preview_context_menu)
         
+        # 预览页面通过QWebChannel主动推送滚动事件，不再定时轮询
+        self.preview_bridge = PreviewBridge(self)
+        self.preview_bridge.preview_scrolled.connect(self.handle_preview_scroll_position)
+        
         # 配置WebEngine页面设置
-        self.preview_page = QWebEnginePage(self.preview)
-        self.preview.setPage(self.preview_page)
+        self.setup_preview_page()
+        self.preview.loadFinished.connect(self.on_preview_loaded)
         
         # 连接滚动条信号
         self.editor.verticalScrollBar().valueChanged.connect(self.sync_preview_scroll)
         
-        # WebEngine页面不直接提供滚动事件，我们使用定时器定期检查
-        self.scroll_check_timer = QTimer()
-        self.scroll_check_timer.timeout.connect(self.check_preview_scroll_position)
-        self.scroll_check_timer.setInterval(500)  # 每500毫秒检查一次
-        self.scroll_check_timer.start()
+        # 增量块解析器，语法高亮、预览渲染共用其解析结果（需在高亮器之前创建）
+        self.block_parser = MarkdownBlockParser(self.editor.document(), self)
+        self.block_parser.parse_finished.connect(self.on_document_parsed)
+        # 加载完成的长文档在分片解析完成后再渲染预览
+        self.preview_after_parse = False
         
         # 应用Markdown语法高亮
-        self.highlighter = MarkdownHighlighter(self.editor.document())
+        self.highlighter = MarkdownHighlighter(self.editor.document(), self.block_parser)
+        # 大文件使用的分片高亮，复用同一套高亮规则
+        self.viewport_highlighter = ViewportHighlighter(self.editor, self.highlighter, self)
         
         # 将组件添加到分隔器
         self.splitter.addWidget(self.editor)
@@ -82,43 +124,39 @@ class MarkdownEditor(QWidget):
         
         self.setLayout(self.layout)
     
+    def setup_preview_page(self):
+        """创建预览页面，并注册用于推送滚动事件的通信桥"""
+        self.preview_page = QWebEnginePage(self.preview)
+        self.preview.setPage(self.preview_page)
+        self.preview_channel = install_preview_bridge(self.preview_page, self.preview_bridge)
+    
     def on_text_changed(self):
+        # 分块加载过程中不更新预览，加载完成后统一渲染
+        if self.loading:
+            return
         # 当文本发生变化时，将在1秒后更新预览（防止频繁更新）
         # 只有在文本变化时才触发预览更新
         self.timer.start(1000)
     
     def update_preview(self):
-        # 记录编辑器当前滚动比例，用于更新后同步预览窗口位置
-        editor_scrollbar = self.editor.verticalScrollBar()
-        editor_ratio = 0
-        if editor_scrollbar.maximum() > 0:
-            editor_ratio = editor_scrollbar.value() / editor_scrollbar.maximum()
-        
+        # 预览已释放（后台标签页）时不渲染，切换回来时再更新
+        if self.preview_released:
+            return
         content = self.editor.toPlainText()
+        total_lines = self.editor.document().blockCount()
         
-        # 根据HTML支持选项决定处理方式
-        if self.html_enabled:
-            # 启用HTML支持时，直接使用HTML内容
-            # 首先尝试使用markdown解析
-            try:
-                # 使用markdown解析非HTML部分
-                html = markdown.markdown(
-                    content, 
-                    extensions=['tables', 'fenced_code', 'codehilite', 'md_in_html']
-                )
-                
-                # 安全过滤：只移除JavaScript相关内容，保留其他HTML标签
-                html = self.sanitize_html(html)
-            except Exception as e:
-                # 如果解析失败，直接使用原始内容
-                html = f"<pre>{content}</pre>"
-                print(f"Markdown解析错误: {str(e)}")
+        # 每次渲染递增页面代号，丢弃旧页面发来的区段请求
+        self.preview_generation += 1
+        
+        if len(content) > self.LARGE_DOCUMENT_THRESHOLD:
+            # 大文档：只输出带估算高度的区段占位元素，区段内容随滚动按需渲染
+            html = self.build_virtual_preview(content)
+            extra_script = VIRTUAL_PREVIEW_SCRIPT
         else:
-            # 禁用HTML支持时，将HTML标签转义
-            html = markdown.markdown(
-                content, 
-                extensions=['tables', 'fenced_code', 'codehilite']
-            )
+            # 按顶层块渲染，每个块带有 data-line 源码行号锚点
+            self.preview_sections = []
+            html = self.render_cached(content)
+            extra_script = ""
         
         # 添加一些基本的CSS样式
         html = f"""
@@ -137,11 +175,15 @@ class MarkdownEditor(QWidget):
                 th, td {{ border: 1px solid #ddd; padding: 8px; }}
                 tr:nth-child(even) {{ background-color: #f9f9f9; }}
                 svg {{ max-width: 100%; height: auto; display: block; }}
+                {self.renderer.code_highlighter.style_defs()}
             </style>
         </head>
-        <body>
+        <body data-total-lines="{total_lines}" data-generation="{self.preview_generation}">
             {html}
             <div id="end-marker" style="height: 10px;"></div>
+            <script>{SCROLL_SYNC_SCRIPT}</script>
+            <script>{extra_script}</script>
+            <script>{LAZY_HIGHLIGHT_SCRIPT}</script>
         </body>
         </html>
         """
@@ -149,43 +191,107 @@ class MarkdownEditor(QWidget):
         # 设置标志防止触发滚动同步
         self.preview_scrolling = True
         
-        # 使用QWebEngineView加载HTML内容
+        # 旧页面尚未处理的代码高亮请求已无用
+        self.preview_bridge.cancel_highlight()
+        # 使用QWebEngineView加载HTML内容，加载完成后在 on_preview_loaded 中恢复滚动位置
         self.preview.setHtml(html)
         
-        # 设置滚动位置 - 使用JS处理
-        if editor_ratio > 0:
-            script = f"document.addEventListener('DOMContentLoaded', function() {{ window.scrollTo(0, document.body.scrollHeight * {editor_ratio}); }});"
-            self.preview.page().runJavaScript(script)
-        
         # 重置标志
         self.preview_scrolling = False
     
+    def render_cached(self, content):
+        """
+        渲染正文HTML，优先使用磁盘上的预览缓存
+        只有未修改（与磁盘文件一致）的内容才写入缓存，避免编辑过程中频繁写盘
+        """
+        key = self.renderer.preview_cache_key(content, self.html_enabled)
+        html = self.renderer.preview_cache.get(key)
+        if html is None:
+            html = self.renderer.render(content, self.html_enabled, self.block_parser.blocks())
+            if not self.editor.document().isModified():
+                self.renderer.preview_cache.set(key, html)
+        self.last_preview = (key, html)
+        return html
+    
+    def on_modification_changed(self, modified):
+        """笔记保存后，把最近一次渲染结果写入预览缓存"""
+        if modified or self.last_preview is None:
+            return
+        key, html = self.last_preview
+        if key == self.renderer.preview_cache_key(self.editor.toPlainText(), self.html_enabled) \
+                and not self.renderer.preview_cache.contains(key):
+            self.renderer.preview_cache.set(key, html)
+    
+    def build_virtual_preview(self, content):
+        """生成大文档预览的区段占位元素"""
+        self.preview_sections = self.renderer.split_sections(content, blocks=self.block_parser.blocks())
+        self.preview_references = collect_references(content)
+        
+        parts = []
+        for index, section in enumerate(self.preview_sections):
+            height = section["line_count"] * self.ESTIMATED_LINE_HEIGHT
+            parts.append(
+                f'<div class="md-section" data-section="{index}" data-line="{section["line"]}" '
+                f'data-state="empty" style="height: {height}px;"></div>'
+            )
+        return '\n'.join(parts)
+    
+    def render_preview_section(self, generation, index):
+        """渲染大文档预览中的一个区段，由预览页面通过通信桥请求"""
+        if generation != self.preview_generation or not 0 <= index < len(self.preview_sections):
+            return ""
+        return self.renderer.render_blocks(
+            self.preview_sections[index]["blocks"], self.html_enabled, self.preview_references
+        )
+    
+    def release_preview(self):
+        """
+        释放预览占用的内存：销毁WebEngine页面（及其渲染进程中的内容）和已渲染的HTML，
+        编辑器文档、撤销记录和滚动位置保持不变
+        """
+        if self.preview_released:
+            return
+        self.preview_released = True
+        self.timer.stop()
+        self.preview_bridge.cancel_highlight()
+        old_page = self.preview_page
+        # 空白页面不加载任何内容，几乎不占用资源
+        self.preview_page = QWebEnginePage(self.preview)
+        self.preview.setPage(self.preview_page)
+        old_page.deleteLater()
+        self.preview_channel = None
+        self.last_preview = None
+        self.preview_sections = []
+        self.renderer.block_cache.clear()
+    
+    def restore_preview(self):
+        """重新创建被释放的预览页面并渲染"""
+        if not self.preview_released:
+            return
+        self.preview_released = False
+        blank_page = self.preview_page
+        self.setup_preview_page()
+        blank_page.deleteLater()
+        self.update_preview()
+    
+    def on_preview_loaded(self, ok):
+        """预览页面加载完成后，恢复保存的预览位置，或按编辑器当前所在行同步"""
+        if not ok:
+            return
+        if self.pending_preview_line is not None:
+            line = self.pending_preview_line
+            self.pending_preview_line = None
+            self.preview_line = line
+            self.preview.page().runJavaScript(f"window.huuScrollToLine && window.huuScrollToLine({line});")
+        else:
+            self.sync_preview_scroll(self.editor.verticalScrollBar().value())
+    
     def sanitize_html(self, html):
         """
-        安全过滤HTML内容，只移除JavaScript相关内容，保留其他HTML标签
+        安全过滤HTML内容，只保留白名单中的标签和属性
         特别注意保留SVG标签和属性
         """
-        # 移除所有script标签
-        html = re.sub(r'<script\b[^<]*(?:(?!<\/script>)<[^<]*)*<\/script>', '', html)
-        
-        # 移除所有on*事件属性
-        html = re.sub(r' on\w+="[^"]*"', '', html)
-        html = re.sub(r" on\w+='[^']*'", '', html)
-        html = re.sub(r' on\w+=\w+', '', html)
-        
-        # 移除iframe标签
-        html = re.sub(r'<iframe\b[^<]*(?:(?!<\/iframe>)<[^<]*)*<\/iframe>', '', html)
-        
-        # 移除object标签
-        html = re.sub(r'<object\b[^<]*(?:(?!<\/object>)<[^<]*)*<\/object>', '', html)
-        
-        # 移除embed标签
-        html = re.sub(r'<embed\b[^<]*(?:(?!<\/embed>)<[^<]*)*<\/embed>', '', html)
-        
-        # 移除javascript:协议
-        html = re.sub(r'javascript:', 'disabled-javascript:', html)
-        
-        return html
+        return sanitize_html(html)
     
     def direct_html_preview(self, content):
         """
@@ -255,7 +361,81 @@ class MarkdownEditor(QWidget):
         return self.editor.toPlainText()
     
     def setPlainText(self, text):
-        self.editor.setPlainText(text)
+        if text.count('\n') >= self.LARGE_HIGHLIGHT_LINES:
+            # 大文件：卸下QSyntaxHighlighter，改为先高亮可见区域、其余部分在空闲时分片处理
+            self.viewport_highlighter.stop()
+            self.highlighter.setDocument(None)
+            self.editor.setPlainText(text)
+            self.viewport_highlighter.start()
+        else:
+            self.viewport_highlighter.stop()
+            if self.highlighter.document() is None:
+                self.highlighter.setDocument(self.editor.document())
+            self.editor.setPlainText(text)
+        
+        # 预览缓存命中时立即显示，不必等待防抖定时器
+        if len(text) <= self.LARGE_DOCUMENT_THRESHOLD and \
+                self.renderer.preview_cache.contains(self.renderer.preview_cache_key(text, self.html_enabled)):
+            self.timer.stop()
+            self.update_preview()
+    
+    def begin_loading(self):
+        """
+        开始分块加载文件：清空文档，暂停语法高亮、撤销记录和预览更新，编辑器只读
+        """
+        self.timer.stop()
+        self.loading = True
+        self.preview_after_parse = False
+        self.viewport_highlighter.stop()
+        self.highlighter.setDocument(None)
+        self.block_parser.suspend()
+        self.editor.setReadOnly(True)
+        self.editor.setUndoRedoEnabled(False)
+        self.editor.clear()
+    
+    def append_loaded_text(self, text):
+        """把后台读取的一块内容追加到文档末尾"""
+        cursor = QTextCursor(self.editor.document())
+        cursor.movePosition(QTextCursor.End)
+        cursor.insertText(text)
+        # 加载的内容与磁盘一致，不算作修改
+        self.editor.document().setModified(False)
+    
+    def finish_loading(self):
+        """加载完成：恢复编辑、撤销记录和语法高亮，并立即渲染预览"""
+        self.loading = False
+        self.editor.setUndoRedoEnabled(True)
+        self.editor.setReadOnly(False)
+        self.editor.document().setModified(False)
+        self.editor.moveCursor(QTextCursor.Start)
+        
+        # 加载期间暂停的块解析器需要先于高亮器恢复
+        self.block_parser.resume()
+        if self.editor.document().blockCount() > self.LARGE_HIGHLIGHT_LINES:
+            self.viewport_highlighter.start()
+        else:
+            self.highlighter.setDocument(self.editor.document())
+            self.highlighter.rehighlight()
+        if self.block_parser.parsing:
+            # 预览需要完整的块划分，等分片解析完成，不在这里同步解析全文
+            self.preview_after_parse = True
+        else:
+            self.update_preview()
+    
+    def on_document_parsed(self):
+        if self.preview_after_parse:
+            self.preview_after_parse = False
+            self.update_preview()
+    
+    def cancel_loading(self):
+        """取消分块加载，丢弃已加载的部分"""
+        self.loading = False
+        self.editor.clear()
+        self.editor.setUndoRedoEnabled(True)
+        self.editor.setReadOnly(False)
+        self.block_parser.resume()
+        self.highlighter.setDocument(self.editor.document())
+        self.preview.setHtml("")
     
     def undo(self):
         self.editor.undo()
@@ -330,6 +510,54 @@ class MarkdownEditor(QWidget):
         """选择预览窗口中的所有内容"""
         self.preview.page().triggerAction(QWebEnginePage.SelectAll)
     
+    def editor_top_line(self):
+        """
+        获取编辑器视口顶部所在的源码行号
+        小数部分表示在该行（可能因自动换行占多行）中的相对位置
+        """
+        return self.editor.top_line()
+    
+    def scroll_editor_to_line(self, line):
+        """将编辑器滚动到指定源码行号（可带小数）"""
+        self.editor.scroll_to_line(line)
+    
+    def session_state(self):
+        """当前的光标和滚动位置，用于下次打开同一笔记时恢复"""
+        cursor = self.editor.textCursor()
+        top_line = self.editor_top_line()
+        return {
+            "cursor": cursor.position(),
+            "anchor": cursor.anchor(),
+            "top_line": round(top_line, 3),
+            "preview_line": round(self.preview_line if self.preview_line is not None else top_line, 3),
+        }
+    
+    def restore_session_state(self, state):
+        """恢复 session_state 保存的光标和滚动位置"""
+        if not state:
+            return
+        end = self.editor.document().characterCount() - 1
+        try:
+            cursor = QTextCursor(self.editor.document())
+            cursor.setPosition(min(max(0, int(state.get("anchor", 0))), end))
+            cursor.setPosition(min(max(0, int(state.get("cursor", 0))), end), QTextCursor.KeepAnchor)
+            self.editor.setTextCursor(cursor)
+            self.scroll_editor_to_line(float(state.get("top_line", 0)))
+            self.pending_preview_line = float(state.get("preview_line", state.get("top_line", 0)))
+        except (TypeError, ValueError) as e:
+            print(f"恢复会话状态失败: {e}")
+    
+    def jump_to_line(self, line):
+        """把光标移到指定行并滚动到视口顶部，预览随之同步"""
+        block = self.editor.document().findBlockByNumber(line)
+        if not block.isValid():
+            return
+        cursor = QTextCursor(block)
+        self.editor.setTextCursor(cursor)
+        self.scroll_editor_to_line(line)
+        self.sync_preview_scroll(self.editor.verticalScrollBar().value())
+        self.editor.setFocus()
+    
     def sync_preview_scroll(self, value):
         """同步编辑器滚动到预览窗口"""
         # 防止循环触发
@@ -338,59 +566,34 @@ class MarkdownEditor(QWidget):
             
         self.editor_scrolling = True
         
-        # 计算滚动比例
         editor_scrollbar = self.editor.verticalScrollBar()
         
-        # 如果编辑器滚动条最大值为0，则不进行同步
-        if editor_scrollbar.maximum() == 0:
-            self.editor_scrolling = False
-            return
-            
-        # 计算相对位置比例
-        ratio = value / editor_scrollbar.maximum()
-        
-        # 使用JavaScript设置预览窗口的滚动位置
-        js = f"window.scrollTo(0, document.body.scrollHeight * {ratio});"
+        # 到达末尾时直接滚动到预览底部，其余情况按源码行号锚点定位
+        if editor_scrollbar.maximum() > 0 and value >= editor_scrollbar.maximum():
+            js = "window.huuScrollToBottom && window.huuScrollToBottom();"
+        else:
+            self.preview_line = self.editor_top_line()
+            js = f"window.huuScrollToLine && window.huuScrollToLine({self.preview_line});"
         self.preview.page().runJavaScript(js)
         
         self.editor_scrolling = False
     
-    def check_preview_scroll_position(self):
-        """检查预览窗口滚动位置并同步到编辑器"""
-        # 如果编辑器正在滚动或预览窗口没有焦点，则不执行同步
-        if self.editor_scrolling or not self.preview.hasFocus():
+    def handle_preview_scroll_position(self, line, at_end):
+        """处理预览页面推送的滚动位置信息"""
+        # 如果编辑器正在滚动，则不执行同步
+        if self.editor_scrolling:
             return
-            
-        # 获取预览窗口滚动位置和高度
-        js = """
-        (function() {
-            var scrollTop = window.scrollY || document.documentElement.scrollTop;
-            var scrollHeight = Math.max(
-                document.body.scrollHeight,
-                document.documentElement.scrollHeight
-            ) - window.innerHeight;
-            return { scrollTop: scrollTop, scrollHeight: scrollHeight };
-        })();
-        """
-        self.preview.page().runJavaScript(js, self.handle_preview_scroll_position)
-    
-    def handle_preview_scroll_position(self, result):
-        """处理从预览窗口获取的滚动位置信息"""
+        
         # 设置标志防止循环触发
         self.preview_scrolling = True
         
         try:
-            if isinstance(result, dict) and 'scrollTop' in result and 'scrollHeight' in result:
-                scrollTop = result['scrollTop']
-                scrollHeight = result['scrollHeight']
-                
-                # 如果内容高度足够滚动
-                if scrollHeight > 0:
-                    ratio = scrollTop / scrollHeight
-                    editor_scrollbar = self.editor.verticalScrollBar()
-                    
-                    # 应用滚动比例到编辑器
-                    editor_scrollbar.setValue(int(ratio * editor_scrollbar.maximum()))
+            if at_end:
+                editor_scrollbar = self.editor.verticalScrollBar()
+                editor_scrollbar.setValue(editor_scrollbar.maximum())
+            else:
+                self.scroll_editor_to_line(line)
+            self.preview_line = line
         except Exception as e:
             print(f"同步滚动错误: {e}")
         
@@ -400,8 +603,6 @@ class MarkdownEditor(QWidget):
         """切换编辑器和预览窗口的布局方向"""
         # 保存当前分隔器的大小比例
         sizes = self.splitter.sizes()
-        total_size = sum(sizes)
-        ratio = [size / total_size for size in sizes]
         
         # 切换布局方向
         if self.current_layout == Qt.Vertical:
@@ -409,76 +610,12 @@ class MarkdownEditor(QWidget):
         else:
             self.current_layout = Qt.Vertical
         
-        # 记录当前内容和滚动位置
-        content = self.editor.toPlainText()
-        editor_scroll_value = self.editor.verticalScrollBar().value()
-        html_enabled = self.html_enabled
-        
-        # 移除旧的分隔器
-        old_splitter = self.splitter
-        self.layout.removeWidget(old_splitter)
-        
-        # 创建新的分隔器
-        self.splitter = QSplitter(self.current_layout)
-        
-        # 重新创建编辑器
-        self.editor = QTextEdit()
-        self.editor.setFont(QFont("Microsoft YaHei", 11))
-        self.editor.setTabStopWidth(40)
-        self.editor.setLineWrapMode(QTextEdit.WidgetWidth)
-        self.editor.textChanged.connect(self.on_text_changed)
-        self.editor.setPlainText(content)
-        
-        # 设置编辑器的自定义右键菜单
-        self.editor.setContextMenuPolicy(Qt.CustomContextMenu)
-        self.editor.customContextMenuRequested.connect(self.show_editor_context_menu)
-        
-        # 重新创建预览区 - 使用QWebEngineView
-        self.preview = QWebEngineView()
-        self.preview.setContextMenuPolicy(Qt.CustomContextMenu)
-        self.preview.customContextMenuRequested.connect(self.show_preview_context_menu)
-        
-        # 配置WebEngine页面
-        self.preview_page = QWebEnginePage(self.preview)
-        self.preview.setPage(self.preview_page)
-        
-        # 重新连接滚动条信号
-        self.editor.verticalScrollBar().valueChanged.connect(self.sync_preview_scroll)
-        
-        # 重新应用Markdown语法高亮
-        self.highlighter = MarkdownHighlighter(self.editor.document())
-        
-        # 将组件添加到分隔器
-        self.splitter.addWidget(self.editor)
-        self.splitter.addWidget(self.preview)
-        
-        # 移除旧的HTML复选框
-        old_checkbox = self.html_checkbox
-        self.layout.removeWidget(old_checkbox)
-        old_checkbox.deleteLater()
-        
-        # 重新创建HTML复选框
-        self.html_checkbox = QCheckBox("启用HTML支持")
-        self.html_checkbox.setToolTip("启用后可以在Markdown中嵌入HTML代码（不执行JavaScript）")
-        self.html_checkbox.stateChanged.connect(self.toggle_html_support)
-        self.html_checkbox.setChecked(html_enabled)
-        
-        # 将分隔器和新的HTML复选框添加到布局
-        self.layout.addWidget(self.splitter)
-        self.layout.addWidget(self.html_checkbox)
-        
-        # 恢复分隔器的大小比例
-        new_sizes = [int(r * total_size) for r in ratio]
-        self.splitter.setSizes(new_sizes)
-        
-        # 立即更新预览
-        self.update_preview()
-        
-        # 恢复滚动位置
-        QTimer.singleShot(100, lambda: self.editor.verticalScrollBar().setValue(editor_scroll_value))
+        # 直接修改分隔器方向，编辑器、预览页面、语法高亮和撤销历史都保持不变
+        self.splitter.setOrientation(self.current_layout)
         
-        # 销毁旧的分隔器
-        old_splitter.deleteLater()
+        # 按原有比例重新分配新方向上的大小（setSizes 会按比例缩放到分隔器的实际尺寸）
+        if sum(sizes) > 0:
+            self.splitter.setSizes(sizes)
         
     def get_layout_orientation(self):
         """获取布局方向"""
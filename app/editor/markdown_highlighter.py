@@ -1,83 +1,178 @@
-from PyQt5.QtCore import QRegExp, Qt
+from PyQt5.QtCore import QRegularExpression
 from PyQt5.QtGui import QColor, QTextCharFormat, QFont, QSyntaxHighlighter
 
+from .block_parser import (
+    STATE_NORMAL, STATE_FENCE_BACKTICK, STATE_FENCE_TILDE, STATE_HTML_BLOCK,
+    STATE_HTML_COMMENT, STATE_MASK, classify_line
+)
+
+
 class MarkdownHighlighter(QSyntaxHighlighter):
-    def __init__(self, parent=None):
+    """
+    Markdown语法高亮
+    所有规则只编译一次；每个文本块先按行首规则确定整行格式，再用一个组合正则完成行内扫描。
+    围栏代码块、HTML块和HTML注释的跨行状态取自共享的块解析器，并通过 setCurrentBlockState 记录，
+    编辑时QSyntaxHighlighter只会重新高亮状态受影响的文本块
+    """
+
+    def __init__(self, parent=None, parser=None):
         super().__init__(parent)
-        
-        self.highlighting_rules = []
-        
+        # 共享的增量块解析器，提供每一行的跨行状态
+        self.parser = parser
+
         # 标题 # 开头
-        header_format = QTextCharFormat()
-        header_format.setForeground(QColor("#0077AA"))
-        header_format.setFontWeight(QFont.Bold)
-        for i in range(1, 7):
-            pattern = QRegExp(f"^{'#' * i}\\s.*$")
-            self.highlighting_rules.append((pattern, header_format))
-        
+        self.header_format = QTextCharFormat()
+        self.header_format.setForeground(QColor("#0077AA"))
+        self.header_format.setFontWeight(QFont.Bold)
+
         # 粗体 **文字**
-        bold_format = QTextCharFormat()
-        bold_format.setFontWeight(QFont.Bold)
-        bold_format.setForeground(QColor("#303030"))
-        pattern = QRegExp("\\*\\*.*\\*\\*")
-        pattern.setMinimal(True)
-        self.highlighting_rules.append((pattern, bold_format))
-        
+        self.bold_format = QTextCharFormat()
+        self.bold_format.setFontWeight(QFont.Bold)
+        self.bold_format.setForeground(QColor("#303030"))
+
         # 斜体 *文字*
-        italic_format = QTextCharFormat()
-        italic_format.setFontItalic(True)
-        italic_format.setForeground(QColor("#303030"))
-        pattern = QRegExp("\\*.*\\*")
-        pattern.setMinimal(True)
-        self.highlighting_rules.append((pattern, italic_format))
-        
+        self.italic_format = QTextCharFormat()
+        self.italic_format.setFontItalic(True)
+        self.italic_format.setForeground(QColor("#303030"))
+
         # 链接 [文字](链接)
-        link_format = QTextCharFormat()
-        link_format.setForeground(QColor("#0077AA"))
-        link_format.setUnderlineStyle(QTextCharFormat.SingleUnderline)
-        pattern = QRegExp("\\[.*\\]\\(.*\\)")
-        pattern.setMinimal(True)
-        self.highlighting_rules.append((pattern, link_format))
-        
+        self.link_format = QTextCharFormat()
+        self.link_format.setForeground(QColor("#0077AA"))
+        self.link_format.setUnderlineStyle(QTextCharFormat.SingleUnderline)
+
         # 行内代码 `代码`
-        inline_code_format = QTextCharFormat()
-        inline_code_format.setForeground(QColor("#D0384D"))
-        inline_code_format.setBackground(QColor("#F0F0F0"))
-        pattern = QRegExp("`.*`")
-        pattern.setMinimal(True)
-        self.highlighting_rules.append((pattern, inline_code_format))
-        
+        self.inline_code_format = QTextCharFormat()
+        self.inline_code_format.setForeground(QColor("#D0384D"))
+        self.inline_code_format.setBackground(QColor("#F0F0F0"))
+
         # 代码块 ```代码```
-        code_block_format = QTextCharFormat()
-        code_block_format.setForeground(QColor("#D0384D"))
-        code_block_format.setBackground(QColor("#F0F0F0"))
-        pattern = QRegExp("```.*```")
-        pattern.setMinimal(True)
-        self.highlighting_rules.append((pattern, code_block_format))
-        
+        self.code_block_format = QTextCharFormat()
+        self.code_block_format.setForeground(QColor("#D0384D"))
+        self.code_block_format.setBackground(QColor("#F0F0F0"))
+
         # 引用 > 文字
-        quote_format = QTextCharFormat()
-        quote_format.setForeground(QColor("#777777"))
-        pattern = QRegExp("^>.*$")
-        self.highlighting_rules.append((pattern, quote_format))
-        
-        # 列表项 - 文字 或 * 文字
-        list_format = QTextCharFormat()
-        list_format.setForeground(QColor("#8B4726"))
-        pattern = QRegExp("^[-*+]\\s.*$")
-        self.highlighting_rules.append((pattern, list_format))
-        
-        # 数字列表项 1. 文字
-        numbered_list_format = QTextCharFormat()
-        numbered_list_format.setForeground(QColor("#8B4726"))
-        pattern = QRegExp("^\\d+\\.\\s.*$")
-        self.highlighting_rules.append((pattern, numbered_list_format))
-    
+        self.quote_format = QTextCharFormat()
+        self.quote_format.setForeground(QColor("#777777"))
+
+        # 列表项 - 文字 或 * 文字，数字列表项 1. 文字
+        self.list_format = QTextCharFormat()
+        self.list_format.setForeground(QColor("#8B4726"))
+
+        # HTML标签和注释
+        self.html_format = QTextCharFormat()
+        self.html_format.setForeground(QColor("#2E8B57"))
+        self.comment_format = QTextCharFormat()
+        self.comment_format.setForeground(QColor("#999999"))
+
+        # 行首规则，按顺序匹配，第一个命中的决定整行格式
+        self.line_rules = [
+            (QRegularExpression(r"^#{1,6}\s.*$"), self.header_format),
+            (QRegularExpression(r"^>.*$"), self.quote_format),
+            (QRegularExpression(r"^\s*[-*+]\s.*$"), self.list_format),
+            (QRegularExpression(r"^\s*\d+\.\s.*$"), self.list_format),
+        ]
+
+        # 行内规则合并为一个正则，一次扫描完成；分支顺序即优先级（行内代码中的星号不再按粗体处理）
+        self.inline_formats = [
+            ("code", self.inline_code_format),
+            ("bold", self.bold_format),
+            ("italic", self.italic_format),
+            ("link", self.link_format),
+            ("html", self.html_format),
+        ]
+        self.inline_expression = QRegularExpression(
+            r"(?<code>`[^`]+`)"
+            r"|(?<bold>\*\*.+?\*\*|__.+?__)"
+            r"|(?<italic>\*[^*\s][^*]*?\*|\b_[^_\s][^_]*?_\b)"
+            r"|(?<link>!?\[[^\]]*\]\([^)]*\))"
+            r"|(?<html></?[A-Za-z][^<>]*>|<!--.*?-->)"
+        )
+        self.html_tag_expression = QRegularExpression(r"</?[A-Za-z][^<>]*>")
+        # 跨行HTML注释的结束位置
+        self.comment_end_expression = QRegularExpression(r"-->")
+
     def highlightBlock(self, text):
-        for pattern, format in self.highlighting_rules:
-            expression = QRegExp(pattern)
-            index = expression.indexIn(text)
-            while index >= 0:
-                length = expression.matchedLength()
-                self.setFormat(index, length, format)
-                index = expression.indexIn(text, index + length)
\ No newline at end of file
+        state, ranges = self.analyze_block(self.currentBlock(), self.previousBlockState())
+        for start, count, text_format in ranges:
+            self.setFormat(start, count, text_format)
+        self.setCurrentBlockState(state)
+
+    def analyze_block(self, block, previous):
+        """
+        分析一个文本块，返回 (当前块状态, [(起始位置, 长度, 格式), ...])
+        有块解析器时直接使用其中的行状态，否则根据 previous 自行计算
+        """
+        text = block.text()
+        # setFormat 使用UTF-16长度，与Python字符串长度可能不同
+        length = block.length() - 1
+        if self.parser is not None:
+            number = block.blockNumber()
+            state = self.parser.line_state(number)
+            if state is not None:
+                return self.analyze(text, length, self.parser.state_before(number), state)
+        return self.analyze(text, length, previous)
+
+    def analyze(self, text, length, previous, state=None):
+        """
+        分析一行文本，previous 为上一行结束时的状态，state 为已知的本行状态
+        不依赖QSyntaxHighlighter，也供大文件的分片高亮使用
+        """
+        if previous < 0:
+            previous = STATE_NORMAL
+        if state is None:
+            state = classify_line(text, previous)
+        kind = previous & STATE_MASK
+        ranges = []
+
+        if kind in (STATE_FENCE_BACKTICK, STATE_FENCE_TILDE):
+            ranges.append((0, length, self.code_block_format))
+            return state, ranges
+
+        if kind == STATE_HTML_COMMENT:
+            if state == STATE_HTML_COMMENT:
+                ranges.append((0, length, self.comment_format))
+            else:
+                match = self.comment_end_expression.match(text)
+                ranges.append((0, match.capturedEnd(), self.comment_format))
+            return state, ranges
+
+        if kind == STATE_HTML_BLOCK:
+            if state == STATE_HTML_BLOCK:
+                self.html_tag_ranges(text, ranges)
+            return state, ranges
+
+        kind = state & STATE_MASK
+        if kind in (STATE_FENCE_BACKTICK, STATE_FENCE_TILDE):
+            # 围栏代码块开始
+            ranges.append((0, length, self.code_block_format))
+        elif kind == STATE_HTML_COMMENT:
+            ranges.append((0, length, self.comment_format))
+        elif kind == STATE_HTML_BLOCK:
+            self.html_tag_ranges(text, ranges)
+        else:
+            self.markdown_line_ranges(text, ranges)
+        return state, ranges
+
+    def markdown_line_ranges(self, text, ranges):
+        """普通Markdown行：行首规则 + 一次组合行内扫描"""
+        for expression, line_format in self.line_rules:
+            match = expression.match(text)
+            if match.hasMatch():
+                ranges.append((match.capturedStart(), match.capturedLength(), line_format))
+                break
+
+        iterator = self.inline_expression.globalMatch(text)
+        while iterator.hasNext():
+            match = iterator.next()
+            for name, inline_format in self.inline_formats:
+                start = match.capturedStart(name)
+                if start >= 0:
+                    ranges.append((start, match.capturedLength(name), inline_format))
+                    break
+
+    def html_tag_ranges(self, text, ranges):
+        """高亮HTML块中的标签"""
+        iterator = self.html_tag_expression.globalMatch(text)
+        while iterator.hasNext():
+            match = iterator.next()
+            ranges.append((match.capturedStart(), match.capturedLength(), self.html_format))
@@ -0,0 +1,247 @@
+import os
+import re
+from collections import OrderedDict
+from html import escape
+
+import markdown
+
+from .html_sanitizer import sanitize_html
+from .code_highlighter import LazyCodeExtension, shared_code_highlighter
+from app.utils.config_manager import ConfigManager
+from app.utils.disk_cache import DiskCache, content_hash
+
+
+# 顶层块识别用的正则
+FENCE_RE = re.compile(r'^ {0,3}(`{3,}|~{3,})')
+LIST_RE = re.compile(r'^ {0,3}(?:[-*+]|\d+[.)])\s')
+HTML_OPEN_RE = re.compile(r'^ {0,3}<([A-Za-z][\w-]*)')
+REFERENCE_RE = re.compile(
+    r'^[ ]{0,3}\[([^\[\]]*)\]:[ ]*<?([^\s>]+)>?[ ]*'
+    r'(?:(["\'])(.*)\3[ ]*|\((.*)\)[ ]*)?$',
+    re.MULTILINE
+)
+
+# 不需要闭合的HTML标签
+VOID_TAGS = {'area', 'br', 'col', 'embed', 'hr', 'img', 'input', 'link', 'meta', 'source', 'wbr'}
+
+
+def split_blocks(text):
+    """
+    将Markdown源文本切分为顶层块
+    返回 [(起始行号, 块文本), ...]，行号从0开始，与编辑器中的文本块编号一致
+    围栏代码块、HTML块、松散列表和跨空行的引用会被保持在同一个块中
+    """
+    lines = text.split('\n')
+    return [(start, block_text(lines, start, end)) for start, end in iter_blocks(lines)]
+
+
+def block_text(lines, start, end):
+    """取出 [start, end) 行组成的块文本"""
+    return '\n'.join(lines[start:end]).rstrip('\n')
+
+
+def iter_blocks(lines, start=0):
+    """
+    从第 start 行开始逐个产生顶层块的行范围 (起始行号, 结束行号)，结束行号不包含在块内
+    块的划分只依赖起始行之后的内容，增量解析时可以从任意块的起始行重新开始
+    """
+    count = len(lines)
+    i = start
+
+    while i < count:
+        # 跳过块之间的空行
+        if not lines[i].strip():
+            i += 1
+            continue
+
+        start = i
+        first = lines[i]
+        is_list = bool(LIST_RE.match(first))
+        is_quote = first.lstrip().startswith('>')
+        fence = None
+        html_tag = None
+        html_depth = 0
+
+        m = HTML_OPEN_RE.match(first)
+        if m and m.group(1).lower() not in VOID_TAGS:
+            html_tag = m.group(1).lower()
+
+        while i < count:
+            line = lines[i]
+
+            # 围栏代码块内部的空行不结束块
+            m = FENCE_RE.match(line)
+            if fence is None:
+                if m:
+                    fence = m.group(1)
+                    i += 1
+                    continue
+            else:
+                if m and m.group(1)[0] == fence[0] and len(m.group(1)) >= len(fence) \
+                        and not line.strip().strip(fence[0]):
+                    fence = None
+                i += 1
+                continue
+
+            if html_tag:
+                lower = line.lower()
+                html_depth += len(re.findall(rf'<{html_tag}\b', lower))
+                html_depth -= lower.count(f'</{html_tag}')
+
+            if line.strip():
+                i += 1
+                continue
+
+            # 遇到空行：HTML块未闭合时继续
+            if html_tag and html_depth > 0:
+                i += 1
+                continue
+
+            # 向后查找下一个非空行，判断是否为当前块的延续
+            j = i
+            while j < count and not lines[j].strip():
+                j += 1
+            if j >= count:
+                break
+            following = lines[j]
+            if following.startswith(('    ', '\t')) \
+                    or (is_list and LIST_RE.match(following)) \
+                    or (is_quote and following.lstrip().startswith('>')):
+                i = j
+                continue
+            break
+
+        yield start, i
+
+
+def collect_references(text):
+    """收集整篇文档中的引用式链接定义，使分块渲染时引用链接仍然有效"""
+    references = {}
+    for m in REFERENCE_RE.finditer(text):
+        key = m.group(1).strip().lower()
+        title = m.group(4) if m.group(4) is not None else m.group(5)
+        references[key] = (m.group(2), title)
+    return references
+
+
+_shared_preview_cache = None
+
+
+def shared_preview_cache():
+    """所有编辑器标签页共用的预览HTML磁盘缓存，缓存大小只统计和淘汰一次"""
+    global _shared_preview_cache
+    if _shared_preview_cache is None:
+        _shared_preview_cache = DiskCache(
+            os.path.join(ConfigManager().cache_dir, 'preview'),
+            max_size=100 * 1024 * 1024
+        )
+    return _shared_preview_cache
+
+
+class MarkdownRenderer:
+    """
+    Markdown渲染器
+    按顶层块分别渲染，并为每个块输出 data-line 源码行号锚点，用于精确的滚动同步
+    """
+
+    # 修改渲染输出格式时递增，使旧的预览缓存失效
+    VERSION = 1
+    # 内存中保留的已渲染块数量
+    MAX_CACHED_BLOCKS = 5000
+
+    def __init__(self):
+        # 已渲染并过滤的预览HTML磁盘缓存，重新打开笔记时可立即显示
+        self.preview_cache = shared_preview_cache()
+        # 代码块高亮延迟到预览页面请求时进行，结果按内容哈希缓存
+        self.code_highlighter = shared_code_highlighter()
+        self.markdown_parser = markdown.Markdown(
+            extensions=['tables', 'fenced_code', LazyCodeExtension(self.code_highlighter)]
+        )
+        self.html_markdown_parser = markdown.Markdown(
+            extensions=['tables', 'fenced_code', 'md_in_html', LazyCodeExtension(self.code_highlighter)]
+        )
+        # 已渲染块的内存缓存，键为 (是否启用HTML, 块文本)；编辑时只有改动的块需要重新渲染
+        self.block_cache = OrderedDict()
+        self.block_cache_references = None
+
+    def render(self, content, html_enabled=False, blocks=None):
+        """
+        渲染Markdown为预览页面的正文HTML
+        blocks 为已切分好的顶层块（例如来自编辑器的增量块解析器），未提供时从 content 切分
+        启用HTML支持时对结果进行白名单过滤
+        """
+        if blocks is None:
+            blocks = split_blocks(content)
+        return self.render_blocks(blocks, html_enabled, collect_references(content))
+
+    def preview_cache_key(self, content, html_enabled):
+        """预览缓存键：内容哈希 + 渲染器版本 + HTML支持开关"""
+        return content_hash(self.VERSION, bool(html_enabled), content)
+
+    def render_blocks(self, blocks, html_enabled, references):
+        """渲染一组顶层块，每个块包裹在带有 data-line 锚点的容器中"""
+        parser = self.html_markdown_parser if html_enabled else self.markdown_parser
+
+        # 引用式链接定义变化时，已缓存的块可能失效
+        if references != self.block_cache_references:
+            self.block_cache.clear()
+            self.block_cache_references = references
+
+        parts = []
+        for line, block in blocks:
+            key = (html_enabled, block)
+            html = self.block_cache.get(key)
+            if html is None:
+                html = self.render_block(parser, block, references)
+                if html_enabled:
+                    html = sanitize_html(html)
+                # 含待高亮代码块的结果不缓存，高亮结果就绪后再渲染时可直接内联
+                if 'data-highlight="pending"' not in html:
+                    self.block_cache[key] = html
+                    if len(self.block_cache) > self.MAX_CACHED_BLOCKS:
+                        self.block_cache.popitem(last=False)
+            else:
+                self.block_cache.move_to_end(key)
+            parts.append(f'<div class="md-block" data-line="{line}">{html}</div>')
+
+        return '\n'.join(parts)
+
+    def split_sections(self, content, section_lines=200, blocks=None):
+        """
+        将文档切分为若干区段，供大文档预览按需渲染
+        每个区段包含若干完整的顶层块，约 section_lines 行源码
+        返回 [{"line": 起始行号, "line_count": 行数, "blocks": [...]}, ...]
+        """
+        if blocks is None:
+            blocks = split_blocks(content)
+        sections = []
+        current = []
+        for line, block in blocks:
+            if current and line - current[0][0] >= section_lines:
+                sections.append(current)
+                current = []
+            current.append((line, block))
+        if current:
+            sections.append(current)
+
+        result = []
+        for i, blocks in enumerate(sections):
+            start = blocks[0][0]
+            if i + 1 < len(sections):
+                end = sections[i + 1][0][0]
+            else:
+                last_line, last_block = blocks[-1]
+                end = last_line + last_block.count('\n') + 1
+            result.append({"line": start, "line_count": end - start, "blocks": blocks})
+        return result
+
+    def render_block(self, parser, block, references):
+        """渲染单个顶层块"""
+        try:
+            parser.reset()
+            parser.references.update(references)
+            return parser.convert(block)
+        except Exception as e:
+            # 如果解析失败，直接显示原始内容
+            print(f"Markdown解析错误: {str(e)}")
+            return f"<pre>{escape(block)}</pre>"
@@ -0,0 +1,69 @@
+from PyQt5.QtWidgets import QWidget, QVBoxLayout, QListWidget, QListWidgetItem
+from PyQt5.QtCore import pyqtSignal
+from PyQt5.QtGui import QFont
+
+
+class OutlinePanel(QWidget):
+    """
+    笔记大纲面板
+    标题列表来自编辑器共享的增量块解析器，只替换发生变化的那部分列表项；
+    列表项不保存行号，点击时按序号从解析器中读取当前行号，行号整体平移时无需更新界面
+    """
+    heading_selected = pyqtSignal(int)
+
+    # 每级标题的缩进（空格数）
+    INDENT = 4
+
+    def __init__(self, parser=None, parent=None):
+        super().__init__(parent)
+        self.parser = None
+        self.setup_ui()
+        self.set_parser(parser)
+
+    def setup_ui(self):
+        layout = QVBoxLayout(self)
+        layout.setContentsMargins(0, 0, 0, 0)
+
+        self.list_widget = QListWidget()
+        self.list_widget.setUniformItemSizes(True)
+        self.list_widget.itemClicked.connect(self.on_item_clicked)
+        layout.addWidget(self.list_widget)
+
+        self.setLayout(layout)
+
+    def set_parser(self, parser):
+        """切换到另一篇笔记的块解析器（例如切换标签页时）"""
+        if parser is self.parser:
+            return
+        if self.parser is not None:
+            self.parser.headings_changed.disconnect(self.on_headings_changed)
+        self.parser = parser
+        self.list_widget.clear()
+        if parser is not None:
+            parser.headings_changed.connect(self.on_headings_changed)
+            self.on_headings_changed(0, 0, len(parser.headings))
+
+    def create_item(self, level, title):
+        item = QListWidgetItem(" " * (self.INDENT * (level - 1)) + (title or "(无标题)"))
+        if level <= 2:
+            font = QFont()
+            font.setBold(True)
+            item.setFont(font)
+        return item
+
+    def on_headings_changed(self, index, removed, added):
+        """用解析器中 [index, index + added) 的标题替换列表中原有的 removed 项"""
+        many = removed + added > 100
+        if many:
+            self.list_widget.setUpdatesEnabled(False)
+        for _ in range(removed):
+            self.list_widget.takeItem(index)
+        for offset, (_, level, title) in enumerate(self.parser.headings[index:index + added]):
+            self.list_widget.insertItem(index + offset, self.create_item(level, title))
+        if many:
+            self.list_widget.setUpdatesEnabled(True)
+
+    def on_item_clicked(self, item):
+        row = self.list_widget.row(item)
+        if self.parser is not None and 0 <= row < len(self.parser.headings):
+            self.heading_selected.emit(self.parser.headings[row][0])
@@ -0,0 +1,83 @@
+from PyQt5.QtCore import QObject, QFile, QIODevice, pyqtSignal, pyqtSlot
+from PyQt5.QtWebChannel import QWebChannel
+from PyQt5.QtWebEngineWidgets import QWebEngineScript
+
+from .code_highlighter import shared_code_highlight_worker
+from .preview_scripts import SCROLL_CHANNEL_SCRIPT
+
+
+class PreviewBridge(QObject):
+    """
+    预览页面与Python之间的通信桥
+    页面只在用户滚动时通过QWebChannel推送（节流后的）滚动位置，不再需要定时轮询
+    """
+    # 预览顶部对应的源码行号, 是否已滚动到底部
+    preview_scrolled = pyqtSignal(float, bool)
+    # 代码块高亮完成 (请求编号, 高亮HTML)，页面脚本连接该信号
+    code_highlighted = pyqtSignal(str, str)
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        # 大文档预览的区段渲染函数，签名为 (generation, index) -> html
+        self.section_provider = None
+        # 后台高亮线程，第一次请求高亮时连接
+        self.highlight_worker = None
+
+    @pyqtSlot(float, bool)
+    def on_scroll(self, line, at_end):
+        """由页面脚本调用"""
+        self.preview_scrolled.emit(line, at_end)
+
+    @pyqtSlot(int, int, result=str)
+    def render_section(self, generation, index):
+        """由页面脚本调用，返回大文档预览中指定区段的HTML"""
+        if self.section_provider is None:
+            return ""
+        return self.section_provider(generation, index)
+
+    @pyqtSlot(str, str, str)
+    def request_highlight(self, request_id, lang, code):
+        """由页面脚本调用，在后台线程中高亮代码块，完成后发出 code_highlighted"""
+        if self.highlight_worker is None:
+            self.highlight_worker = shared_code_highlight_worker()
+            self.highlight_worker.code_highlighted.connect(self.on_code_highlighted)
+        self.highlight_worker.request(self, request_id, lang, code)
+
+    def cancel_highlight(self):
+        """预览页面重新加载或被释放，丢弃尚未处理的高亮请求"""
+        if self.highlight_worker is not None:
+            self.highlight_worker.cancel(self)
+
+    def on_code_highlighted(self, owner, request_id, html):
+        # 高亮线程由所有预览页面共用，只处理自己的请求
+        if owner is self:
+            self.code_highlighted.emit(request_id, html)
+
+
+def load_qwebchannel_js():
+    """从Qt资源中读取 qwebchannel.js"""
+    file = QFile(":/qtwebchannel/qwebchannel.js")
+    if not file.open(QIODevice.ReadOnly):
+        print("无法加载 qwebchannel.js")
+        return ""
+    try:
+        return bytes(file.readAll()).decode("utf-8")
+    finally:
+        file.close()
+
+
+def install_preview_bridge(page, bridge):
+    """为预览页面注册通信桥，并注入页面端的滚动推送脚本"""
+    channel = QWebChannel(page)
+    channel.registerObject("huuBridge", bridge)
+    page.setWebChannel(channel)
+
+    script = QWebEngineScript()
+    script.setName("huu-preview-bridge")
+    script.setSourceCode(load_qwebchannel_js() + SCROLL_CHANNEL_SCRIPT)
+    script.setInjectionPoint(QWebEngineScript.DocumentReady)
+    script.setWorldId(QWebEngineScript.MainWorld)
+    script.setRunsOnSubFrames(False)
+    page.scripts().insert(script)
+
+    return channel
@@ -0,0 +1,289 @@
+# 注入到预览页面中的JavaScript脚本
+
+# 基于 data-line 源码行号锚点的滚动同步
+# 锚点位置只在页面尺寸变化或图片加载后重新测量，每次滚动只做二分查找
+SCROLL_SYNC_SCRIPT = """
+(function() {
+    var lines = [];
+    var tops = [];
+    var dirty = true;
+
+    function totalLines() {
+        return parseInt(document.body.getAttribute('data-total-lines') || '0', 10);
+    }
+
+    function endTop() {
+        var marker = document.getElementById('end-marker');
+        return marker ? marker.getBoundingClientRect().top + window.scrollY
+                      : document.body.scrollHeight;
+    }
+
+    function measure() {
+        var nodes = document.querySelectorAll('[data-line]');
+        var offset = window.scrollY;
+        lines = new Array(nodes.length);
+        tops = new Array(nodes.length);
+        for (var i = 0; i < nodes.length; i++) {
+            lines[i] = parseInt(nodes[i].getAttribute('data-line'), 10);
+            tops[i] = nodes[i].getBoundingClientRect().top + offset;
+        }
+        dirty = false;
+    }
+
+    // 返回最后一个不大于 value 的元素下标，不存在时返回 -1
+    function search(values, value) {
+        var lo = 0, hi = values.length - 1, found = -1;
+        while (lo <= hi) {
+            var mid = (lo + hi) >> 1;
+            if (values[mid] <= value) {
+                found = mid;
+                lo = mid + 1;
+            } else {
+                hi = mid - 1;
+            }
+        }
+        return found;
+    }
+
+    function segment(i) {
+        var last = i + 1 >= lines.length;
+        return {
+            line: lines[i],
+            top: tops[i],
+            nextLine: last ? totalLines() : lines[i + 1],
+            nextTop: last ? endTop() : tops[i + 1]
+        };
+    }
+
+    window.huuMarkDirty = function() {
+        dirty = true;
+    };
+
+    // 程序触发的滚动，记录目标位置以便滚动事件中忽略，避免与编辑器互相触发
+    window.huuProgrammaticY = -1;
+    window.huuScrollTo = function(y) {
+        window.scrollTo(0, y);
+        window.huuProgrammaticY = window.scrollY;
+    };
+
+    window.huuScrollToBottom = function() {
+        window.huuScrollTo(document.body.scrollHeight);
+    };
+
+    window.huuScrollToLine = function(line) {
+        if (dirty) measure();
+        var i = search(lines, line);
+        if (i < 0) {
+            window.huuScrollTo(0);
+            return;
+        }
+        var s = segment(i);
+        var span = s.nextLine - s.line;
+        var ratio = span > 0 ? Math.min(1, (line - s.line) / span) : 0;
+        window.huuScrollTo(s.top + ratio * (s.nextTop - s.top));
+    };
+
+    window.huuLineAtScroll = function() {
+        if (dirty) measure();
+        var y = window.scrollY;
+        var i = search(tops, y);
+        if (i < 0) return 0;
+        var s = segment(i);
+        var height = s.nextTop - s.top;
+        var ratio = height > 0 ? Math.min(1, (y - s.top) / height) : 0;
+        return s.line + ratio * (s.nextLine - s.line);
+    };
+
+    window.addEventListener('resize', window.huuMarkDirty);
+    document.addEventListener('load', window.huuMarkDirty, true);
+})();
+"""
+
+# 通过QWebChannel把用户滚动推送给Python，由 PreviewBridge 接收
+# 滚动事件按最小间隔节流，并保证最后一次位置一定会被发送
+SCROLL_CHANNEL_SCRIPT = """
+(function() {
+    if (typeof qt === 'undefined' || !qt.webChannelTransport) return;
+
+    var THROTTLE_MS = 50;
+    var bridge = null;
+    var pending = false;
+    var lastSent = 0;
+
+    new QWebChannel(qt.webChannelTransport, function(channel) {
+        bridge = channel.objects.huuBridge;
+        window.huuBridge = bridge;
+        document.dispatchEvent(new Event('huu-bridge-ready'));
+    });
+
+    function send() {
+        pending = false;
+        lastSent = Date.now();
+        if (!bridge || !window.huuLineAtScroll) return;
+        var atEnd = window.innerHeight + window.scrollY >= document.body.scrollHeight - 1;
+        bridge.on_scroll(window.huuLineAtScroll(), atEnd);
+    }
+
+    window.addEventListener('scroll', function() {
+        if (window.huuProgrammaticY >= 0 &&
+                Math.abs(window.scrollY - window.huuProgrammaticY) < 1) {
+            window.huuProgrammaticY = -1;
+            return;
+        }
+        window.huuProgrammaticY = -1;
+        if (pending) return;
+        pending = true;
+        setTimeout(send, Math.max(0, THROTTLE_MS - (Date.now() - lastSent)));
+    }, { passive: true });
+})();
+"""
+
+# 大文档预览：只渲染视口附近（上下各一屏余量）的区段，其余区段用估算高度的占位元素代替
+# 区段内容通过 PreviewBridge.render_section 按需向Python请求，离开余量范围后释放DOM
+VIRTUAL_PREVIEW_SCRIPT = """
+(function() {
+    var generation = parseInt(document.body.getAttribute('data-generation') || '0', 10);
+    var loading = {};
+
+    function render(section) {
+        var index = parseInt(section.getAttribute('data-section'), 10);
+        if (section.getAttribute('data-state') !== 'empty' || loading[index]) return;
+        loading[index] = true;
+        window.huuBridge.render_section(generation, index, function(html) {
+            loading[index] = false;
+            if (section.getAttribute('data-state') !== 'empty') return;
+            var before = section.getBoundingClientRect();
+            section.innerHTML = html;
+            section.style.height = '';
+            section.setAttribute('data-state', 'rendered');
+            var after = section.getBoundingClientRect();
+            // 视口上方的区段高度变化时修正滚动位置，避免内容跳动
+            if (before.top < 0 && after.height !== before.height) {
+                window.huuScrollTo(window.scrollY + after.height - before.height);
+            }
+            if (window.huuScanCodeBlocks) window.huuScanCodeBlocks(section);
+            window.huuMarkDirty();
+        });
+    }
+
+    function release(section) {
+        if (section.getAttribute('data-state') !== 'rendered') return;
+        section.style.height = section.getBoundingClientRect().height + 'px';
+        section.innerHTML = '';
+        section.setAttribute('data-state', 'empty');
+        window.huuMarkDirty();
+    }
+
+    function start() {
+        var observer = new IntersectionObserver(function(entries) {
+            entries.forEach(function(entry) {
+                if (entry.isIntersecting) {
+                    render(entry.target);
+                } else {
+                    release(entry.target);
+                }
+            });
+        }, { rootMargin: '100% 0px 100% 0px' });
+
+        var sections = document.querySelectorAll('.md-section');
+        for (var i = 0; i < sections.length; i++) {
+            observer.observe(sections[i]);
+        }
+    }
+
+    if (window.huuBridge) {
+        start();
+    } else {
+        document.addEventListener('huu-bridge-ready', start);
+    }
+})();
+"""
+
+# 代码块延迟高亮：页面先显示普通 <pre>，可见的代码块立即请求高亮，
+# 视口外的代码块在浏览器空闲时逐个处理。高亮在Python的后台线程中进行，
+# 结果通过 code_highlighted 信号按请求编号送回；编号带有页面标识，重新加载前的结果不会被误用
+LAZY_HIGHLIGHT_SCRIPT = """
+(function() {
+    var queue = [];
+    var idleScheduled = false;
+    var pageId = Math.random().toString(36).slice(2);
+    var nextId = 0;
+    var callbacks = {};
+    var connected = false;
+
+    function onHighlighted(requestId, html) {
+        var callback = callbacks[requestId];
+        if (!callback) return;
+        delete callbacks[requestId];
+        callback(html);
+    }
+
+    function highlight(pre, done) {
+        if (!connected) {
+            window.huuBridge.code_highlighted.connect(onHighlighted);
+            connected = true;
+        }
+        pre.setAttribute('data-highlight', 'running');
+        var code = pre.querySelector('code') || pre;
+        var lang = pre.getAttribute('data-lang') || '';
+        var requestId = pageId + ':' + (nextId++);
+        callbacks[requestId] = function(html) {
+            if (html && pre.parentNode) {
+                var holder = document.createElement('div');
+                holder.innerHTML = html;
+                pre.parentNode.replaceChild(holder.firstElementChild || holder, pre);
+                window.huuMarkDirty();
+            }
+            if (done) done();
+        };
+        window.huuBridge.request_highlight(requestId, lang, code.textContent);
+    }
+
+    function schedule() {
+        if (idleScheduled || !queue.length) return;
+        idleScheduled = true;
+        window.requestIdleCallback(processIdle, { timeout: 2000 });
+    }
+
+    function processIdle() {
+        idleScheduled = false;
+        while (queue.length) {
+            var pre = queue.shift();
+            if (pre.isConnected && pre.getAttribute('data-highlight') === 'pending') {
+                highlight(pre, schedule);
+                return;
+            }
+        }
+    }
+
+    var observer = new IntersectionObserver(function(entries) {
+        entries.forEach(function(entry) {
+            if (!entry.isIntersecting) return;
+            observer.unobserve(entry.target);
+            if (entry.target.getAttribute('data-highlight') === 'pending') {
+                highlight(entry.target);
+            }
+        });
+    });
+
+    window.huuScanCodeBlocks = function(root) {
+        if (!window.huuBridge) return;
+        var blocks = root.querySelectorAll('pre[data-highlight="pending"]');
+        for (var i = 0; i < blocks.length; i++) {
+            observer.observe(blocks[i]);
+            queue.push(blocks[i]);
+        }
+        schedule();
+    };
+
+    function start() {
+        window.huuScanCodeBlocks(document);
+    }
+
+    if (window.huuBridge) {
+        start();
+    } else {
+        document.addEventListener('huu-bridge-ready', start);
+    }
+})();
+"""
@@ -0,0 +1,188 @@
+import time
+
+from PyQt5.QtCore import QObject, QTimer, QPoint
+from PyQt5.QtGui import QTextLayout
+
+from .block_parser import STATE_NORMAL
+
+
+class ViewportHighlighter(QObject):
+    """
+    大文件的分片语法高亮
+    不挂接QSyntaxHighlighter（它会在 setPlainText 时同步高亮整篇文档），
+    而是先格式化视口中可见的文本块，其余文本块在空闲时按时间片逐段处理。
+    格式通过 QTextLayout.setFormats 直接写入文本块布局，块状态保存在 userState 中
+    """
+
+    # 每个时间片的处理时长（秒）
+    SLICE_SECONDS = 0.008
+    # 编辑时同步重新高亮的时间上限（秒），超出部分交给空闲时间片
+    EDIT_BUDGET_SECONDS = 0.004
+
+    def __init__(self, editor, rules, parent=None):
+        super().__init__(parent)
+        self.editor = editor
+        # 提供 analyze_block(block, previous_state) 的高亮规则，即 MarkdownHighlighter
+        self.rules = rules
+        self.active = False
+        self.formatting = False
+        # 从文档开头起已按正确状态高亮的文本块数
+        self.formatted_until = 0
+        self.block_count = 0
+
+        self.idle_timer = QTimer(self)
+        self.idle_timer.setInterval(0)
+        self.idle_timer.timeout.connect(self.process_slice)
+
+        self.visible_timer = QTimer(self)
+        self.visible_timer.setSingleShot(True)
+        self.visible_timer.setInterval(0)
+        self.visible_timer.timeout.connect(self.highlight_visible)
+
+    def document(self):
+        return self.editor.document()
+
+    def start(self):
+        """开始高亮当前文档：先处理可见区域，再在空闲时处理其余部分"""
+        if not self.active:
+            self.active = True
+            self.document().contentsChange.connect(self.on_contents_change)
+            self.editor.verticalScrollBar().valueChanged.connect(self.schedule_visible)
+        self.formatted_until = 0
+        self.block_count = self.document().blockCount()
+        self.highlight_visible()
+        self.idle_timer.start()
+
+    def stop(self):
+        """停止分片高亮（切换回普通的QSyntaxHighlighter时调用）"""
+        if not self.active:
+            return
+        self.active = False
+        self.idle_timer.stop()
+        self.visible_timer.stop()
+        self.document().contentsChange.disconnect(self.on_contents_change)
+        self.editor.verticalScrollBar().valueChanged.disconnect(self.schedule_visible)
+
+    def is_finished(self):
+        return self.formatted_until >= self.document().blockCount()
+
+    def schedule_visible(self, *args):
+        """滚动后合并到下一次事件循环中高亮可见区域"""
+        if self.active:
+            self.visible_timer.start()
+
+    def visible_blocks(self):
+        """返回视口中第一个和最后一个可见的文本块"""
+        viewport = self.editor.viewport()
+        first = self.editor.cursorForPosition(QPoint(0, 0)).block()
+        last = self.editor.cursorForPosition(QPoint(0, viewport.height())).block()
+        # 文档尚未完成布局时两者的顺序可能颠倒
+        if last.blockNumber() < first.blockNumber():
+            first, last = last, first
+        return first, last
+
+    def previous_state(self, block):
+        """取前一个文本块的状态；前一块尚未正确高亮时按普通状态估计"""
+        previous = block.previous()
+        if not previous.isValid() or previous.blockNumber() >= self.formatted_until:
+            return STATE_NORMAL
+        return previous.userState()
+
+    def format_block(self, block, previous_state):
+        """格式化单个文本块，返回该块的状态"""
+        state, ranges = self.rules.analyze_block(block, previous_state)
+        format_ranges = []
+        for start, length, text_format in ranges:
+            format_range = QTextLayout.FormatRange()
+            format_range.start = start
+            format_range.length = length
+            format_range.format = text_format
+            format_ranges.append(format_range)
+        block.layout().setFormats(format_ranges)
+        block.setUserState(state)
+        return state
+
+    def mark_dirty(self, first, last):
+        """通知文档布局重新绘制已格式化的范围"""
+        start = first.position()
+        end = last.position() + last.length()
+        self.formatting = True
+        try:
+            self.document().markContentsDirty(start, end - start)
+        finally:
+            self.formatting = False
+
+    def highlight_visible(self):
+        """优先高亮视口中可见的文本块"""
+        if not self.active:
+            return
+        first, last = self.visible_blocks()
+        if last.blockNumber() < self.formatted_until:
+            return
+        block = first
+        state = self.previous_state(block)
+        while block.isValid():
+            state = self.format_block(block, state)
+            if block == last:
+                break
+            block = block.next()
+        # 可见区域紧接已高亮部分时，其状态是准确的，顺序处理可以直接跳过这些块
+        if first.blockNumber() <= self.formatted_until:
+            self.formatted_until = last.blockNumber() + 1
+        self.mark_dirty(first, last)
+
+    def process_slice(self):
+        """空闲时按时间片从 formatted_until 开始顺序高亮"""
+        if not self.active or self.is_finished():
+            self.idle_timer.stop()
+            return
+        deadline = time.perf_counter() + self.SLICE_SECONDS
+        block = self.document().findBlockByNumber(self.formatted_until)
+        first = block
+        last = block
+        state = self.previous_state(block)
+        while block.isValid():
+            state = self.format_block(block, state)
+            last = block
+            self.formatted_until = block.blockNumber() + 1
+            if time.perf_counter() >= deadline:
+                break
+            block = block.next()
+        self.mark_dirty(first, last)
+
+    def on_contents_change(self, position, removed, added):
+        """编辑后只重新高亮受影响的文本块，直到块状态与之前一致为止"""
+        if self.formatting or not self.active:
+            return
+
+        document = self.document()
+        first = document.findBlock(position)
+        last = document.findBlock(position + added)
+        delta = document.blockCount() - self.block_count
+        self.block_count = document.blockCount()
+
+        if first.blockNumber() >= self.formatted_until:
+            # 空闲时间片尚未处理到这里，只需刷新可见区域
+            self.schedule_visible()
+            return
+
+        # 编辑位置之后的块已高亮，块号随插入/删除的行数平移
+        self.formatted_until = max(first.blockNumber() + 1, self.formatted_until + delta)
+
+        deadline = time.perf_counter() + self.EDIT_BUDGET_SECONDS
+        block = first
+        state = self.previous_state(block)
+        end = block
+        while block.isValid():
+            old_state = block.userState()
+            state = self.format_block(block, state)
+            end = block
+            if block.blockNumber() >= last.blockNumber() and state == old_state:
+                break
+            if time.perf_counter() >= deadline:
+                # 状态变化波及后续大量文本块（例如新增了围栏），剩余部分交给空闲时间片
+                self.formatted_until = block.blockNumber() + 1
+                self.idle_timer.start()
+                break
+            block = block.next()
+        self.mark_dirty(first, end)
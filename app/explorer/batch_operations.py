@@ -0,0 +1,85 @@
+import os
+import shutil
+
+from PyQt5.QtCore import QThread, pyqtSignal
+
+from app.utils.note_catalog import NoteCatalog
+
+
+def top_level_paths(paths):
+    """去掉已被选中的文件夹中的项目，避免先删除或移动文件夹后再处理其中的文件"""
+    result = []
+    for path in sorted(set(os.path.normpath(path) for path in paths)):
+        if not result or not path.startswith(os.path.join(result[-1], '')):
+            result.append(path)
+    return result
+
+
+class BatchFileWorker(QThread):
+    """
+    批量删除、移动和重命名
+    本地文件操作在后台线程中逐个执行，并同步更新笔记目录；
+    需要同步云端时，本地全部完成后把成功的操作合并为批量请求发送，而不是每项一个请求。
+    配置不是线程安全的：文件映射在界面线程中复制后传入，映射的变化随结果返回给界面线程写入
+    """
+    progress_update = pyqtSignal(int, int)
+    # 汇总结果字典：changes（成功的本地操作）、failed、cloud（(是否成功, 信息)，不同步云端时为None）、
+    # mappings（(要删除的映射键, 要设置的映射)，不同步云端时为None）
+    batch_finished = pyqtSignal(object)
+
+    def __init__(self, operations, sync_manager=None):
+        """operations: [('delete', 路径) 或 ('rename', 原路径, 新路径)]，移动即重命名到其他文件夹"""
+        super().__init__()
+        self.operations = operations
+        self.sync_manager = sync_manager
+        self.mappings = None
+        if sync_manager is not None:
+            self.mappings = dict(sync_manager.config.config.get("file_mapping", {}))
+        self.running = True
+
+    def run(self):
+        catalog = NoteCatalog()
+        changes = []
+        failed = []
+        total = len(self.operations)
+        for done, operation in enumerate(self.operations, 1):
+            if not self.running:
+                break
+            try:
+                if operation[0] == 'delete':
+                    self.delete(operation[1])
+                    catalog.remove(operation[1])
+                else:
+                    self.rename(operation[1], operation[2])
+                    catalog.rename(operation[1], operation[2])
+                changes.append(operation)
+            except OSError as e:
+                failed.append((os.path.basename(operation[1]), str(e)))
+            self.progress_update.emit(done, total)
+
+        cloud = None
+        mappings = None
+        if self.sync_manager is not None and changes:
+            # 已完成的本地操作即使被取消也要同步到云端，否则映射关系会失效
+            success, message, removed, added = self.sync_manager.send_local_changes(changes, self.mappings)
+            cloud = (success, message)
+            mappings = (removed, added)
+        self.batch_finished.emit({'changes': changes, 'failed': failed, 'cloud': cloud, 'mappings': mappings})
+
+    def delete(self, path):
+        if os.path.isdir(path) and not os.path.islink(path):
+            shutil.rmtree(path)
+        else:
+            os.remove(path)
+
+    def rename(self, old_path, new_path):
+        if new_path.startswith(os.path.join(old_path, '')):
+            raise OSError("不能移动到自身的子文件夹中")
+        # 只改变大小写时目标路径在不区分大小写的文件系统上已"存在"
+        if os.path.exists(new_path) and not os.path.samefile(old_path, new_path):
+            raise FileExistsError(f"目标已存在: {os.path.basename(new_path)}")
+        os.makedirs(os.path.dirname(new_path), exist_ok=True)
+        shutil.move(old_path, new_path)
+
+    def stop(self):
+        self.running = False
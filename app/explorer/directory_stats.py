@@ -0,0 +1,107 @@
+import os
+import time
+from contextlib import closing
+
+from PyQt5.QtCore import QThread, pyqtSignal
+
+from app.explorer.note_filter_model import normalize_path
+from app.utils.note_catalog import NoteCatalog, is_note_file, is_skipped_directory
+
+
+class DirectoryStatsWorker(QThread):
+    """
+    在后台统计每个文件夹（含子文件夹）中的笔记篇数、总大小和总字数
+    每个文件夹直接包含的笔记的统计缓存在笔记目录中，按其中笔记的修改时间和大小判断是否变化，
+    未变化的文件夹不读取任何笔记；子文件夹统计完成后再汇总到上层文件夹。
+    统计完成的文件夹每隔 EMIT_INTERVAL 秒分批发出，大型笔记库也能逐步显示
+    """
+    # 一批统计完成的文件夹 {规范化的路径: (篇数, 大小, 字数)}
+    stats_ready = pyqtSignal(object)
+    # 全部文件夹的统计和其中完全为空的文件夹集合（规范化的路径），扫描被中止时不发出
+    scan_finished = pyqtSignal(object, object)
+
+    EMIT_INTERVAL = 0.2
+
+    def __init__(self, root_path):
+        super().__init__()
+        self.root_path = root_path
+        self.running = True
+
+    def run(self):
+        catalog = NoteCatalog()
+        self.empty_directories = set()
+        try:
+            with closing(catalog.connect()) as conn:
+                totals = self.collect(catalog, conn)
+        except Exception as e:
+            print(f"统计文件夹失败: {str(e)}")
+            return
+        if totals is None:
+            return
+        self.scan_finished.emit(totals, self.empty_directories)
+
+    def collect(self, catalog, conn):
+        """后序遍历笔记库，返回所有文件夹的汇总统计，被中止时返回None"""
+        totals = {}
+        batch = {}
+        last_emit = time.perf_counter()
+        # (文件夹, 子文件夹列表或None)，子文件夹列表不为None表示子文件夹已统计完成
+        stack = [(self.root_path, None)]
+        own = {}
+        while stack:
+            if not self.running:
+                return None
+            directory, subdirs = stack.pop()
+            if subdirs is None:
+                subdirs, files = self.list_directory(directory)
+                stats = catalog.directory_stats(conn, directory, files, lambda: self.running)
+                if stats is None:
+                    return None
+                own[directory] = stats
+                stack.append((directory, subdirs))
+                stack.extend((subdir, None) for subdir in subdirs)
+                continue
+
+            notes, size, words = own.pop(directory)
+            for subdir in subdirs:
+                sub_notes, sub_size, sub_words = totals[normalize_path(subdir)]
+                notes += sub_notes
+                size += sub_size
+                words += sub_words
+            key = normalize_path(directory)
+            totals[key] = batch[key] = (notes, size, words)
+            if time.perf_counter() - last_emit >= self.EMIT_INTERVAL:
+                self.stats_ready.emit(batch)
+                batch = {}
+                last_emit = time.perf_counter()
+        if batch:
+            self.stats_ready.emit(batch)
+        return totals
+
+    def list_directory(self, directory):
+        """
+        文件夹中的子文件夹和笔记 [(路径, 修改时间, 大小)]
+        完全为空的文件夹记入 empty_directories，资源管理器据此显示空文件夹，不必在界面线程中逐个读取
+        """
+        subdirs = []
+        files = []
+        try:
+            entries = list(os.scandir(directory))
+        except OSError:
+            return subdirs, files
+        if not entries:
+            self.empty_directories.add(normalize_path(directory))
+        for entry in entries:
+            try:
+                if entry.is_dir(follow_symlinks=False):
+                    if not is_skipped_directory(entry.name):
+                        subdirs.append(entry.path)
+                elif is_note_file(entry.name) and entry.is_file():
+                    stat = entry.stat()
+                    files.append((entry.path, stat.st_mtime, stat.st_size))
+            except OSError:
+                continue
+        return subdirs, files
+
+    def stop(self):
+        self.running = False
@@ -1,18 +1,45 @@
-from PyQt5.QtWidgets import (QTreeView, QFileSystemModel, 
+from PyQt5.QtWidgets import (QTreeView, 
                              QMenu, QAction, QMessageBox, QInputDialog, 
-                             QVBoxLayout, QWidget, QPushButton, QHBoxLayout)
-from PyQt5.QtCore import Qt, QDir, pyqtSignal, QModelIndex
+                             QVBoxLayout, QWidget, QPushButton, QHBoxLayout,
+                             QProgressBar, QAbstractItemView)
+from PyQt5.QtCore import Qt, QDir, pyqtSignal, QModelIndex, QPersistentModelIndex, QTimer
 import os
-import shutil
 import subprocess  # 用于跨平台打开文件资源管理器
+import time
+from collections import deque
+
+from app.utils.file_operations import save_file
+from app.utils.note_catalog import NoteCatalog
+from app.utils.note_importer import NoteImporter
+from app.explorer.note_filter_model import NoteFileSystemModel, NoteFilterProxyModel, format_stats
+from app.explorer.directory_stats import DirectoryStatsWorker
+from app.explorer.batch_operations import BatchFileWorker, top_level_paths
 
 class FileExplorer(QWidget):
     file_selected = pyqtSignal(str)
+    # 文件或文件夹被移动或重命名 [(原路径, 新路径)]
+    paths_moved = pyqtSignal(object)
+    
+    # 展开所有目录时每个空闲时间片的长度（秒），超过后让出事件循环
+    EXPAND_SLICE_SECONDS = 0.008
+    # 笔记保存后等待该时间（毫秒）再重新统计文件夹，连续保存只统计一次
+    STATS_DELAY_MS = 2000
     
     def __init__(self, root_path):
         super().__init__()
         self.root_path = root_path
         self.sync_manager = None  # 初始化为None，稍后由MainWindow设置
+        # 共享的笔记元数据目录
+        self.catalog = NoteCatalog()
+        self.stats_worker = None
+        # 已被新的统计取代、尚未退出的统计线程，退出后才释放
+        self.retired_stats_workers = set()
+        self.importer = None
+        self.batch_worker = None
+        # 等待展开的文件夹（广度优先），以及已经处理过的文件夹路径
+        self.expand_queue = deque()
+        self.expanded_paths = set()
+        self.expanding = False
         self.setup_ui()
         self.setup_connections()
     
@@ -51,14 +78,20 @@ class FileExplorer(QWidget):
         # 添加第二行按钮布局到主布局 - 新增
         layout.addLayout(expand_layout)
         
-        # 创建文件系统模型
-        self.model = QFileSystemModel()
+        # 创建文件系统模型，只列出笔记文件（文件夹不受名称过滤影响）
+        self.model = NoteFileSystemModel()
+        self.model.setNameFilters(["*.md"])
+        self.model.setNameFilterDisables(False)
         self.model.setRootPath(self.root_path)
         
+        # 过滤掉不含笔记的文件夹和 .git、node_modules 等目录
+        self.proxy_model = NoteFilterProxyModel(self.root_path, self)
+        self.proxy_model.setSourceModel(self.model)
+        
         # 创建树视图
         self.tree_view = QTreeView()
-        self.tree_view.setModel(self.model)
-        self.tree_view.setRootIndex(self.model.index(self.root_path))
+        self.tree_view.setModel(self.proxy_model)
+        self.tree_view.setRootIndex(self.proxy_model.index_for_path(self.root_path))
         
         # 只显示名称列
         self.tree_view.setHeaderHidden(True)
@@ -68,12 +101,36 @@ class FileExplorer(QWidget):
         # 设置默认列宽
         self.tree_view.setColumnWidth(0, 250)
         
+        # 按住 Ctrl 或 Shift 可以选择多项，批量移动、删除和重命名
+        self.tree_view.setSelectionMode(QAbstractItemView.ExtendedSelection)
+        
         # 允许右键菜单
         self.tree_view.setContextMenuPolicy(Qt.CustomContextMenu)
         
         # 添加到布局
         layout.addWidget(self.tree_view)
+        
+        # 批量导入和批量文件操作的进度条，处理时才显示
+        task_layout = QHBoxLayout()
+        self.task_progress = QProgressBar()
+        task_layout.addWidget(self.task_progress)
+        self.cancel_task_btn = QPushButton("取消")
+        task_layout.addWidget(self.cancel_task_btn)
+        self.task_progress.hide()
+        self.cancel_task_btn.hide()
+        layout.addLayout(task_layout)
         self.setLayout(layout)
+        
+        # 逐片展开所有目录的空闲计时器
+        self.expand_timer = QTimer(self)
+        self.expand_timer.setInterval(0)
+        self.expand_timer.timeout.connect(self.expand_next_slice)
+        
+        self.stats_timer = QTimer(self)
+        self.stats_timer.setSingleShot(True)
+        self.stats_timer.timeout.connect(self.scan_note_directories)
+        
+        self.scan_note_directories()
     
     def setup_connections(self):
         # 连接双击事件
@@ -82,6 +139,9 @@ class FileExplorer(QWidget):
         # 连接右键菜单事件
         self.tree_view.customContextMenuRequested.connect(self.show_context_menu)
         
+        # 选中笔记时在状态栏显示标题和字数
+        self.tree_view.selectionModel().currentChanged.connect(self.on_current_changed)
+        
         # 连接按钮事件
         self.new_folder_btn.clicked.connect(lambda: self.create_folder())
         self.new_file_btn.clicked.connect(lambda: self.create_file())
@@ -90,32 +150,155 @@ class FileExplorer(QWidget):
         # 连接展开和折叠按钮事件 - 新增
         self.expand_all_btn.clicked.connect(self.expand_all_directories)
         self.collapse_all_btn.clicked.connect(self.collapse_all_directories)
+        self.cancel_task_btn.clicked.connect(self.cancel_task)
+        
+        # 展开所有目录期间，文件夹的内容加载完成后继续展开新出现的子文件夹
+        self.proxy_model.rowsInserted.connect(self.on_rows_inserted)
+    
+    def scan_note_directories(self):
+        """在后台统计各文件夹中的笔记，完成后隐藏不含笔记的文件夹"""
+        self.stats_timer.stop()
+        self.retire_stats_worker()
+        self.stats_worker = DirectoryStatsWorker(self.root_path)
+        self.stats_worker.stats_ready.connect(self.on_stats_ready)
+        self.stats_worker.scan_finished.connect(self.on_stats_finished)
+        self.stats_worker.start()
+    
+    def retire_stats_worker(self):
+        """
+        中止正在进行的统计但不等待它退出，界面线程不会被正在读取的笔记卡住；
+        断开它的信号，退出后再释放线程对象
+        """
+        worker = self.stats_worker
+        self.stats_worker = None
+        if worker is None:
+            return
+        worker.stats_ready.disconnect()
+        worker.scan_finished.disconnect()
+        worker.stop()
+        self.retired_stats_workers.add(worker)
+        worker.finished.connect(lambda: self.retired_stats_workers.discard(worker))
+        if not worker.isRunning():
+            self.retired_stats_workers.discard(worker)
+    
+    def schedule_statistics(self):
+        """笔记已保存，稍后重新统计（只有变化的文件夹会重新读取）"""
+        self.stats_timer.start(self.STATS_DELAY_MS)
+    
+    def on_stats_ready(self, stats):
+        # 断开信号前已经排队的结果来自被取代的统计，忽略
+        if self.sender() is not self.stats_worker:
+            return
+        self.proxy_model.update_directory_stats(stats)
+        # 只重绘可见的项目，不必通知模型逐项更新
+        self.tree_view.viewport().update()
+    
+    def on_stats_finished(self, stats, empty_directories):
+        if self.sender() is not self.stats_worker:
+            return
+        self.proxy_model.set_directory_stats(stats, empty_directories)
+    
+    def stop(self):
+        """停止后台扫描、导入、批量文件操作和逐片展开（退出程序时调用）"""
+        self.stop_expanding()
+        self.stats_timer.stop()
+        workers = [self.stats_worker, self.importer, self.batch_worker] + list(self.retired_stats_workers)
+        for worker in workers:
+            if worker is not None:
+                worker.stop()
+                worker.wait()
+    
+    def file_path(self, index):
+        """树视图中索引对应的文件路径"""
+        return self.proxy_model.file_path(index)
     
     # 新增方法：展开所有目录
     def expand_all_directories(self):
-        """展开所有目录"""
-        self.tree_view.expandAll()
-        self.statusBar().showMessage("已展开所有目录", 3000)
+        """
+        展开所有目录
+        QTreeView.expandAll 在界面线程中一次性展开所有节点，大型笔记库会长时间卡住界面；
+        这里按广度优先逐个展开，每个时间片只处理 EXPAND_SLICE_SECONDS，其余时间留给事件循环
+        """
+        self.expand_queue = deque([QPersistentModelIndex(self.tree_view.rootIndex())])
+        self.expanded_paths = set()
+        self.expanding = True
+        self.expand_timer.start()
+        self.statusBar().showMessage("正在展开所有目录...")
+    
+    def expand_next_slice(self):
+        deadline = time.perf_counter() + self.EXPAND_SLICE_SECONDS
+        root = self.tree_view.rootIndex()
+        while self.expand_queue and time.perf_counter() < deadline:
+            index = QModelIndex(self.expand_queue.popleft())
+            if not index.isValid() and root.isValid():
+                # 文件夹在展开前已被删除
+                continue
+            path = self.file_path(index)
+            if path in self.expanded_paths:
+                continue
+            self.expanded_paths.add(path)
+            if index != root:
+                # 展开时 QFileSystemModel 在后台线程中加载文件夹内容，加载完成后由 on_rows_inserted 继续
+                self.tree_view.expand(index)
+            self.enqueue_child_directories(index, 0, self.proxy_model.rowCount(index) - 1)
+        if not self.expand_queue:
+            self.expand_timer.stop()
+            self.statusBar().showMessage("已展开所有目录", 3000)
+    
+    def enqueue_child_directories(self, parent, first, last):
+        for row in range(first, last + 1):
+            child = self.proxy_model.index(row, 0, parent)
+            if self.proxy_model.is_dir(child):
+                self.expand_queue.append(QPersistentModelIndex(child))
+    
+    def on_rows_inserted(self, parent, first, last):
+        if not self.expanding or self.file_path(parent) not in self.expanded_paths:
+            return
+        self.enqueue_child_directories(parent, first, last)
+        if self.expand_queue and not self.expand_timer.isActive():
+            self.expand_timer.start()
+    
+    def stop_expanding(self):
+        self.expanding = False
+        self.expand_queue.clear()
+        self.expand_timer.stop()
     
     # 新增方法：折叠所有目录
     def collapse_all_directories(self):
         """折叠所有目录"""
+        self.stop_expanding()
         self.tree_view.collapseAll()
         self.statusBar().showMessage("已折叠所有目录", 3000)
     
     def on_item_double_clicked(self, index):
-        path = self.model.filePath(index)
+        path = self.file_path(index)
         if os.path.isfile(path) and path.endswith('.md'):
             self.file_selected.emit(path)
     
+    def on_current_changed(self, current, previous):
+        path = self.file_path(current)
+        stats = self.proxy_model.stats_for(current) if current.isValid() else None
+        if stats is not None:
+            self.statusBar().showMessage(f"{os.path.basename(path)}  ·  {format_stats(stats)}", 5000)
+            return
+        if not path.endswith('.md') or not os.path.isfile(path):
+            return
+        note = self.catalog.get(path)
+        if note is not None:
+            self.statusBar().showMessage(
+                f"{note['title']}  ·  {note['words']} 字  ·  {note['size'] / 1024:.1f} KB", 5000)
+    
     def show_context_menu(self, position):
         index = self.tree_view.indexAt(position)
         
         if not index.isValid():
             return
             
-        path = self.model.filePath(index)
+        path = self.file_path(index)
         is_file = os.path.isfile(path)
+        # 多选时重命名、移动和删除作用于所有选中的项目
+        count = len(self.selected_paths(index))
+        suffix = f"（{count} 项）" if count > 1 else ""
         
         # 检查是否启用了云端同步
         sync_enabled = self.sync_manager and self.sync_manager.is_sync_enabled()
@@ -127,6 +310,10 @@ class FileExplorer(QWidget):
         import_action.triggered.connect(lambda: self.import_note(path if not is_file else os.path.dirname(path)))
         menu.addAction(import_action)
         
+        import_folder_action = QAction("导入文件夹", self)
+        import_folder_action.triggered.connect(lambda: self.import_folder(path if not is_file else os.path.dirname(path)))
+        menu.addAction(import_folder_action)
+        
         # 添加通用动作
         open_action = QAction("打开", self)
         open_action.triggered.connect(lambda: self.on_item_double_clicked(index))
@@ -137,23 +324,32 @@ class FileExplorer(QWidget):
         open_in_explorer_action.triggered.connect(lambda: self.open_in_system_explorer(path))
         menu.addAction(open_in_explorer_action)
         
-        rename_action = QAction("重命名", self)
+        rename_action = QAction(("批量重命名" if count > 1 else "重命名") + suffix, self)
         rename_action.triggered.connect(lambda: self.rename_item(index))
         menu.addAction(rename_action)
         
         # 如果启用了云端同步，添加"同时重命名云端"选项
         if sync_enabled:
-            rename_cloud_action = QAction("同时重命名云端", self)
+            rename_cloud_action = QAction("同时重命名云端" + suffix, self)
             rename_cloud_action.triggered.connect(lambda: self.rename_item_with_cloud(index))
             menu.addAction(rename_cloud_action)
         
-        delete_action = QAction("删除", self)
+        move_action = QAction("移动到..." + suffix, self)
+        move_action.triggered.connect(lambda: self.move_item(index))
+        menu.addAction(move_action)
+        
+        if sync_enabled:
+            move_cloud_action = QAction("移动到...（同时移动云端）" + suffix, self)
+            move_cloud_action.triggered.connect(lambda: self.move_item_with_cloud(index))
+            menu.addAction(move_cloud_action)
+        
+        delete_action = QAction("删除" + suffix, self)
         delete_action.triggered.connect(lambda: self.delete_item(index))
         menu.addAction(delete_action)
         
         # 如果启用了云端同步，添加"同时删除云端"选项
         if sync_enabled:
-            delete_cloud_action = QAction("同时删除云端", self)
+            delete_cloud_action = QAction("同时删除云端" + suffix, self)
             delete_cloud_action.triggered.connect(lambda: self.delete_item_with_cloud(index))
             menu.addAction(delete_cloud_action)
         
@@ -202,167 +398,152 @@ class FileExplorer(QWidget):
         except Exception as e:
             QMessageBox.critical(self, "错误", f"无法在系统资源管理器中打开: {str(e)}")
     
+    def selected_paths(self, index):
+        """右键点击的项目在多选范围内时返回所有选中的项目，否则只返回该项目"""
+        indexes = self.tree_view.selectionModel().selectedRows(0)
+        if index in indexes:
+            return top_level_paths(self.file_path(i) for i in indexes)
+        return [os.path.normpath(self.file_path(index))]
+    
+    def check_sync_enabled(self, action):
+        if not self.sync_manager or not self.sync_manager.is_sync_enabled():
+            QMessageBox.warning(self, "同步未启用", f"云端同步功能未启用，无法同步{action}。")
+            return False
+        return True
+    
     def rename_item(self, index):
-        old_path = self.model.filePath(index)
-        old_name = os.path.basename(old_path)
-        
-        new_name, ok = QInputDialog.getText(
-            self, "重命名", "请输入新名称:", text=old_name)
-            
-        if ok and new_name:
-            if os.path.isfile(old_path) and not new_name.endswith('.md'):
-                new_name += '.md'
-                
-            new_path = os.path.join(os.path.dirname(old_path), new_name)
-            
-            try:
-                os.rename(old_path, new_path)
-                self.refresh()
-            except Exception as e:
-                QMessageBox.critical(self, "错误", f"重命名失败: {str(e)}")
+        self.rename_items(self.selected_paths(index))
     
     def rename_item_with_cloud(self, index):
-        """重命名文件并同步到云端"""
-        if not self.sync_manager or not self.sync_manager.is_sync_enabled():
-            QMessageBox.warning(self, "同步未启用", "云端同步功能未启用，无法同步重命名。")
-            return
-            
-        old_path = self.model.filePath(index)
-        old_name = os.path.basename(old_path)
-        
-        new_name, ok = QInputDialog.getText(
-            self, "重命名（云端同步）", "请输入新名称:", text=old_name)
-            
-        if ok and new_name:
+        """重命名并同步到云端"""
+        if self.check_sync_enabled("重命名"):
+            self.rename_items(self.selected_paths(index), with_cloud=True)
+    
+    def rename_items(self, paths, with_cloud=False):
+        """重命名一项，或按名称格式批量重命名多项"""
+        title = "重命名（云端同步）" if with_cloud else "重命名"
+        if len(paths) == 1:
+            old_path = paths[0]
+            old_name = os.path.basename(old_path)
+            new_name, ok = QInputDialog.getText(
+                self, title, "请输入新名称:", text=old_name)
+            if not ok or not new_name or new_name == old_name:
+                return
             if os.path.isfile(old_path) and not new_name.endswith('.md'):
                 new_name += '.md'
-                
-            new_path = os.path.join(os.path.dirname(old_path), new_name)
-            
-            try:
-                # 获取云端路径
-                old_cloud_path = self.sync_manager.config.get_file_mapping(old_path)
-                
-                if not old_cloud_path:
-                    # 尝试规范化路径后再次查找
-                    norm_path = os.path.normpath(old_path)
-                    old_cloud_path = self.sync_manager.config.get_file_mapping(norm_path)
-                    
-                    if not old_cloud_path:
-                        QMessageBox.warning(self, "未找到云端映射", 
-                                          f"未找到文件 {old_name} 的云端映射，将只进行本地重命名。\n路径: {old_path}")
-                        os.rename(old_path, new_path)
-                        self.refresh()
-                        return
-                
-                # 计算新的云端路径
-                new_cloud_path = os.path.join(os.path.dirname(old_cloud_path), new_name)
-                
-                # 先在本地重命名
-                os.rename(old_path, new_path)
-                
-                # 更新映射关系
-                self.sync_manager.config.remove_file_mapping(old_path)
-                self.sync_manager.config.set_file_mapping(new_path, new_cloud_path)
-                
-                # 如果是文件，上传新内容
-                if os.path.isfile(new_path):
-                    with open(new_path, 'r', encoding='utf-8') as f:
-                        content = f.read()
-                    success, message, _ = self.sync_manager.upload_note(new_path, content)
-                    
-                    # 删除旧文件
-                    self.sync_manager.delete_note(old_cloud_path)
-                    
-                    if not success:
-                        QMessageBox.warning(self, "云端同步失败", 
-                                          f"文件已在本地重命名，但云端同步失败: {message}")
-                else:
-                    # 对于文件夹，需要更新所有子文件的映射
-                    # 这里简化处理，只提示用户需要手动同步
-                    QMessageBox.information(self, "文件夹重命名", 
-                                         "文件夹已在本地重命名，请使用同步功能更新云端文件夹结构。")
-                
-                self.refresh()
-                self.statusBar().showMessage(f"已重命名 {old_name} 为 {new_name}（本地和云端）", 3000)
-                
-            except Exception as e:
-                QMessageBox.critical(self, "错误", f"重命名失败: {str(e)}")
-
+            self.start_batch([('rename', old_path, os.path.join(os.path.dirname(old_path), new_name))], with_cloud)
+            return
+        
+        template, ok = QInputDialog.getText(
+            self, "批量" + title,
+            f"为选中的 {len(paths)} 项输入新名称，" + "{name} 为原名称，{n} 为序号（例如 {n:03d}-{name}）:",
+            text="{name}")
+        if not ok or not template:
+            return
+        operations = []
+        try:
+            for number, old_path in enumerate(paths, 1):
+                name = os.path.basename(old_path)
+                # 文件保留原来的扩展名
+                stem, ext = os.path.splitext(name) if os.path.isfile(old_path) else (name, '')
+                new_name = template.format(name=stem, n=number) + ext
+                if new_name != name:
+                    operations.append(('rename', old_path, os.path.join(os.path.dirname(old_path), new_name)))
+        except (KeyError, IndexError, ValueError) as e:
+            QMessageBox.warning(self, "名称格式错误", f"无法解析名称格式: {str(e)}")
+            return
+        new_paths = [os.path.normcase(operation[2]) for operation in operations]
+        if len(set(new_paths)) < len(new_paths):
+            QMessageBox.warning(self, "名称重复", "按该格式生成的新名称有重复，请加入序号 {n}。")
+            return
+        self.start_batch(operations, with_cloud)
     
-    def delete_item(self, index):
-        path = self.model.filePath(index)
-        name = os.path.basename(path)
+    def move_item(self, index):
+        self.move_items(self.selected_paths(index))
+    
+    def move_item_with_cloud(self, index):
+        """移动并同步到云端"""
+        if self.check_sync_enabled("移动"):
+            self.move_items(self.selected_paths(index), with_cloud=True)
+    
+    def move_items(self, paths, with_cloud=False):
+        from PyQt5.QtWidgets import QFileDialog
         
-        result = QMessageBox.question(
-            self, "确认删除", 
-            f"确定要删除 '{name}' 吗?",
-            QMessageBox.Yes | QMessageBox.No)
+        target_dir = QFileDialog.getExistingDirectory(self, "移动到", self.root_path)
+        if not target_dir:
+            return
+        target_dir = os.path.normpath(target_dir)
+        self.start_batch([
+            ('rename', path, os.path.join(target_dir, os.path.basename(path)))
+            for path in paths if os.path.dirname(path) != target_dir
+        ], with_cloud)
+    
+    def delete_item(self, index):
+        self.delete_items(self.selected_paths(index))
+    
+    def delete_item_with_cloud(self, index):
+        """删除并同步到云端"""
+        if self.check_sync_enabled("删除"):
+            self.delete_items(self.selected_paths(index), with_cloud=True)
+    
+    def delete_items(self, paths, with_cloud=False):
+        name = f"'{os.path.basename(paths[0])}'" if len(paths) == 1 else f"选中的 {len(paths)} 项"
+        if with_cloud:
+            result = QMessageBox.question(
+                self, "确认删除（云端同步）", 
+                f"确定要删除 {name} 吗？此操作将同时删除本地和云端文件。",
+                QMessageBox.Yes | QMessageBox.No)
+        else:
+            result = QMessageBox.question(
+                self, "确认删除", 
+                f"确定要删除 {name} 吗?",
+                QMessageBox.Yes | QMessageBox.No)
             
         if result == QMessageBox.Yes:
-            try:
-                if os.path.isfile(path):
-                    os.remove(path)
-                else:
-                    shutil.rmtree(path)
-                self.refresh()
-            except Exception as e:
-                QMessageBox.critical(self, "错误", f"删除失败: {str(e)}")
+            self.start_batch([('delete', path) for path in paths], with_cloud)
     
-    def delete_item_with_cloud(self, index):
-        """删除文件并同步到云端"""
-        if not self.sync_manager or not self.sync_manager.is_sync_enabled():
-            QMessageBox.warning(self, "同步未启用", "云端同步功能未启用，无法同步删除。")
+    def start_batch(self, operations, with_cloud=False):
+        """在后台执行批量文件操作，需要时最后合并同步到云端"""
+        if not operations:
             return
-            
-        path = self.model.filePath(index)
-        name = os.path.basename(path)
+        if self.is_busy():
+            QMessageBox.warning(self, "正在处理", "上一个操作尚未完成，请稍后再试。")
+            return
+        self.batch_worker = BatchFileWorker(operations, self.sync_manager if with_cloud else None)
+        self.batch_worker.progress_update.connect(self.on_task_progress)
+        self.batch_worker.batch_finished.connect(self.on_batch_finished)
+        self.show_task_progress()
+        self.statusBar().showMessage(f"正在处理 {len(operations)} 项...")
+        self.batch_worker.start()
+    
+    def on_batch_finished(self, summary):
+        self.hide_task_progress()
+        changes = summary['changes']
+        if summary['mappings'] is not None:
+            # 文件映射在界面线程中写入配置，避免与设置、保存等同时修改配置文件
+            removed, added = summary['mappings']
+            if removed or added:
+                self.sync_manager.config.update_file_mappings(removed, added)
+        moves = [(change[1], change[2]) for change in changes if change[0] == 'rename']
+        if moves:
+            self.paths_moved.emit(moves)
+        self.refresh()
         
-        result = QMessageBox.question(
-            self, "确认删除（云端同步）", 
-            f"确定要删除 '{name}' 吗？此操作将同时删除本地和云端文件。",
-            QMessageBox.Yes | QMessageBox.No)
-            
-        if result == QMessageBox.Yes:
-            try:
-                # 获取云端路径
-                cloud_path = self.sync_manager.config.get_file_mapping(path)
-                
-                if not cloud_path:
-                    # 尝试规范化路径后再次查找
-                    norm_path = os.path.normpath(path)
-                    cloud_path = self.sync_manager.config.get_file_mapping(norm_path)
-                    
-                    if not cloud_path:
-                        # 输出更详细的调试信息
-                        QMessageBox.warning(self, "未找到云端映射", 
-                                          f"未找到文件 {name} 的云端映射，将只进行本地删除。\n路径: {path}")
-                        if os.path.isfile(path):
-                            os.remove(path)
-                        else:
-                            shutil.rmtree(path)
-                        self.refresh()
-                        return
-                
-                # 先删除本地文件
-                if os.path.isfile(path):
-                    os.remove(path)
-                else:
-                    shutil.rmtree(path)
-                
-                # 删除云端文件
-                success, message = self.sync_manager.delete_note(cloud_path)
-                
-                if not success:
-                    QMessageBox.warning(self, "云端删除失败", 
-                                      f"文件已在本地删除，但云端删除失败: {message}")
-                else:
-                    self.statusBar().showMessage(f"已删除 {name}（本地和云端）", 3000)
-                
-                self.refresh()
-                
-            except Exception as e:
-                QMessageBox.critical(self, "错误", f"删除失败: {str(e)}")
+        lines = []
+        for name, message in summary['failed'][:10]:
+            lines.append(f"{name}: {message}")
+        if len(summary['failed']) > 10:
+            lines.append(f"……等 {len(summary['failed'])} 项")
+        cloud = summary['cloud']
+        if cloud is not None and not cloud[0]:
+            lines.append(f"文件已在本地完成操作，但云端同步失败: {cloud[1]}")
+        if lines:
+            QMessageBox.warning(self, "操作未全部完成",
+                              f"已完成 {len(changes)} 项，{len(summary['failed'])} 项失败。\n\n" + "\n".join(lines))
+        elif cloud is not None:
+            self.statusBar().showMessage(f"已完成 {len(changes)} 项（本地和云端）", 3000)
+        else:
+            self.statusBar().showMessage(f"已完成 {len(changes)} 项", 3000)
     
     def create_folder(self, parent_path=None):
         if parent_path is None:
@@ -403,65 +584,98 @@ class FileExplorer(QWidget):
                 file_name += '.md'
                 
             try:
-                with open(os.path.join(parent_path, file_name), 'w', encoding='utf-8') as f:
-                    f.write("# " + file_name.replace('.md', '') + "\n\n")
+                if not save_file("# " + file_name.replace('.md', '') + "\n\n", os.path.join(parent_path, file_name)):
+                    raise OSError("无法写入文件")
                 self.refresh()
             except Exception as e:
                 QMessageBox.critical(self, "错误", f"创建笔记失败: {str(e)}")
     
     def refresh(self):
+        # 文件可能在外部被修改，重新扫描笔记目录
+        self.stop_expanding()
         self.model.setRootPath(self.root_path)
-        self.tree_view.setRootIndex(self.model.index(self.root_path))
+        self.tree_view.setRootIndex(self.proxy_model.index_for_path(self.root_path))
+        self.scan_note_directories()
         
     def import_note(self, target_dir):
-        """导入笔记文件到指定目录"""
+        """导入笔记文件或zip压缩包到指定目录"""
         from PyQt5.QtWidgets import QFileDialog
         
-        # 设置文件过滤器，支持多种文本格式
-        file_filter = "文本文件 (*.md *.txt);;所有文件 (*)"
+        # 设置文件过滤器，支持多种文本格式和压缩包
+        file_filter = "笔记文件 (*.md *.txt *.zip);;所有文件 (*)"
         file_paths, _ = QFileDialog.getOpenFileNames(
             self, "选择要导入的笔记", "", file_filter)
             
-        if not file_paths:
-            return
-            
-        for src_path in file_paths:
-            # 验证文件格式
-            if not src_path.lower().endswith(('.md', '.txt')):
-                QMessageBox.warning(self, "格式不支持", 
-                                  f"不支持导入 {os.path.basename(src_path)}: 仅支持.md和.txt文件")
-                continue
-                
-            # 构建目标路径
-            filename = os.path.basename(src_path)
-            if filename.lower().endswith('.txt'):
-                # 如果是.txt文件，转换为.md
-                dst_path = os.path.join(target_dir, filename[:-4] + '.md')
-                try:
-                    # 读取.txt内容并写入.md文件
-                    with open(src_path, 'r', encoding='utf-8') as src_file:
-                        content = src_file.read()
-                    with open(dst_path, 'w', encoding='utf-8') as dst_file:
-                        dst_file.write(content)
-                    QMessageBox.information(self, "导入成功", 
-                                          f"已成功将 {filename} 转换为.md格式")
-                except Exception as e:
-                    QMessageBox.warning(self, "导入失败", 
-                                      f"转换 {filename} 失败: {str(e)}")
-            else:
-                # 其他文件直接复制
-                dst_path = os.path.join(target_dir, filename)
-                from app.utils.file_operations import copy_file
-                if copy_file(src_path, dst_path):
-                    QMessageBox.information(self, "导入成功", 
-                                          f"已成功导入 {filename}")
-                else:
-                    QMessageBox.warning(self, "导入失败", 
-                                      f"导入 {filename} 失败")
+        if file_paths:
+            self.start_import(file_paths, target_dir)
+    
+    def import_folder(self, target_dir):
+        """递归导入一个文件夹中的所有笔记，保留目录结构"""
+        from PyQt5.QtWidgets import QFileDialog
         
-        # 刷新文件列表
+        folder = QFileDialog.getExistingDirectory(self, "选择要导入的文件夹")
+        if folder:
+            self.start_import([folder], target_dir)
+    
+    def start_import(self, sources, target_dir):
+        """在后台批量导入，完成后统一显示结果"""
+        if self.is_busy():
+            QMessageBox.warning(self, "正在处理", "上一个操作尚未完成，请稍后再试。")
+            return
+        self.importer = NoteImporter(sources, target_dir)
+        self.importer.progress_update.connect(self.on_task_progress)
+        self.importer.import_finished.connect(self.on_import_finished)
+        self.show_task_progress()
+        self.statusBar().showMessage("正在导入笔记...")
+        self.importer.start()
+    
+    def is_busy(self):
+        """是否有导入或批量文件操作正在进行"""
+        return any(worker is not None and worker.isRunning()
+                   for worker in (self.importer, self.batch_worker))
+    
+    def show_task_progress(self):
+        self.task_progress.setRange(0, 0)
+        self.task_progress.show()
+        self.cancel_task_btn.show()
+    
+    def hide_task_progress(self):
+        self.task_progress.hide()
+        self.cancel_task_btn.hide()
+    
+    def cancel_task(self):
+        for worker in (self.importer, self.batch_worker):
+            if worker is not None:
+                worker.stop()
+    
+    def on_task_progress(self, done, total):
+        self.task_progress.setRange(0, max(total, 1))
+        self.task_progress.setValue(done)
+    
+    def on_import_finished(self, summary):
+        self.hide_task_progress()
         self.refresh()
         
+        lines = [f"已导入 {summary['imported']} 个文件"]
+        if summary['converted']:
+            lines.append(f"其中 {summary['converted']} 个已转换为UTF-8编码的.md文件")
+        if summary['renamed']:
+            lines.append(f"{summary['renamed']} 个文件与已有文件重名，已自动改名")
+        if summary['skipped']:
+            lines.append(f"跳过 {len(summary['skipped'])} 个不支持的文件（仅支持.md和.txt）")
+        if summary['cancelled']:
+            lines.append("导入已取消")
+        failed = summary['failed']
+        if failed:
+            lines.append(f"\n{len(failed)} 个文件导入失败：")
+            lines.extend(f"{name}: {message}" for name, message in failed[:10])
+            if len(failed) > 10:
+                lines.append(f"……等 {len(failed)} 个文件")
+            QMessageBox.warning(self, "导入完成", "\n".join(lines))
+        else:
+            QMessageBox.information(self, "导入完成", "\n".join(lines))
+        self.statusBar().showMessage(lines[0], 3000)
+        
     # 获取状态栏方法 - 新增
     def statusBar(self):
         """获取主窗口的状态栏"""
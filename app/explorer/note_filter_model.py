@@ -0,0 +1,116 @@
+import os
+
+from PyQt5.QtCore import Qt, QSortFilterProxyModel
+from PyQt5.QtWidgets import QFileSystemModel
+
+from app.utils.note_catalog import is_note_file, is_skipped_directory
+
+
+def normalize_path(path):
+    """QFileSystemModel 使用 / 分隔路径，笔记目录使用系统分隔符，比较前统一格式"""
+    return os.path.normcase(os.path.normpath(path))
+
+
+def format_stats(stats):
+    """文件夹统计的显示文字"""
+    notes, size, words = stats
+    return f"{notes} 篇笔记  ·  {words} 字  ·  {size / 1024:.1f} KB"
+
+
+class NoteFileSystemModel(QFileSystemModel):
+    """
+    不自行排序的文件系统模型，排序由 NoteFilterProxyModel 完成
+    QFileSystemModel 每加载完一批文件夹都会重新排序所有已加载的节点并发出 layoutChanged，
+    代理模型和树视图随之重建全部映射；展开大量文件夹时开销随已加载的节点数成平方增长
+    """
+
+    def sort(self, column, order=Qt.AscendingOrder):
+        pass
+
+
+class NoteFilterProxyModel(QSortFilterProxyModel):
+    """
+    只显示笔记（.md）和包含笔记的文件夹，文件夹名称后显示其中的笔记篇数
+    .git、node_modules 等目录不显示，也就不会被 QFileSystemModel 加载和监视。
+    文件夹是否包含笔记、是否为空都由后台的文件夹统计判断，过滤时不访问磁盘，也不需要展开整棵目录树；
+    统计完成前和统计之后新建的文件夹都显示，空文件夹始终显示，便于在新建的文件夹中创建笔记
+    """
+
+    def __init__(self, root_path, parent=None):
+        super().__init__(parent)
+        self.set_root_path(root_path)
+        # 文件夹在前，按名称排序；新加入的行直接插入到排序后的位置
+        self.setDynamicSortFilter(True)
+        self.sort(0)
+        # {规范化的文件夹路径: (篇数, 大小, 字数)}
+        self.directory_stats = {}
+        # 包含笔记的文件夹，None 表示尚未统计完成
+        self.note_directories = None
+        # 统计时完全为空的文件夹
+        self.empty_directories = set()
+
+    def set_root_path(self, root_path):
+        # 笔记库根目录及其上层目录必须显示，树视图才能以根目录为根
+        self.root = normalize_path(root_path)
+        self.root_prefix = os.path.join(self.root, '')
+
+    def update_directory_stats(self, stats):
+        """一批文件夹统计完成，只更新显示"""
+        self.directory_stats.update(stats)
+
+    def set_directory_stats(self, stats, empty_directories):
+        """全部文件夹统计完成，隐藏不含笔记的非空文件夹"""
+        self.directory_stats = stats
+        self.note_directories = {path for path, (notes, _, _) in stats.items() if notes}
+        self.empty_directories = empty_directories
+        self.invalidateFilter()
+
+    def stats_for(self, index):
+        """文件夹的统计，不是文件夹或尚未统计时返回None"""
+        model = self.sourceModel()
+        source = self.mapToSource(index)
+        if not model.isDir(source):
+            return None
+        return self.directory_stats.get(normalize_path(model.filePath(source)))
+
+    def data(self, index, role=Qt.DisplayRole):
+        if role in (Qt.DisplayRole, Qt.ToolTipRole) and index.column() == 0:
+            stats = self.stats_for(index)
+            if stats is not None:
+                if role == Qt.ToolTipRole:
+                    return format_stats(stats)
+                return f"{super().data(index, role)}  ({stats[0]})"
+        return super().data(index, role)
+
+    def filterAcceptsRow(self, source_row, source_parent):
+        model = self.sourceModel()
+        index = model.index(source_row, 0, source_parent)
+        name = model.fileName(index)
+        if not model.isDir(index):
+            return is_note_file(name)
+        path = normalize_path(model.filePath(index))
+        if not path.startswith(self.root_prefix):
+            return self.root_prefix.startswith(os.path.join(path, ''))
+        if is_skipped_directory(name):
+            return False
+        if self.note_directories is None or path not in self.directory_stats:
+            # 尚未统计，或是统计之后新建的文件夹
+            return True
+        return path in self.note_directories or path in self.empty_directories
+
+    def lessThan(self, left, right):
+        model = self.sourceModel()
+        left_dir = model.isDir(left)
+        if left_dir != model.isDir(right):
+            return left_dir
+        return model.fileName(left).casefold() < model.fileName(right).casefold()
+
+    def file_path(self, index):
+        """代理模型索引对应的文件路径"""
+        return self.sourceModel().filePath(self.mapToSource(index))
+
+    def is_dir(self, index):
+        return self.sourceModel().isDir(self.mapToSource(index))
+
+    def index_for_path(self, path):
+        return self.mapFromSource(self.sourceModel().index(path))
@@ -1,15 +1,25 @@
-from PyQt5.QtWidgets import (QMainWindow, QWidget, QVBoxLayout, QHBoxLayout, 
+from PyQt5.QtWidgets import (QApplication, QMainWindow, QWidget, QVBoxLayout, QHBoxLayout, 
                              QSplitter, QAction, QToolBar, QMenu, QFileDialog, 
                              QMessageBox, QDockWidget, QInputDialog, QDialog,
-                             QLabel, QLineEdit, QPushButton, QFormLayout, QCheckBox)
-from PyQt5.QtCore import Qt, QSize, QDir
+                             QLabel, QLineEdit, QPushButton, QFormLayout, QCheckBox,
+                             QProgressBar, QTabWidget)
+from PyQt5.QtCore import Qt, QSize, QDir, QTimer
 from PyQt5.QtGui import QIcon, QKeySequence
 import os
 
 from app.editor.markdown_editor import MarkdownEditor
+from app.editor.large_file_viewer import LargeFileViewer
+from app.editor.code_highlighter import stop_code_highlight_worker
+from app.editor.outline_panel import OutlinePanel
 from app.explorer.file_explorer import FileExplorer
 from app.search.search_engine import SearchDialog
-from app.utils.file_operations import save_file, load_file
+from app.utils.file_operations import save_file, load_file, content_digest
+from app.utils.file_loader import FileLoadWorker
+from app.utils.encoding_detector import read_text_file
+from app.utils.save_pipeline import SavePipeline
+from app.utils.autosave import AutoSaveManager
+from app.utils.edit_journal import EditJournal, apply_records
+from app.utils.session_store import SessionStore
 from app.utils.settings import Settings
 from app.sync.sync_manager import SyncManager
 from app.sync.cloud_manager_dialog import CloudManagerDialog
@@ -103,11 +113,40 @@ class SyncSettingsDialog(QDialog):
             self.status_label.setStyleSheet("color: red;")
 
 class MainWindow(QMainWindow):
+    # 超过该大小（字节）的文件在后台线程中分块加载
+    ASYNC_LOAD_THRESHOLD = 256 * 1024
+    # 超过该大小（字节）的文件使用只读的大文件查看器打开
+    LARGE_FILE_THRESHOLD = 50 * 1024 * 1024
+    # 光标或滚动位置变化后多久写入会话状态（毫秒），异常退出时最多丢失这段时间内的位置
+    SESSION_SAVE_DELAY_MS = 5000
+    
     def __init__(self):
         super().__init__()
-        self.current_file = None
+        # 正在进行的分块加载任务及其目标编辑器
+        self.load_worker = None
+        self.loading_file = None
+        self.loading_editor = None
+        # 保留预览页面的编辑器，按最近使用排序（最后一个为当前标签页）
+        self.preview_lru = []
         self.settings = Settings()
         self.sync_manager = SyncManager()
+        # 手动保存和自动保存共用的写后保存队列
+        self.save_pipeline = SavePipeline()
+        self.save_pipeline.save_finished.connect(self.on_save_finished)
+        self.save_pipeline.start()
+        # 已提交手动保存、尚未写完的编辑器
+        self.manual_saves = set()
+        self.save_failed = False
+        # 后台自动保存，标签页创建时开始跟踪
+        self.autosave = AutoSaveManager(self.settings, self.save_pipeline, self)
+        # 崩溃恢复用的编辑日志
+        self.journal = EditJournal(self.settings.config_manager.journal_dir, self)
+        # 每篇笔记的光标和滚动位置
+        self.session_store = SessionStore(self.settings.config_manager.session_file)
+        self.session_timer = QTimer(self)
+        self.session_timer.setSingleShot(True)
+        self.session_timer.setInterval(self.SESSION_SAVE_DELAY_MS)
+        self.session_timer.timeout.connect(self.save_session)
         self.setup_ui()
         self.setup_menu()
         self.setup_toolbar()
@@ -116,6 +155,9 @@ class MainWindow(QMainWindow):
         # 加载编辑器布局设置
         self.load_editor_layout_setting()
         
+        # 窗口显示后再检查上次异常退出残留的编辑日志
+        QTimer.singleShot(0, self.recover_journals)
+        
     def setup_ui(self):
         self.setWindowTitle("老司机笔记")
         self.setMinimumSize(1000, 700)
@@ -147,15 +189,43 @@ class MainWindow(QMainWindow):
         self.file_explorer_dock.setWidget(self.file_explorer)
         self.addDockWidget(Qt.LeftDockWidgetArea, self.file_explorer_dock)
         
-        # 创建Markdown编辑器
-        self.editor = MarkdownEditor()
-        
-        # 将编辑器添加到主布局
-        self.main_layout.addWidget(self.editor)
+        # 大纲面板，列出当前笔记的标题，点击跳转
+        self.outline_dock = QDockWidget("大纲", self)
+        self.outline_dock.setAllowedAreas(Qt.LeftDockWidgetArea | Qt.RightDockWidgetArea)
+        self.outline_panel = OutlinePanel()
+        self.outline_dock.setWidget(self.outline_panel)
+        self.addDockWidget(Qt.RightDockWidgetArea, self.outline_dock)
+        
+        # 超大文件的只读查看器，与编辑器互相替换显示
+        self.large_file_viewer = LargeFileViewer()
+        self.large_file_viewer.hide()
+        self.main_layout.addWidget(self.large_file_viewer)
+        
+        # 多标签编辑：每个标签页是一个独立的Markdown编辑器，
+        # 切换时保留各自的文档、撤销记录、滚动位置和预览，不再从磁盘重新加载
+        self.tabs = QTabWidget()
+        self.tabs.setDocumentMode(True)
+        self.tabs.setTabsClosable(True)
+        self.tabs.setMovable(True)
+        self.tabs.tabCloseRequested.connect(self.close_tab)
+        self.tabs.currentChanged.connect(self.on_tab_changed)
+        self.main_layout.addWidget(self.tabs)
+        self.new_tab()
         
         # 设置状态栏
         self.statusBar().showMessage("就绪")
         
+        # 分块加载文件时显示的进度条和取消按钮
+        self.load_progress = QProgressBar()
+        self.load_progress.setMaximumWidth(200)
+        self.load_progress.setRange(0, 100)
+        self.load_progress.hide()
+        self.statusBar().addPermanentWidget(self.load_progress)
+        self.load_cancel_button = QPushButton("取消")
+        self.load_cancel_button.clicked.connect(self.cancel_loading)
+        self.load_cancel_button.hide()
+        self.statusBar().addPermanentWidget(self.load_cancel_button)
+        
     def setup_menu(self):
         # 文件菜单
         file_menu = self.menuBar().addMenu("文件(&F)")
@@ -202,29 +272,29 @@ class MainWindow(QMainWindow):
         
         undo_action = QAction("撤销(&U)", self)
         undo_action.setShortcut(QKeySequence.Undo)
-        undo_action.triggered.connect(self.editor.undo)
+        undo_action.triggered.connect(lambda: self.editor.undo())
         edit_menu.addAction(undo_action)
         
         redo_action = QAction("重做(&R)", self)
         redo_action.setShortcut(QKeySequence.Redo)
-        redo_action.triggered.connect(self.editor.redo)
+        redo_action.triggered.connect(lambda: self.editor.redo())
         edit_menu.addAction(redo_action)
         
         edit_menu.addSeparator()
         
         cut_action = QAction("剪切(&T)", self)
         cut_action.setShortcut(QKeySequence.Cut)
-        cut_action.triggered.connect(self.editor.cut)
+        cut_action.triggered.connect(lambda: self.editor.cut())
         edit_menu.addAction(cut_action)
         
         copy_action = QAction("复制(&C)", self)
         copy_action.setShortcut(QKeySequence.Copy)
-        copy_action.triggered.connect(self.editor.copy)
+        copy_action.triggered.connect(lambda: self.editor.copy())
         edit_menu.addAction(copy_action)
         
         paste_action = QAction("粘贴(&P)", self)
         paste_action.setShortcut(QKeySequence.Paste)
-        paste_action.triggered.connect(self.editor.paste)
+        paste_action.triggered.connect(lambda: self.editor.paste())
         edit_menu.addAction(paste_action)
         
         edit_menu.addSeparator()
@@ -241,6 +311,10 @@ class MainWindow(QMainWindow):
         explorer_action.setText("显示笔记资源管理器(&E)")
         view_menu.addAction(explorer_action)
         
+        outline_action = self.outline_dock.toggleViewAction()
+        outline_action.setText("显示大纲(&O)")
+        view_menu.addAction(outline_action)
+        
         view_menu.addSeparator()
         
         # 添加布局切换菜单项
@@ -311,15 +385,15 @@ class MainWindow(QMainWindow):
         
         # 接上文
         cut_action = QAction("剪切", self)
-        cut_action.triggered.connect(self.editor.cut)
+        cut_action.triggered.connect(lambda: self.editor.cut())
         toolbar.addAction(cut_action)
         
         copy_action = QAction("复制", self)
-        copy_action.triggered.connect(self.editor.copy)
+        copy_action.triggered.connect(lambda: self.editor.copy())
         toolbar.addAction(copy_action)
         
         paste_action = QAction("粘贴", self)
-        paste_action.triggered.connect(self.editor.paste)
+        paste_action.triggered.connect(lambda: self.editor.paste())
         toolbar.addAction(paste_action)
         
         toolbar.addSeparator()
@@ -365,6 +439,9 @@ class MainWindow(QMainWindow):
     def setup_connections(self):
         # 连接文件浏览器的文件打开信号
         self.file_explorer.file_selected.connect(self.load_file_from_explorer)
+        self.file_explorer.paths_moved.connect(self.on_paths_moved)
+        # 点击大纲中的标题时跳转编辑器和预览
+        self.outline_panel.heading_selected.connect(lambda line: self.editor.jump_to_line(line))
         # 添加对dock窗口关闭和浮动状态变化的处理
         self.file_explorer_dock.closeEvent = self.on_explorer_close
         self.file_explorer_dock.topLevelChanged.connect(self.on_explorer_floating_changed)
@@ -392,19 +469,155 @@ class MainWindow(QMainWindow):
         # 这里可以添加额外的处理逻辑
         pass
         
+    @property
+    def editor(self):
+        """当前标签页的编辑器"""
+        return self.tabs.currentWidget()
+    
+    @property
+    def current_file(self):
+        """当前标签页打开的文件路径"""
+        return self.editor.file_path
+    
+    @current_file.setter
+    def current_file(self, file_path):
+        self.editor.file_path = file_path
+        self.update_tab_title(self.editor)
+    
+    def new_tab(self):
+        """新建一个空白标签页并切换过去"""
+        editor = MarkdownEditor()
+        # 新标签页沿用保存的布局设置
+        if self.settings.get("editor_layout", "vertical") == "horizontal":
+            editor.toggle_layout()
+        editor.document().modificationChanged.connect(lambda modified: self.update_tab_title(editor))
+        self.autosave.watch(editor)
+        self.journal.watch(editor)
+        editor.editor.cursorPositionChanged.connect(self.schedule_session_save)
+        editor.editor.verticalScrollBar().valueChanged.connect(self.schedule_session_save)
+        index = self.tabs.addTab(editor, "未命名")
+        self.tabs.setCurrentIndex(index)
+        return editor
+    
+    def update_tab_title(self, editor):
+        """标签页标题为文件名，有未保存的修改时加星号"""
+        index = self.tabs.indexOf(editor)
+        if index < 0:
+            return
+        title = os.path.basename(editor.file_path) if editor.file_path else "未命名"
+        if editor.document().isModified():
+            title += " *"
+        self.tabs.setTabText(index, title)
+        self.tabs.setTabToolTip(index, editor.file_path or "")
+    
+    def find_tab(self, file_path):
+        """查找已打开指定文件的标签页，没有时返回-1"""
+        target = os.path.normcase(os.path.abspath(file_path))
+        for index in range(self.tabs.count()):
+            path = self.tabs.widget(index).file_path
+            if path and os.path.normcase(os.path.abspath(path)) == target:
+                return index
+        return -1
+    
+    def on_paths_moved(self, moves):
+        """资源管理器中移动或重命名了文件或文件夹，已打开的标签页改用新路径"""
+        for index in range(self.tabs.count()):
+            editor = self.tabs.widget(index)
+            if not editor.file_path:
+                continue
+            path = os.path.abspath(editor.file_path)
+            for old_path, new_path in moves:
+                old_path = os.path.abspath(old_path)
+                if os.path.normcase(path) == os.path.normcase(old_path) or \
+                        os.path.normcase(path).startswith(os.path.normcase(os.path.join(old_path, ''))):
+                    editor.file_path = new_path + path[len(old_path):]
+                    self.update_tab_title(editor)
+                    # 尚未写入的保存改写到新路径
+                    self.save_pipeline.retarget(editor, editor.file_path)
+                    break
+    
+    def is_blank_tab(self, editor):
+        """未打开文件、未修改且内容为空的标签页，可以直接用来打开文件"""
+        return (editor.file_path is None and not editor.document().isModified()
+                and editor.document().isEmpty() and editor is not self.loading_editor)
+    
+    def on_tab_changed(self, index):
+        """切换标签页：更新大纲，恢复预览，并按最近使用顺序释放超出预算的后台预览"""
+        editor = self.tabs.widget(index)
+        if editor is None:
+            return
+        self.close_large_file()
+        self.outline_panel.set_parser(editor.block_parser)
+        
+        if editor in self.preview_lru:
+            self.preview_lru.remove(editor)
+        self.preview_lru.append(editor)
+        editor.restore_preview()
+        
+        budget = max(1, int(self.settings.get("max_live_previews", 3)))
+        while len(self.preview_lru) > budget:
+            self.preview_lru.pop(0).release_preview()
+        
+        if editor.file_path:
+            self.statusBar().showMessage(editor.file_path)
+    
+    def close_tab(self, index):
+        """关闭标签页，有未保存的修改时先询问"""
+        editor = self.tabs.widget(index)
+        if editor is None:
+            return False
+        self.tabs.setCurrentIndex(index)
+        if not self.maybe_save():
+            return False
+        # 保存只是加入队列：等待写入完成并立即处理结果，保存失败时保留标签页和编辑日志
+        self.save_failed = False
+        self.save_pipeline.flush()
+        QApplication.sendPostedEvents()
+        if self.save_failed:
+            return False
+        if editor is self.loading_editor:
+            self.cancel_loading()
+        if editor in self.preview_lru:
+            self.preview_lru.remove(editor)
+        self.autosave.unwatch(editor)
+        self.journal.unwatch(editor)
+        self.remember_session(editor)
+        self.schedule_session_save()
+        self.tabs.removeTab(index)
+        editor.deleteLater()
+        # 始终保留至少一个标签页
+        if self.tabs.count() == 0:
+            self.new_tab()
+        return True
+    
+    def remember_session(self, editor):
+        """记录编辑器当前的光标和滚动位置"""
+        if editor.file_path and not editor.loading:
+            self.session_store.set(editor.file_path, editor.session_state())
+    
+    def schedule_session_save(self, *args):
+        """光标、滚动或标签页变化后延迟写入会话状态；持续编辑时每隔一段时间写入一次，而不是一直推迟"""
+        if not self.session_timer.isActive():
+            self.session_timer.start()
+    
+    def save_session(self):
+        """把所有标签页当前的位置写入会话文件，程序异常退出后也能恢复"""
+        self.session_timer.stop()
+        for index in range(self.tabs.count()):
+            self.remember_session(self.tabs.widget(index))
+        self.session_store.save()
+    
     def new_file(self):
-        if self.maybe_save():
-            self.editor.clear()
-            self.current_file = None
-            self.statusBar().showMessage("新建笔记")
+        self.close_large_file()
+        self.new_tab()
+        self.statusBar().showMessage("新建笔记")
     
     def open_file(self):
-        if self.maybe_save():
-            file_path, _ = QFileDialog.getOpenFileName(
-                self, "打开笔记", "", "Markdown文件 (*.md);;所有文件 (*)")
-            
-            if file_path:
-                self.load_file(file_path)
+        file_path, _ = QFileDialog.getOpenFileName(
+            self, "打开笔记", "", "Markdown文件 (*.md);;所有文件 (*)")
+        
+        if file_path:
+            self.load_file(file_path)
     
     def load_file(self, file_path):
         # 检查文件扩展名
@@ -435,28 +648,196 @@ class MainWindow(QMainWindow):
             else:
                 return False
         
+        # 已经打开的文件直接切换到对应标签页
+        index = self.find_tab(file_path)
+        if index >= 0:
+            self.close_large_file()
+            self.tabs.setCurrentIndex(index)
+            return True
+        
         try:
-            with open(file_path, 'r', encoding='utf-8') as file:
-                content = file.read()
-                self.editor.setPlainText(content)
-                self.current_file = file_path
-                self.statusBar().showMessage(f"已打开: {file_path}")
-                return True
+            size = os.path.getsize(file_path)
+            if size > self.LARGE_FILE_THRESHOLD:
+                return self.open_large_file(file_path)
+            self.close_large_file()
+            # 当前标签页是空白的就直接使用，否则新建标签页
+            if not self.is_blank_tab(self.editor):
+                self.new_tab()
+            if size > self.ASYNC_LOAD_THRESHOLD:
+                # 同一时间只进行一个分块加载
+                self.cancel_loading()
+                return self.start_loading(file_path)
+            
+            content, encoding = read_text_file(file_path)
+            self.editor.setPlainText(content)
+            self.current_file = file_path
+            self.journal.reset(self.editor, content_digest(content))
+            self.editor.restore_session_state(self.session_store.get(file_path))
+            self.statusBar().showMessage(self.opened_message(file_path, encoding))
+            return True
         except Exception as e:
             QMessageBox.critical(self, "错误", f"无法打开文件: {str(e)}")
             return False
+    
+    def open_large_file(self, file_path):
+        """用只读查看器打开超大文件，只映射文件而不加载到编辑器"""
+        success, message = self.large_file_viewer.open_file(file_path)
+        if not success:
+            QMessageBox.critical(self, "错误", f"无法打开文件: {message}")
+            return False
+        self.tabs.hide()
+        self.large_file_viewer.show()
+        self.statusBar().showMessage(f"文件过大，已以只读方式打开: {file_path}")
+        return True
+    
+    def close_large_file(self):
+        """关闭只读查看器，恢复编辑器"""
+        if self.large_file_viewer.isHidden():
+            return
+        self.large_file_viewer.close_file()
+        self.large_file_viewer.hide()
+        self.tabs.show()
+    
+    def is_viewing_large_file(self):
+        """当前是否处于大文件只读查看模式"""
+        if self.large_file_viewer.isHidden():
+            return False
+        self.statusBar().showMessage("大文件以只读方式打开，不能保存", 3000)
+        return True
+    
+    def start_loading(self, file_path):
+        """在后台线程中分块读取大文件，内容逐块追加到编辑器，界面保持响应"""
+        self.loading_file = file_path
+        self.loading_editor = self.editor
+        self.loading_editor.begin_loading()
+        
+        self.load_worker = FileLoadWorker(file_path)
+        self.load_worker.chunk_loaded.connect(self.on_load_chunk)
+        self.load_worker.progress_update.connect(self.on_load_progress)
+        self.load_worker.load_finished.connect(self.on_load_finished)
+        
+        self.load_progress.setValue(0)
+        self.load_progress.show()
+        self.load_cancel_button.show()
+        self.statusBar().showMessage(f"正在打开: {file_path}")
+        self.load_worker.start()
+        return True
+    
+    def on_load_chunk(self, text):
+        # 忽略已取消的加载任务仍在队列中的数据
+        if self.sender() is not self.load_worker:
+            return
+        self.loading_editor.append_loaded_text(text)
+        self.load_worker.chunk_consumed()
+    
+    def on_load_progress(self, loaded, total):
+        if self.sender() is not self.load_worker:
+            return
+        if total > 0:
+            self.load_progress.setValue(int(loaded * 100 / total))
+    
+    def on_load_finished(self, success, message):
+        if self.sender() is not self.load_worker:
+            return
+        # 结果信号发出后线程随即结束，等待其退出再释放
+        self.load_worker.wait()
+        digest = self.load_worker.digest.hexdigest()
+        encoding = self.load_worker.encoding
+        self.load_worker = None
+        self.load_progress.hide()
+        self.load_cancel_button.hide()
+        
+        editor = self.loading_editor
+        self.loading_editor = None
+        if success:
+            editor.file_path = self.loading_file
+            editor.finish_loading()
+            self.journal.reset(editor, digest)
+            editor.restore_session_state(self.session_store.get(editor.file_path))
+            self.update_tab_title(editor)
+            self.statusBar().showMessage(self.opened_message(self.loading_file, encoding))
+        else:
+            editor.cancel_loading()
+            QMessageBox.critical(self, "错误", f"无法打开文件: {message}")
+        self.loading_file = None
+    
+    def opened_message(self, file_path, encoding):
+        """打开文件后的状态栏提示，非UTF-8编码的文件保存时会转换为UTF-8"""
+        if encoding in (None, 'utf-8', 'utf-8-sig'):
+            return f"已打开: {file_path}"
+        return f"已打开: {file_path}（{encoding.upper()} 编码，保存时将转换为UTF-8）"
+    
+    def cancel_loading(self):
+        """取消正在进行的分块加载"""
+        if self.load_worker is None:
+            return
+        worker = self.load_worker
+        self.load_worker = None
+        worker.stop()
+        worker.wait()
+        
+        self.load_progress.hide()
+        self.load_cancel_button.hide()
+        self.loading_editor.cancel_loading()
+        self.loading_editor = None
+        self.statusBar().showMessage(f"已取消打开: {self.loading_file}")
+        self.loading_file = None
             
+    def recover_journals(self):
+        """启动时检查上次异常退出残留的编辑日志，询问是否恢复"""
+        for journal_path, header, records in self.journal.find_recoverable():
+            file_path = header.get("path")
+            name = os.path.basename(file_path) if file_path else "未命名笔记"
+            reply = QMessageBox.question(
+                self,
+                "恢复未保存的编辑",
+                f"上次程序异常退出时，{name} 有 {len(records)} 处修改尚未保存。\n是否恢复？",
+                QMessageBox.Yes | QMessageBox.No,
+                QMessageBox.Yes
+            )
+            if reply == QMessageBox.Yes:
+                self.replay_journal(header, records)
+            self.journal.discard(journal_path)
+    
+    def replay_journal(self, header, records):
+        """在新标签页中打开日志对应的笔记，并重放日志中的修改（可以一次撤销）"""
+        file_path = header.get("path")
+        content = ""
+        if file_path:
+            if self.find_tab(file_path) >= 0:
+                QMessageBox.warning(self, "无法恢复", f"{file_path} 已经打开，无法恢复上次的编辑")
+                return False
+            # 磁盘上的内容必须与写日志时的基准一致，否则重放会破坏笔记
+            content = load_file(file_path)
+            if content is None or content_digest(content) != header.get("digest"):
+                QMessageBox.warning(self, "无法恢复", f"{file_path} 已被修改或无法读取，无法恢复上次的编辑")
+                return False
+        
+        if not self.is_blank_tab(self.editor):
+            self.new_tab()
+        editor = self.editor
+        editor.setPlainText(content)
+        editor.file_path = file_path
+        self.journal.reset(editor, header.get("digest"))
+        apply_records(editor.document(), records)
+        self.update_tab_title(editor)
+        self.statusBar().showMessage(f"已恢复未保存的编辑: {file_path or '未命名笔记'}")
+        return True
+    
     def load_file_from_explorer(self, file_path):
-        if self.maybe_save():
-            self.load_file(file_path)
+        self.load_file(file_path)
     
     def save_file(self):
+        if self.is_viewing_large_file():
+            return False
         if self.current_file:
             return self.save_to_file(self.current_file)
         else:
             return self.save_file_as()
     
     def save_file_as(self):
+        if self.is_viewing_large_file():
+            return False
         file_path, _ = QFileDialog.getSaveFileName(
             self, "保存笔记", "", "Markdown文件 (*.md);;所有文件 (*)")
         
@@ -465,15 +846,46 @@ class MainWindow(QMainWindow):
         return False
     
     def save_to_file(self, file_path):
-        try:
-            with open(file_path, 'w', encoding='utf-8') as file:
-                file.write(self.editor.toPlainText())
-                self.current_file = file_path
-                self.statusBar().showMessage(f"已保存: {file_path}")
-                return True
-        except Exception as e:
-            QMessageBox.critical(self, "错误", f"无法保存文件: {str(e)}")
-            return False
+        """把当前内容的快照交给保存队列，写入完成后在 on_save_finished 中清除修改标记"""
+        self.current_file = file_path
+        self.manual_saves.add(self.editor)
+        self.save_pipeline.enqueue(file_path, self.editor.toPlainText(), self.editor.document().revision(),
+                                   owner=self.editor)
+        self.statusBar().showMessage(f"正在保存: {file_path}")
+        return True
+    
+    def on_save_finished(self, editor, file_path, revision, digest, success, message):
+        """保存队列写入完成（手动保存或自动保存），editor 为发起保存的编辑器"""
+        manual = editor in self.manual_saves
+        self.manual_saves.discard(editor)
+        if not success:
+            if manual:
+                self.save_failed = True
+                QMessageBox.critical(self, "错误", f"无法保存文件: {message}")
+            else:
+                print(f"自动保存失败: {file_path}: {message}")
+                self.statusBar().showMessage(f"自动保存失败: {message}", 3000)
+            return
+        # 文件夹统计中的字数和大小随之变化
+        self.file_explorer.schedule_statistics()
+        
+        # 标签页已关闭
+        if self.tabs.indexOf(editor) < 0:
+            return
+        if not editor.file_path or \
+                os.path.normcase(os.path.abspath(editor.file_path)) != os.path.normcase(os.path.abspath(file_path)):
+            # 写入期间文件被移动或另存为，写到的是旧路径：把当前内容写到新路径，之后再清除修改标记
+            if editor.file_path:
+                if manual:
+                    self.manual_saves.add(editor)
+                self.save_pipeline.enqueue(editor.file_path, editor.toPlainText(), editor.document().revision(),
+                                           owner=editor)
+            return
+        self.journal.compact(editor, revision, digest)
+        # 快照之后没有新的编辑时才清除修改标记，否则等下一次保存
+        if editor.document().revision() == revision:
+            editor.document().setModified(False)
+        self.statusBar().showMessage(f"{'已保存' if manual else '已自动保存'}: {file_path}", 3000)
     
     def maybe_save(self):
         if not self.editor.document().isModified():
@@ -505,12 +917,12 @@ class MainWindow(QMainWindow):
                 
                 if save_path:
                     try:
-                        with open(file_path, 'r', encoding='utf-8') as source:
-                            content = source.read()
-                            with open(save_path, 'w', encoding='utf-8') as target:
-                                target.write(content)
-                            self.load_file(save_path)
-                            self.file_explorer.refresh()
+                        content, _ = read_text_file(file_path)
+                        # 导入后立即打开，因此同步写入
+                        if not save_file(content, save_path):
+                            raise OSError(f"无法写入 {save_path}")
+                        self.load_file(save_path)
+                        self.file_explorer.refresh()
                     except Exception as e:
                         QMessageBox.critical(self, "错误", f"导入失败: {str(e)}")
     
@@ -524,11 +936,13 @@ class MainWindow(QMainWindow):
             
         if export_path:
             try:
+                # 导出的是磁盘上的文件，先等待排队中的保存写完
+                self.save_pipeline.flush()
                 with open(self.current_file, 'r', encoding='utf-8') as source:
                     content = source.read()
-                    with open(export_path, 'w', encoding='utf-8') as target:
-                        target.write(content)
-                    QMessageBox.information(self, "成功", f"成功导出到: {export_path}")
+                if not save_file(content, export_path):
+                    raise OSError(f"无法写入 {export_path}")
+                QMessageBox.information(self, "成功", f"成功导出到: {export_path}")
             except Exception as e:
                 QMessageBox.critical(self, "错误", f"导出失败: {str(e)}")
     
@@ -554,10 +968,30 @@ class MainWindow(QMainWindow):
         )
     
     def closeEvent(self, event):
-        if self.maybe_save():
-            event.accept()
-        else:
+        # 逐个询问有未保存修改的标签页
+        for index in range(self.tabs.count()):
+            if self.tabs.widget(index).document().isModified():
+                self.tabs.setCurrentIndex(index)
+                if not self.maybe_save():
+                    event.ignore()
+                    return
+        # 等待排队中的保存写完，并立即处理写入结果，保存失败时不退出
+        self.save_failed = False
+        self.save_pipeline.flush()
+        QApplication.sendPostedEvents()
+        if self.save_failed:
             event.ignore()
+            return
+        self.cancel_loading()
+        self.save_session()
+        self.autosave.stop()
+        self.save_pipeline.stop()
+        self.save_pipeline.wait()
+        self.journal.stop()
+        self.file_explorer.stop()
+        self.large_file_viewer.close_file()
+        stop_code_highlight_worker()
+        event.accept()
             
     # 以下是新增的同步相关方法
     
@@ -574,9 +1008,10 @@ class MainWindow(QMainWindow):
             self.show_sync_settings()
             return
             
-        # 保存当前笔记
+        # 保存当前笔记，同步读取的是磁盘上的文件
         if self.current_file and self.editor.document().isModified():
             self.save_file()
+        self.save_pipeline.flush()
             
         # 开始同步
         success, message = self.sync_manager.sync_notes()
@@ -598,6 +1033,7 @@ class MainWindow(QMainWindow):
         # 保存当前笔记
         if self.editor.document().isModified():
             self.save_file()
+        self.save_pipeline.flush()
             
         # 上传笔记
         success, message, cloud_path = self.sync_manager.upload_note(self.current_file)
@@ -727,11 +1163,15 @@ class MainWindow(QMainWindow):
         
     def toggle_editor_layout(self):
         """切换编辑器和预览窗口的布局方向"""
-        # 调用编辑器的布局切换方法
+        # 调用编辑器的布局切换方法，所有标签页保持一致
         self.editor.toggle_layout()
+        current_layout = self.editor.get_layout_orientation()
+        for index in range(self.tabs.count()):
+            editor = self.tabs.widget(index)
+            if editor.get_layout_orientation() != current_layout:
+                editor.toggle_layout()
         
         # 更新布局设置
-        current_layout = self.editor.get_layout_orientation()
         layout_name = "horizontal" if current_layout == Qt.Horizontal else "vertical"
         self.settings.set("editor_layout", layout_name)
         
@@ -5,6 +5,9 @@ from PyQt5.QtCore import Qt, QThread, pyqtSignal
 import os
 import re
 
+from app.utils.encoding_detector import read_text_file
+from app.utils.note_catalog import NoteCatalog
+
 class SearchWorker(QThread):
     result_found = pyqtSignal(str, str, int)
     search_finished = pyqtSignal()
@@ -21,34 +24,28 @@ class SearchWorker(QThread):
         self.search_finished.emit()
         
     def search_files(self, path):
-        file_count = 0
-        total_files = 0
-        
-        # 先计算总文件数
-        for root, dirs, files in os.walk(path):
-            for file in files:
-                if file.endswith('.md'):
-                    total_files += 1
-        
-        # 然后搜索
-        for root, dirs, files in os.walk(path):
-            for file in files:
-                if not self.running:
-                    return
-                    
-                if file.endswith('.md'):
-                    file_path = os.path.join(root, file)
-                    file_count += 1
-                    self.progress_update.emit(file_count, total_files)
-                    try:
-                        with open(file_path, 'r', encoding='utf-8') as f:
-                            content = f.read().lower()
-                            if self.keyword in content:
-                                # 获取匹配位置的上下文
-                                context = self.get_context(content, self.keyword)
-                                self.result_found.emit(file_path, context, content.count(self.keyword))
-                    except Exception:
-                        pass
+        # 笔记列表来自共享的笔记目录；先重新核对修改时间，在程序外新建或重命名的笔记也能搜到，
+        # 未变化的笔记不会被重新读取
+        catalog = NoteCatalog()
+        if not catalog.refresh(path, should_continue=lambda: self.running):
+            return
+        notes = catalog.notes(path)
+        total_files = len(notes)
+        
+        for file_count, note in enumerate(notes, 1):
+            if not self.running:
+                return
+            file_path = note["path"]
+            self.progress_update.emit(file_count, total_files)
+            try:
+                content, _ = read_text_file(file_path)
+                content = content.lower()
+                if self.keyword in content:
+                    # 获取匹配位置的上下文
+                    context = self.get_context(content, self.keyword)
+                    self.result_found.emit(file_path, context, content.count(self.keyword))
+            except Exception:
+                pass
     
     def get_context(self, content, keyword, context_chars=60):
         # 找到第一个匹配位置
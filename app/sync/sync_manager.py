@@ -6,6 +6,7 @@ from PyQt5.QtCore import QObject, pyqtSignal
 
 from app.utils.sync_config import SyncConfig
 from app.utils.file_operations import load_file, save_file
+from app.utils.note_catalog import NoteCatalog
 
 class SyncManager(QObject):
     """
@@ -17,6 +18,9 @@ class SyncManager(QObject):
     sync_finished = pyqtSignal(bool, str)  # 成功/失败, 消息
     sync_progress = pyqtSignal(str)  # 进度消息
     
+    # 每个批量请求包含的最多操作数
+    BATCH_SIZE = 500
+    
     def __init__(self):
         super().__init__()
         self.config = SyncConfig()
@@ -53,7 +57,7 @@ class SyncManager(QObject):
         发送HTTP请求，并处理常见错误
         
         Args:
-            method: 请求方法 ('get', 'post', 'delete')
+            method: 请求方法 ('get', 'post', 'put', 'delete')
             api_path: API路径 (例如 '/api/v1/notes')
             data: 请求数据
             params: 查询参数
@@ -94,6 +98,8 @@ class SyncManager(QObject):
                 response = requests.get(url, **request_options)
             elif method.lower() == 'post':
                 response = requests.post(url, **request_options)
+            elif method.lower() == 'put':
+                response = requests.put(url, **request_options)
             elif method.lower() == 'delete':
                 response = requests.delete(url, **request_options)
             else:
@@ -245,6 +251,128 @@ class SyncManager(QObject):
         else:
             return False, response
             
+    def default_cloud_path(self, local_path):
+        """没有映射时本地路径对应的云端路径（相对于笔记目录）"""
+        base_dir = os.path.abspath(self.config.settings.get("notes_directory"))
+        local_path = os.path.abspath(local_path)
+        if local_path.startswith(base_dir + os.sep):
+            return os.path.relpath(local_path, base_dir).replace(os.sep, '/')
+        return os.path.basename(local_path)
+        
+    def send_local_changes(self, changes, mappings):
+        """
+        把本地已完成的批量删除、移动和重命名同步到云端
+        所有云端操作合并为批量请求（每 BATCH_SIZE 个一次）；服务器不支持批量接口时退回逐个请求。
+        只发送请求而不修改配置，可以在后台线程中调用；返回的映射变化由界面线程
+        通过 config.update_file_mappings 一次性写入
+        
+        Args:
+            changes: [('delete', 本地路径) 或 ('rename', 旧本地路径, 新本地路径)]
+            mappings: 在界面线程中复制的文件映射 {本地路径: 云端路径}
+            
+        Returns:
+            (success, message, 要删除的映射键列表, 要设置的映射字典)
+        """
+        if not self.is_sync_enabled():
+            return False, "同步未启用", [], {}
+            
+        # {规范化的本地路径: 映射表中的原始键}；映射可能以相对路径或正斜杠记录，统一为绝对路径后比较
+        keys = {os.path.abspath(local): local for local in mappings}
+        removed = []
+        # 每个云端操作对应 (请求数据, 成功时设置的映射, 失败时设置的映射)
+        operations = []
+        
+        for change in changes:
+            old_local = os.path.abspath(change[1])
+            if old_local in keys:
+                # 单个文件
+                entries = [old_local]
+                old_cloud = mappings[keys[old_local]]
+            else:
+                # 文件夹：其下所有有映射的文件
+                prefix = old_local + os.sep
+                entries = [path for path in keys if path.startswith(prefix)]
+                old_cloud = self.default_cloud_path(old_local)
+            if not entries:
+                # 不在云端
+                continue
+            removed.extend(keys[path] for path in entries)
+            
+            if change[0] == 'delete':
+                operations.append(({"op": "delete", "path": old_cloud}, {}, {}))
+                continue
+                
+            new_local = os.path.abspath(change[2])
+            if old_local in keys:
+                if os.path.dirname(new_local) == os.path.dirname(old_local):
+                    # 重命名时保持原来的云端目录
+                    new_cloud = '/'.join(old_cloud.replace('\\', '/').split('/')[:-1] + [os.path.basename(new_local)])
+                else:
+                    new_cloud = self.default_cloud_path(new_local)
+                operations.append(({"op": "rename", "old_path": old_cloud, "new_path": new_cloud},
+                                   {new_local: new_cloud}, {new_local: old_cloud}))
+                continue
+                
+            new_cloud = self.default_cloud_path(new_local)
+            moved, kept = {}, {}
+            for path in entries:
+                local = new_local + path[len(old_local):]
+                cloud = mappings[keys[path]]
+                kept[local] = cloud
+                if cloud.replace('\\', '/').startswith(old_cloud + '/'):
+                    moved[local] = new_cloud + cloud.replace('\\', '/')[len(old_cloud):]
+                else:
+                    moved[local] = cloud
+            operations.append(({"op": "rename", "old_path": old_cloud, "new_path": new_cloud}, moved, kept))
+            
+        if not operations:
+            return True, "没有需要同步到云端的项目", [], {}
+            
+        results = []
+        for start in range(0, len(operations), self.BATCH_SIZE):
+            batch = [operation[0] for operation in operations[start:start + self.BATCH_SIZE]]
+            results.extend(self._send_batch(batch))
+            
+        added = {}
+        errors = []
+        for (request, on_success, on_failure), (success, message) in zip(operations, results):
+            added.update(on_success if success else on_failure)
+            if not success:
+                errors.append(f"{request.get('path') or request.get('old_path')}: {message}")
+        
+        if errors:
+            return False, f"云端有 {len(errors)} 项更新失败:\n" + "\n".join(errors[:10]), removed, added
+        return True, f"已同步 {len(operations)} 项到云端", removed, added
+        
+    def _send_batch(self, operations):
+        """发送一个批量请求，返回每个操作的 (success, message)"""
+        success, response = self._make_request('post', '/api/v1/batch', {"operations": operations})
+        if success:
+            results = response.json().get("results", [])
+            return [
+                (bool(result.get("success")), result.get("error", ""))
+                for result in results
+            ] + [(False, "服务器未返回结果")] * (len(operations) - len(results))
+        if not response.endswith("HTTP 404"):
+            return [(False, response)] * len(operations)
+            
+        # 旧版服务器没有批量接口
+        results = []
+        for operation in operations:
+            if operation["op"] == "delete":
+                success, response = self._make_request('delete', f'/api/v1/notes/{operation["path"]}')
+            else:
+                success, response = self._make_request('put', '/api/v1/rename', {
+                    "old_path": operation["old_path"],
+                    "new_path": operation["new_path"]
+                })
+            if success:
+                result = response.json()
+                results.append((bool(result.get("success")), result.get("error", "")))
+            else:
+                results.append((False, response))
+        return results
+            
     def list_remote_notes(self):
         """
         获取服务器上的笔记列表
@@ -400,7 +528,7 @@ class SyncManager(QObject):
                     
                 sync_data["notes"].append({
                     "path": cloud_path,
-                    "last_modified": int(os.path.getmtime(local_path))
+                    "last_modified": note["last_modified"]
                 })
                 
             # 发送同步请求
@@ -434,7 +562,8 @@ class SyncManager(QObject):
                         local_path = os.path.join(base_dir, cloud_path)
                         
                     # 保存到本地
-                    save_file(content, local_path)
+                    if save_file(content, local_path):
+                        NoteCatalog().update_file(local_path)
                     self.config.set_file_mapping(local_path, cloud_path)
                     
             # 处理需要上传的笔记
@@ -470,16 +599,16 @@ class SyncManager(QObject):
             return False, error_msg
             
     def _scan_local_notes(self, base_dir):
-        """扫描本地笔记文件"""
-        notes = []
-        
-        for root, dirs, files in os.walk(base_dir):
-            for file in files:
-                if file.endswith('.md') and not file.startswith('.'):
-                    full_path = os.path.join(root, file)
-                    notes.append({
-                        "path": full_path,
-                        "last_modified": int(os.path.getmtime(full_path))
-                    })
-                    
-        return notes
\ No newline at end of file
+        """本地笔记列表，来自共享的笔记目录（增量扫描，不再单独遍历笔记库）"""
+        catalog = NoteCatalog()
+        # 同步总是重新检查修改时间：缓存的时间可能早于在程序外修改的笔记，服务器会因此选择较旧的云端版本。
+        # 未变化的笔记不会被重新读取，检查的开销只是每个文件一次 stat
+        if not catalog.refresh(base_dir):
+            raise RuntimeError("扫描本地笔记失败")
+        # 目录中的路径是绝对路径，这里还原成以配置的笔记目录开头的形式，与已有的文件映射一致
+        base_key = catalog.key(base_dir)
+        return [
+            {"path": os.path.join(base_dir, os.path.relpath(note["path"], base_key)),
+             "last_modified": int(note["mtime"])}
+            for note in catalog.notes(base_dir)
+        ]
\ No newline at end of file
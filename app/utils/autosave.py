@@ -0,0 +1,78 @@
+from PyQt5.QtCore import QObject, QTimer
+
+
+class AutoSaveManager(QObject):
+    """
+    自动保存服务，按 auto_save 和 auto_save_interval 设置工作
+    编辑只把编辑器记为待保存并启动计时器，同一间隔内的多次编辑合并为一次保存；
+    计时器到期时在界面线程中读取文档快照，交给写后保存队列在后台写入，慢速或网络磁盘不会卡住输入。
+    写入结果由保存队列的 save_finished 信号通知
+    """
+
+    def __init__(self, settings, pipeline, parent=None):
+        super().__init__(parent)
+        self.settings = settings
+        self.pipeline = pipeline
+        # 有未保存编辑的编辑器
+        self.dirty = []
+
+        self.timer = QTimer(self)
+        self.timer.setSingleShot(True)
+        self.timer.timeout.connect(self.save_pending)
+
+    def is_enabled(self):
+        enabled = self.settings.get("auto_save", True)
+        if isinstance(enabled, str):
+            return enabled.lower() == 'true'
+        return bool(enabled)
+
+    def interval_ms(self):
+        try:
+            seconds = float(self.settings.get("auto_save_interval", 60))
+        except (TypeError, ValueError):
+            seconds = 60
+        return int(max(1, seconds) * 1000)
+
+    def watch(self, editor):
+        """开始跟踪编辑器的修改"""
+        editor.document().contentsChanged.connect(lambda: self.on_edited(editor))
+
+    def unwatch(self, editor):
+        """编辑器被关闭，不再为它保存"""
+        if editor in self.dirty:
+            self.dirty.remove(editor)
+
+    def on_edited(self, editor):
+        # 每次按键都会调用，这里只做记录
+        if editor not in self.dirty:
+            self.dirty.append(editor)
+        if not self.timer.isActive():
+            if self.is_enabled():
+                self.timer.start(self.interval_ms())
+            else:
+                self.dirty = []
+
+    def save_pending(self):
+        """读取待保存编辑器的快照，交给保存队列写入"""
+        if not self.is_enabled():
+            self.dirty = []
+            return
+        waiting = []
+        for editor in self.dirty:
+            # 正在分块加载的编辑器等加载完成后再保存；未命名的笔记不自动保存
+            if editor.loading:
+                waiting.append(editor)
+                continue
+            document = editor.document()
+            if not editor.file_path or not document.isModified():
+                continue
+            self.pipeline.enqueue(editor.file_path, editor.toPlainText(), document.revision(),
+                                  force=False, owner=editor)
+        self.dirty = waiting
+        if waiting:
+            self.timer.start(self.interval_ms())
+
+    def stop(self):
+        """停止自动保存（退出程序时调用）"""
+        self.timer.stop()
+        self.dirty = []
@@ -22,6 +22,12 @@ class ConfigManager:
         # 配置文件路径
         self.config_dir = os.path.expanduser("~/markdown_notes")
         self.config_file = os.path.join(self.config_dir, ".huu_note_config.json")
+        # 缓存目录（代码高亮、预览等可重建的数据）
+        self.cache_dir = os.path.join(self.config_dir, ".huu_cache")
+        # 崩溃恢复用的编辑日志目录
+        self.journal_dir = os.path.join(self.config_dir, ".huu_journal")
+        # 每篇笔记的会话状态（光标、滚动位置）
+        self.session_file = os.path.join(self.config_dir, ".huu_session.json")
         
         # 加载配置
         self.config = self.load_config()
@@ -39,7 +45,9 @@ class ConfigManager:
                 "theme": "default",
                 "auto_save": True,
                 "auto_save_interval": 60,  # 秒
-                "editor_layout": "horizontal"  # 默认左右布局
+                "fsync_on_save": True,  # 保存时同步写入磁盘，网络磁盘上较慢时可以关闭
+                "editor_layout": "horizontal",  # 默认左右布局
+                "max_live_previews": 3  # 保留预览页面的标签页数量，超出时释放最久未使用的后台标签页的预览
             },
             # 同步配置部分
             "sync_settings": {
@@ -114,37 +122,61 @@ class ConfigManager:
             return enabled.lower() == 'true'
         return bool(enabled) and bool(self.get_sync_setting("api_key", ""))
     
+    @staticmethod
+    def mapping_key(local_path):
+        """
+        比较文件映射时使用的路径形式
+        同一文件可能以不同形式记录（相对路径、Windows下的正斜杠和大小写），统一为绝对路径后再比较
+        """
+        return os.path.normcase(os.path.abspath(local_path))
+    
+    def find_mapping_keys(self, mappings, local_path):
+        """映射中与 local_path 指向同一文件的所有键"""
+        key = self.mapping_key(local_path)
+        return [path for path in mappings if self.mapping_key(path) == key]
+    
     def get_file_mapping(self, local_path):
         """获取本地文件对应的云端路径"""
         mappings = self.get_sync_setting("file_mapping", {})
         
-        # 规范化输入路径
-        norm_path = os.path.normpath(local_path)
-        
         # 直接匹配
-        if norm_path in mappings:
-            return mappings[norm_path]
+        if local_path in mappings:
+            return mappings[local_path]
             
-        # 尝试规范化所有键进行匹配
-        for path, cloud_path in mappings.items():
-            if os.path.normpath(path) == norm_path:
-                return cloud_path
+        # 规范化所有键进行匹配
+        for path in self.find_mapping_keys(mappings, local_path):
+            return mappings[path]
                 
         return None
     
     def set_file_mapping(self, local_path, cloud_path):
-        """设置本地文件与云端文件的映射关系"""
+        """设置本地文件与云端文件的映射关系（替换同一文件以其他形式记录的映射）"""
         mappings = self.get_sync_setting("file_mapping", {})
+        for path in self.find_mapping_keys(mappings, local_path):
+            del mappings[path]
         mappings[local_path] = cloud_path
         self.set_sync_setting("file_mapping", mappings)
     
     def remove_file_mapping(self, local_path):
         """删除文件映射"""
         mappings = self.get_sync_setting("file_mapping", {})
-        if local_path in mappings:
-            del mappings[local_path]
+        paths = self.find_mapping_keys(mappings, local_path)
+        if paths:
+            for path in paths:
+                del mappings[path]
             self.set_sync_setting("file_mapping", mappings)
     
+    def update_file_mappings(self, removed=(), added=None):
+        """批量删除和设置文件映射，只写一次配置文件"""
+        mappings = self.get_sync_setting("file_mapping", {})
+        added = added or {}
+        removed_keys = {self.mapping_key(path) for path in removed}
+        removed_keys.update(self.mapping_key(path) for path in added)
+        for path in [path for path in mappings if self.mapping_key(path) in removed_keys]:
+            del mappings[path]
+        mappings.update(added)
+        self.set_sync_setting("file_mapping", mappings)
+    
     def update_last_sync_time(self):
         """更新最后同步时间"""
         import time
@@ -0,0 +1,130 @@
+import os
+import hashlib
+import tempfile
+import threading
+
+
+def content_hash(*parts):
+    """计算若干字符串组合后的内容哈希，用作缓存键"""
+    digest = hashlib.sha1()
+    for part in parts:
+        digest.update(str(part).encode('utf-8'))
+        digest.update(b'\0')
+    return digest.hexdigest()
+
+
+class DiskCache:
+    """
+    基于文件的持久化文本缓存
+    每个缓存项保存为一个文件，总大小超过上限时按最近访问时间淘汰最旧的项。
+    可以在多个线程中同时使用
+    """
+
+    def __init__(self, directory, max_size=50 * 1024 * 1024):
+        self.directory = directory
+        self.max_size = max_size
+        # 缓存总大小，第一次写入时才扫描目录统计
+        self._size = None
+        # 保护缓存总大小的统计和淘汰
+        self._lock = threading.Lock()
+
+    def _path(self, key):
+        return os.path.join(self.directory, key[:2], key + '.cache')
+
+    def get(self, key):
+        """读取缓存项，不存在时返回None"""
+        path = self._path(key)
+        try:
+            with open(path, 'r', encoding='utf-8') as file:
+                value = file.read()
+        except OSError:
+            return None
+        try:
+            # 更新访问时间，用于淘汰
+            os.utime(path, None)
+        except OSError:
+            pass
+        return value
+
+    def contains(self, key):
+        """检查缓存项是否存在"""
+        return os.path.exists(self._path(key))
+
+    def set(self, key, value):
+        """写入缓存项（先写临时文件再原子替换）"""
+        path = self._path(key)
+        temp_path = None
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            try:
+                old_size = os.path.getsize(path)
+            except OSError:
+                old_size = 0
+            fd, temp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix='.tmp')
+            with os.fdopen(fd, 'w', encoding='utf-8') as file:
+                file.write(value)
+            new_size = os.path.getsize(temp_path)
+            os.replace(temp_path, path)
+        except OSError as e:
+            print(f"写入缓存失败: {str(e)}")
+            if temp_path is not None:
+                try:
+                    os.remove(temp_path)
+                except OSError:
+                    pass
+            return False
+
+        with self._lock:
+            if self._size is None:
+                self._size = self._scan_size()
+            else:
+                self._size += new_size - old_size
+            if self._size > self.max_size:
+                self.evict()
+        return True
+
+    def _scan_entries(self):
+        """列出所有缓存文件 (访问时间, 大小, 路径)"""
+        entries = []
+        if not os.path.isdir(self.directory):
+            return entries
+        for bucket in os.scandir(self.directory):
+            if not bucket.is_dir():
+                continue
+            for entry in os.scandir(bucket.path):
+                if entry.name.endswith('.cache'):
+                    try:
+                        stat = entry.stat()
+                    except OSError:
+                        continue
+                    entries.append((stat.st_mtime, stat.st_size, entry.path))
+        return entries
+
+    def _scan_size(self):
+        return sum(size for _, size, _ in self._scan_entries())
+
+    def evict(self):
+        """淘汰最久未访问的缓存项，直到总大小降到上限的90%以下（调用时已持有 _lock）"""
+        entries = self._scan_entries()
+        entries.sort()
+        size = sum(size for _, size, _ in entries)
+        target = self.max_size * 0.9
+        for _, entry_size, path in entries:
+            if size <= target:
+                break
+            try:
+                os.remove(path)
+                size -= entry_size
+            except OSError:
+                pass
+        self._size = size
+
+    def clear(self):
+        """清空缓存"""
+        with self._lock:
+            for _, _, path in self._scan_entries():
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
+            self._size = 0
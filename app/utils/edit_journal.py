@@ -0,0 +1,284 @@
+import json
+import os
+import uuid
+
+from PyQt5.QtCore import QObject, QThread, QTimer, QMutex, QWaitCondition, QLockFile
+from PyQt5.QtGui import QTextCursor
+
+JOURNAL_SUFFIX = '.journal'
+LOCK_SUFFIX = '.lock'
+
+
+def read_journal(journal_path):
+    """
+    读取编辑日志，返回 (文件头, 记录列表)，无法读取时返回 (None, [])
+    崩溃时最后一行可能只写了一半，遇到无法解析的行即停止
+    """
+    records = []
+    try:
+        with open(journal_path, 'r', encoding='utf-8') as file:
+            header = json.loads(file.readline())
+            for line in file:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    break
+                records.append(record)
+    except (OSError, ValueError) as e:
+        print(f"读取编辑日志失败: {str(e)}")
+        return None, []
+    return header, records
+
+
+def apply_records(document, records):
+    """把日志记录依次重放到文档上，作为一次可撤销的编辑"""
+    cursor = QTextCursor(document)
+    cursor.beginEditBlock()
+    for _, position, removed, text in records:
+        end = document.characterCount() - 1
+        cursor.setPosition(min(position, end))
+        cursor.setPosition(min(position + removed, end), QTextCursor.KeepAnchor)
+        cursor.insertText(text)
+    cursor.endEditBlock()
+
+
+class JournalWriter(QThread):
+    """按顺序在后台线程中执行编辑日志的追加、压缩和删除"""
+
+    def __init__(self):
+        super().__init__()
+        self.running = True
+        self.mutex = QMutex()
+        self.condition = QWaitCondition()
+        self.operations = []
+
+    def enqueue(self, *operation):
+        self.mutex.lock()
+        self.operations.append(operation)
+        self.condition.wakeOne()
+        self.mutex.unlock()
+
+    def run(self):
+        while True:
+            self.mutex.lock()
+            if not self.operations and self.running:
+                self.condition.wait(self.mutex, 500)
+            operations = self.operations
+            self.operations = []
+            self.mutex.unlock()
+
+            for operation in operations:
+                try:
+                    getattr(self, operation[0])(*operation[1:])
+                except Exception as e:
+                    print(f"写入编辑日志失败: {str(e)}")
+            # 退出前处理完已排队的操作
+            if not self.running and not operations:
+                break
+
+    def append(self, journal_path, header, records):
+        """追加记录，日志文件不存在时先写文件头"""
+        lines = [json.dumps(record, ensure_ascii=False) for record in records]
+        if not os.path.exists(journal_path):
+            lines.insert(0, json.dumps(header, ensure_ascii=False))
+        with open(journal_path, 'a', encoding='utf-8') as file:
+            file.write('\n'.join(lines) + '\n')
+
+    def compact(self, journal_path, header, revision):
+        """保存后删除已写入磁盘的记录（修订号不超过 revision），没有剩余记录时删除日志"""
+        if not os.path.exists(journal_path):
+            return
+        _, records = read_journal(journal_path)
+        records = [record for record in records if record[0] > revision]
+        if not records:
+            os.remove(journal_path)
+            return
+        temp_path = journal_path + '.tmp'
+        with open(temp_path, 'w', encoding='utf-8') as file:
+            file.write(json.dumps(header, ensure_ascii=False) + '\n')
+            for record in records:
+                file.write(json.dumps(record, ensure_ascii=False) + '\n')
+        os.replace(temp_path, journal_path)
+
+    def remove(self, journal_path):
+        if os.path.exists(journal_path):
+            os.remove(journal_path)
+
+    def stop(self):
+        """处理完已排队的操作后退出"""
+        self.running = False
+        self.mutex.lock()
+        self.condition.wakeOne()
+        self.mutex.unlock()
+
+
+class EditJournal(QObject):
+    """
+    崩溃恢复用的只追加编辑日志
+    每个编辑器对应一个日志文件，文件头记录笔记路径和保存在磁盘上的内容哈希，
+    之后每行是一次 contentsChange：[文档修订号, 位置, 删除的字符数, 插入的文本]。
+    按键时只在内存中追加一条记录，定时批量交给后台线程写入；保存后删除已落盘的记录。
+    程序正常退出时删除所有日志，启动时残留的日志即为崩溃前未保存的编辑。
+    同时运行多个实例时共用日志目录：每个实例持有一个以实例ID命名的锁文件，文件头记录所属实例，
+    所属实例仍在运行的日志不会被当作残留日志
+    """
+
+    # 批量写入的间隔（毫秒）和内存中最多积累的记录数
+    FLUSH_INTERVAL_MS = 1000
+    MAX_BUFFERED_RECORDS = 1000
+
+    def __init__(self, journal_dir, parent=None):
+        super().__init__(parent)
+        self.journal_dir = journal_dir
+        # {编辑器: 日志文件路径}
+        self.journals = {}
+        # {编辑器: 文件头}
+        self.headers = {}
+        # {编辑器: 尚未写入的记录}
+        self.buffers = {}
+        # {编辑器: 最近一条记录的文档修订号}
+        self.revisions = {}
+        try:
+            os.makedirs(journal_dir, exist_ok=True)
+        except OSError as e:
+            print(f"创建编辑日志目录失败: {str(e)}")
+
+        # 本实例的锁文件，运行期间一直持有；进程崩溃后锁文件由其他实例判断为失效
+        self.owner = uuid.uuid4().hex
+        self.lock = QLockFile(self.lock_path(self.owner))
+        self.lock.setStaleLockTime(0)
+        if not self.lock.tryLock(0):
+            print("创建编辑日志锁文件失败")
+
+        self.timer = QTimer(self)
+        self.timer.setSingleShot(True)
+        self.timer.timeout.connect(self.flush)
+
+        self.writer = JournalWriter()
+        self.writer.start()
+
+    def find_recoverable(self):
+        """上次运行残留的日志 [(日志路径, 文件头, 记录列表), ...]，没有记录的日志直接删除"""
+        result = []
+        try:
+            names = sorted(os.listdir(self.journal_dir))
+        except OSError:
+            return result
+        current = set(self.journals.values())
+        for name in names:
+            if name.endswith(LOCK_SUFFIX):
+                # 顺便清理已退出的实例留下的锁文件
+                self.owner_running(name[:-len(LOCK_SUFFIX)])
+                continue
+            journal_path = os.path.join(self.journal_dir, name)
+            if not name.endswith(JOURNAL_SUFFIX) or journal_path in current:
+                continue
+            header, records = read_journal(journal_path)
+            if header is not None and self.owner_running(header.get("owner")):
+                continue
+            if header is None or not records:
+                self.discard(journal_path)
+                continue
+            result.append((journal_path, header, records))
+        return result
+
+    def lock_path(self, owner):
+        return os.path.join(self.journal_dir, owner + LOCK_SUFFIX)
+
+    def owner_running(self, owner):
+        """日志所属的其他实例是否仍在运行（旧版本的日志没有记录所属实例）"""
+        if not owner or owner == self.owner:
+            return False
+        lock_path = self.lock_path(owner)
+        if not os.path.exists(lock_path):
+            return False
+        lock = QLockFile(lock_path)
+        lock.setStaleLockTime(0)
+        if lock.tryLock(0):
+            # 所属进程已退出，锁文件失效；释放时一并删除
+            lock.unlock()
+            return False
+        return lock.error() == QLockFile.LockFailedError
+
+    def discard(self, journal_path):
+        """删除一个已恢复或放弃恢复的日志"""
+        self.writer.enqueue('remove', journal_path)
+
+    def watch(self, editor):
+        """开始记录编辑器的修改，初始内容视为已保存"""
+        document = editor.document()
+        self.journals[editor] = os.path.join(self.journal_dir, uuid.uuid4().hex + JOURNAL_SUFFIX)
+        self.headers[editor] = {"path": editor.file_path, "digest": None, "owner": self.owner}
+        self.buffers[editor] = []
+        self.revisions[editor] = document.revision()
+        document.contentsChange.connect(
+            lambda position, removed, added: self.on_contents_change(editor, position, removed, added))
+
+    def unwatch(self, editor):
+        """编辑器被关闭，删除它的日志"""
+        journal_path = self.journals.pop(editor, None)
+        self.headers.pop(editor, None)
+        self.buffers.pop(editor, None)
+        self.revisions.pop(editor, None)
+        if journal_path is not None:
+            self.discard(journal_path)
+
+    def on_contents_change(self, editor, position, removed, added):
+        # 每次按键都会调用，只在内存中追加一条记录
+        if editor.loading or editor not in self.buffers:
+            return
+        document = editor.document()
+        revision = document.revision()
+        # 只改变格式（如重新高亮）时修订号不变，删除与插入的字符数相同
+        if removed == added and revision == self.revisions[editor]:
+            return
+        self.revisions[editor] = revision
+
+        text = ""
+        if added:
+            end = document.characterCount() - 1
+            cursor = QTextCursor(document)
+            cursor.setPosition(min(position, end))
+            cursor.setPosition(min(position + added, end), QTextCursor.KeepAnchor)
+            text = cursor.selectedText().replace('\u2029', '\n')
+        buffer = self.buffers[editor]
+        buffer.append([revision, position, removed, text])
+        if len(buffer) >= self.MAX_BUFFERED_RECORDS:
+            self.flush()
+        elif not self.timer.isActive():
+            self.timer.start(self.FLUSH_INTERVAL_MS)
+
+    def flush(self):
+        """把积累的记录交给后台线程追加到日志"""
+        self.timer.stop()
+        for editor, buffer in self.buffers.items():
+            if buffer:
+                self.writer.enqueue('append', self.journals[editor], dict(self.headers[editor]), buffer)
+                self.buffers[editor] = []
+
+    def compact(self, editor, revision, digest):
+        """
+        笔记已保存到磁盘（内容哈希为 digest，对应文档修订号 revision）：
+        以磁盘上的内容为新的基准，删除修订号不超过 revision 的记录
+        """
+        if editor not in self.journals:
+            return
+        header = {"path": editor.file_path, "digest": digest, "owner": self.owner}
+        self.headers[editor] = header
+        self.buffers[editor] = [record for record in self.buffers[editor] if record[0] > revision]
+        self.writer.enqueue('compact', self.journals[editor], dict(header), revision)
+
+    def reset(self, editor, digest):
+        """编辑器载入了新内容，丢弃之前的全部记录"""
+        if editor in self.journals:
+            self.revisions[editor] = editor.document().revision()
+            self.compact(editor, self.revisions[editor], digest)
+
+    def stop(self):
+        """程序正常退出：删除所有日志并等待后台线程结束"""
+        self.timer.stop()
+        for editor in list(self.journals):
+            self.unwatch(editor)
+        self.writer.stop()
+        self.writer.wait()
+        self.lock.unlock()
@@ -0,0 +1,110 @@
+import codecs
+import io
+
+# 字节顺序标记，UTF-32 LE 的BOM以 UTF-16 LE 的BOM开头，需要先检查
+BOMS = (
+    (codecs.BOM_UTF32_LE, 'utf-32'),
+    (codecs.BOM_UTF32_BE, 'utf-32'),
+    (codecs.BOM_UTF8, 'utf-8-sig'),
+    (codecs.BOM_UTF16_LE, 'utf-16'),
+    (codecs.BOM_UTF16_BE, 'utf-16'),
+)
+
+# UTF-8 解码失败时依次尝试的编码，latin-1 可以解码任意字节，作为最后的兜底
+FALLBACK_ENCODINGS = ('gb18030', 'big5', 'latin-1')
+
+# 用于检测编码的文件开头部分的大小（字节）
+SAMPLE_SIZE = 64 * 1024
+
+
+def can_decode(data, encoding, final):
+    """data 能否用 encoding 严格解码；final 为False时允许末尾是不完整的多字节字符"""
+    try:
+        codecs.getincrementaldecoder(encoding)().decode(data, final)
+        return True
+    except (UnicodeDecodeError, LookupError):
+        return False
+
+
+def detect_encoding(sample, final=True, candidates=None):
+    """
+    根据文件开头的一段字节判断编码：先看BOM，再严格尝试UTF-8，最后依次尝试 GB18030 等编码
+    final 表示 sample 是否已是完整的文件
+    """
+    for bom, encoding in BOMS:
+        if sample.startswith(bom):
+            return encoding
+    if candidates is None:
+        candidates = ('utf-8',) + FALLBACK_ENCODINGS
+    for encoding in candidates:
+        if can_decode(sample, encoding, final):
+            return encoding
+    return 'latin-1'
+
+
+class TextFileReader:
+    """
+    自动检测编码并分块解码文本文件，文件只读取一遍
+    编码根据开头的 SAMPLE_SIZE 字节判断；开头全是ASCII而后面出现非UTF-8字节时，
+    因为ASCII在这些编码中都相同，从出错的块开始改用备选编码继续解码。
+    换行符统一为 \\n，与文本模式打开文件的结果一致
+    """
+
+    def __init__(self, file_path, chunk_size=64 * 1024, file=None):
+        self.file_path = file_path
+        self.chunk_size = chunk_size
+        # 已打开的二进制文件对象（例如zip中的成员），为None时按 file_path 打开
+        self.file = file
+        self.encoding = None
+        # 已读取的字节数，用于显示进度
+        self.bytes_read = 0
+
+    def chunks(self):
+        """逐块产生解码后的文本"""
+        with (open(self.file_path, 'rb') if self.file is None else self.file) as file:
+            data = file.read(max(SAMPLE_SIZE, self.chunk_size))
+            self.encoding = detect_encoding(data, len(data) < max(SAMPLE_SIZE, self.chunk_size))
+            decoder = codecs.getincrementaldecoder(self.encoding)()
+            newlines = io.IncrementalNewlineDecoder(None, translate=True)
+            ascii_only = True
+
+            while data:
+                self.bytes_read += len(data)
+                # 上一块末尾未解码完的字节，切换解码器时需要重新解码
+                pending = decoder.getstate()[0]
+                try:
+                    text = decoder.decode(data)
+                except UnicodeDecodeError:
+                    decoder = self.fallback_decoder(pending + data, ascii_only)
+                    text = decoder.decode(pending + data)
+                ascii_only = ascii_only and data.isascii()
+                text = newlines.decode(text)
+                if text:
+                    yield text
+                data = file.read(self.chunk_size)
+
+            text = newlines.decode(decoder.decode(b'', True), True)
+            if text:
+                yield text
+
+    def fallback_decoder(self, data, ascii_only):
+        """当前编码在文件中途解码失败时换用的解码器"""
+        if ascii_only:
+            # 之前的内容都是ASCII，按出错的这一块重新检测编码
+            candidates = tuple(e for e in FALLBACK_ENCODINGS if e != self.encoding)
+            self.encoding = detect_encoding(data, False, candidates)
+            return codecs.getincrementaldecoder(self.encoding)()
+        # 已经按当前编码解码了非ASCII内容，文件本身有损坏，用替换字符继续
+        print(f"文件编码不一致，部分字符无法解码: {self.file_path}")
+        return codecs.getincrementaldecoder(self.encoding)(errors='replace')
+
+    def read(self):
+        """读取并解码整个文件"""
+        return ''.join(self.chunks())
+
+
+def read_text_file(file_path):
+    """自动检测编码读取文本文件，返回 (内容, 编码)"""
+    reader = TextFileReader(file_path)
+    content = reader.read()
+    return content, reader.encoding
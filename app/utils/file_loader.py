@@ -0,0 +1,65 @@
+import hashlib
+import os
+
+from PyQt5.QtCore import QThread, QSemaphore, pyqtSignal
+
+from app.utils.encoding_detector import TextFileReader
+
+
+class FileLoadWorker(QThread):
+    """
+    在后台线程中分块读取并解码笔记文件（自动检测编码，加载完成后可从 encoding 读取）
+    每读取一块就通过 chunk_loaded 发送给界面线程追加到文档中，可以随时取消。
+    界面线程处理完一块后调用 chunk_consumed，未处理的块最多 MAX_PENDING_CHUNKS 个，
+    避免事件队列被大量数据块占满导致界面无法响应
+    """
+    chunk_loaded = pyqtSignal(str)
+    progress_update = pyqtSignal(int, int)
+    load_finished = pyqtSignal(bool, str)
+
+    # 每块读取的字节数
+    CHUNK_SIZE = 64 * 1024
+    # 已发送但界面线程尚未处理的块数上限
+    MAX_PENDING_CHUNKS = 2
+
+    def __init__(self, file_path):
+        super().__init__()
+        self.file_path = file_path
+        self.encoding = None
+        self.running = True
+        self.pending = QSemaphore(self.MAX_PENDING_CHUNKS)
+        # 已读取内容的哈希（与 file_operations.content_digest 一致），加载成功后可用
+        self.digest = hashlib.sha1()
+
+    def run(self):
+        try:
+            total = os.path.getsize(self.file_path)
+            # 按块读取：增量解码，并统一换行符
+            reader = TextFileReader(self.file_path, self.CHUNK_SIZE)
+            for chunk in reader.chunks():
+                if not self.running:
+                    break
+                self.encoding = reader.encoding
+                # 等待界面线程处理完之前的块，期间定期检查是否已取消
+                while self.running and not self.pending.tryAcquire(1, 100):
+                    pass
+                if not self.running:
+                    break
+                self.digest.update(chunk.encode('utf-8', 'surrogatepass'))
+                self.chunk_loaded.emit(chunk)
+                self.progress_update.emit(reader.bytes_read, total)
+        except Exception as e:
+            self.load_finished.emit(False, str(e))
+            return
+
+        if self.running:
+            self.load_finished.emit(True, self.file_path)
+        else:
+            self.load_finished.emit(False, "已取消")
+
+    def chunk_consumed(self):
+        """界面线程已把一块内容追加到文档中"""
+        self.pending.release()
+
+    def stop(self):
+        self.running = False
@@ -1,25 +1,83 @@
+import hashlib
 import os
 import shutil
+import tempfile
+
+from app.utils.config_manager import ConfigManager
+from app.utils.encoding_detector import read_text_file
+
+# 进程的 umask，只能通过设置再恢复来读取；导入时在主线程读取一次，避免在写入线程中临时修改
+_UMASK = os.umask(0)
+os.umask(_UMASK)
 
 def save_file(content, file_path):
-    """保存内容到指定文件路径"""
+    """保存内容到指定文件路径（原子替换，按设置决定是否fsync）"""
+    success, message = write_file_atomic(content, file_path, fsync_enabled())
+    if not success:
+        print(f"保存文件错误: {message}")
+    return success
+
+def fsync_enabled():
+    """保存时是否把数据同步写入磁盘（fsync_on_save 设置）"""
+    enabled = ConfigManager().get_app_setting("fsync_on_save", True)
+    if isinstance(enabled, str):
+        return enabled.lower() == 'true'
+    return bool(enabled)
+
+def content_digest(content):
+    """笔记内容的哈希，用于判断内容是否变化"""
+    return hashlib.sha1(content.encode('utf-8', 'surrogatepass')).hexdigest()
+
+def write_file_atomic(content, file_path, fsync=False):
+    """
+    原子地写入文件：先写到同一目录下的临时文件，再替换目标文件。
+    写入中途出错或被中断时，原文件保持不变。
+    content 可以是字符串，也可以是逐块产生字符串的可迭代对象（流式写入大文件）。
+    fsync 为True时在替换前把临时文件写入磁盘，并在替换后同步目录，断电后也不会丢失或只剩空文件。
+    返回 (是否成功, 错误信息)
+    """
+    directory = os.path.dirname(os.path.abspath(file_path))
+    temp_path = None
     try:
-        # 确保目标目录存在
-        os.makedirs(os.path.dirname(file_path), exist_ok=True)
-        
-        # 写入文件
-        with open(file_path, 'w', encoding='utf-8') as file:
-            file.write(content)
-        return True
+        os.makedirs(directory, exist_ok=True)
+        fd, temp_path = tempfile.mkstemp(
+            prefix='.' + os.path.basename(file_path) + '.', suffix='.tmp', dir=directory)
+        with os.fdopen(fd, 'w', encoding='utf-8') as file:
+            if isinstance(content, str):
+                file.write(content)
+            else:
+                for chunk in content:
+                    file.write(chunk)
+            if fsync:
+                file.flush()
+                os.fsync(file.fileno())
+        # 保留原文件的权限；新文件使用与普通创建相同的默认权限，而不是临时文件的0600
+        if os.path.exists(file_path):
+            shutil.copymode(file_path, temp_path)
+        else:
+            os.chmod(temp_path, 0o666 & ~_UMASK)
+        os.replace(temp_path, file_path)
+        if fsync and os.name == 'posix':
+            # 目录项的修改也需要同步，Windows不支持打开目录
+            dir_fd = os.open(directory, os.O_RDONLY)
+            try:
+                os.fsync(dir_fd)
+            finally:
+                os.close(dir_fd)
+        return True, ""
     except Exception as e:
-        print(f"保存文件错误: {str(e)}")
-        return False
+        if temp_path is not None and os.path.exists(temp_path):
+            try:
+                os.remove(temp_path)
+            except OSError:
+                pass
+        return False, str(e)
 
 def load_file(file_path):
-    """从指定路径加载文件内容"""
+    """从指定路径加载文件内容（自动检测编码）"""
     try:
-        with open(file_path, 'r', encoding='utf-8') as file:
-            return file.read()
+        content, _ = read_text_file(file_path)
+        return content
     except Exception as e:
         print(f"加载文件错误: {str(e)}")
         return None
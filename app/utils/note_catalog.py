@@ -0,0 +1,281 @@
+import os
+import re
+import sqlite3
+import threading
+from contextlib import closing
+
+from app.utils.config_manager import ConfigManager
+from app.utils.encoding_detector import read_text_file
+from app.utils.file_operations import content_digest
+
+# 资源管理器中不显示、不统计的目录（另外所有以 . 开头的目录也不显示）
+SKIPPED_DIRECTORIES = {'node_modules', '__pycache__'}
+
+TITLE_RE = re.compile(r'^ {0,3}#{1,6}\s+(.*?)(?:\s+#+)?\s*$', re.MULTILINE)
+# 中日韩文字每个字计为一个词，其余按连续的字母数字计
+WORD_RE = re.compile(r'[\u3400-\u4dbf\u4e00-\u9fff\uf900-\ufaff]|[A-Za-z0-9_]+')
+
+
+def is_skipped_directory(name):
+    return name.startswith('.') or name in SKIPPED_DIRECTORIES
+
+
+def is_note_file(name):
+    return name.lower().endswith('.md') and not name.startswith('.')
+
+
+def iter_note_files(root):
+    """
+    遍历笔记库，产生每篇笔记的 (路径, 修改时间, 大小)，每个文件只stat一次
+    搜索和同步的范围与以前遍历整个笔记库时相同，不跳过 .开头的目录和 node_modules
+    """
+    stack = [root]
+    while stack:
+        directory = stack.pop()
+        try:
+            entries = list(os.scandir(directory))
+        except OSError:
+            continue
+        for entry in entries:
+            try:
+                if entry.is_dir(follow_symlinks=False):
+                    stack.append(entry.path)
+                elif is_note_file(entry.name) and entry.is_file():
+                    stat = entry.stat()
+                    yield entry.path, stat.st_mtime, stat.st_size
+            except OSError:
+                continue
+
+
+def note_summary(file_path, content):
+    """笔记的标题（第一个标题行，没有时为文件名）和字数"""
+    match = TITLE_RE.search(content)
+    title = match.group(1) if match else os.path.splitext(os.path.basename(file_path))[0]
+    return title, len(WORD_RE.findall(content))
+
+
+class NoteCatalog:
+    """
+    笔记元数据目录（SQLite）
+    记录每篇笔记的路径、修改时间、大小、内容哈希、标题和字数，资源管理器、搜索和同步共用；
+    另外缓存每个文件夹的笔记统计，供资源管理器显示。
+    扫描笔记库时只stat文件，修改时间或大小变化的笔记才重新读取，笔记可能在程序外被修改，
+    每次使用前都重新核对；保存、重命名和删除笔记时直接更新对应的记录
+    """
+    _instance = None
+
+    def __new__(cls):
+        # 单例模式实现
+        if cls._instance is None:
+            cls._instance = super(NoteCatalog, cls).__new__(cls)
+            cls._instance._initialized = False
+        return cls._instance
+
+    def __init__(self):
+        if self._initialized:
+            return
+        self.db_path = os.path.join(ConfigManager().config_dir, ".huu_catalog.db")
+        # 同一时间只进行一次扫描，等待的线程再扫描时只需stat文件
+        self.scan_lock = threading.Lock()
+        self.create_tables()
+        self._initialized = True
+
+    def connect(self):
+        """每次操作使用独立的连接，可以在任意线程中调用"""
+        conn = sqlite3.connect(self.db_path, timeout=10)
+        conn.row_factory = sqlite3.Row
+        # WAL模式下每次提交不必同步写盘，目录可以从笔记文件重建
+        conn.execute("PRAGMA synchronous=NORMAL")
+        return conn
+
+    def create_tables(self):
+        try:
+            os.makedirs(os.path.dirname(self.db_path), exist_ok=True)
+            with closing(self.connect()) as conn, conn:
+                conn.execute("PRAGMA journal_mode=WAL")
+                conn.execute(
+                    "CREATE TABLE IF NOT EXISTS notes ("
+                    " path TEXT PRIMARY KEY, mtime REAL, size INTEGER,"
+                    " hash TEXT, title TEXT, words INTEGER)"
+                )
+                # 每个文件夹直接包含的笔记的统计，signature 由其中笔记的名称、修改时间和大小计算
+                conn.execute(
+                    "CREATE TABLE IF NOT EXISTS directories ("
+                    " path TEXT PRIMARY KEY, signature TEXT,"
+                    " notes INTEGER, size INTEGER, words INTEGER)"
+                )
+        except sqlite3.Error as e:
+            print(f"创建笔记目录数据库失败: {str(e)}")
+
+    def key(self, path):
+        return os.path.abspath(path)
+
+    def index_file(self, conn, file_path, mtime, size):
+        """读取一篇笔记并写入记录"""
+        try:
+            content, _ = read_text_file(file_path)
+        except OSError as e:
+            print(f"读取笔记失败: {str(e)}")
+            return
+        title, words = note_summary(file_path, content)
+        conn.execute(
+            "INSERT OR REPLACE INTO notes (path, mtime, size, hash, title, words) VALUES (?, ?, ?, ?, ?, ?)",
+            (self.key(file_path), mtime, size, content_digest(content), title, words)
+        )
+
+    def refresh(self, root, should_continue=None):
+        """
+        增量更新 root 下的记录：新增和变化的笔记重新读取，已不存在的笔记删除
+        返回是否完整扫描完成（should_continue 返回False时中止）
+        """
+        root_key = self.key(root)
+        with self.scan_lock:
+            try:
+                with closing(self.connect()) as conn, conn:
+                    known = {row['path']: (row['mtime'], row['size']) for row in conn.execute(
+                        "SELECT path, mtime, size FROM notes WHERE path >= ? AND path < ?",
+                        self.prefix_range(root_key))}
+                    seen = set()
+                    for file_path, mtime, size in iter_note_files(root):
+                        if should_continue is not None and not should_continue():
+                            return False
+                        path_key = self.key(file_path)
+                        seen.add(path_key)
+                        if known.get(path_key) != (mtime, size):
+                            self.index_file(conn, file_path, mtime, size)
+                            # 逐篇提交，读取文件期间不占用写锁，界面线程的更新不会被长时间阻塞
+                            conn.commit()
+                    removed = [(path,) for path in known if path not in seen]
+                    conn.executemany("DELETE FROM notes WHERE path = ?", removed)
+            except sqlite3.Error as e:
+                print(f"更新笔记目录失败: {str(e)}")
+                return False
+            return True
+
+    def directory_stats(self, conn, directory, files, should_continue=None):
+        """
+        文件夹直接包含的笔记的 (篇数, 总大小, 总字数)
+        files 为其中笔记的 [(路径, 修改时间, 大小)]；与上次统计时相同则直接使用缓存，
+        否则只重新读取修改时间或大小变化的笔记，并同时更新笔记记录。
+        should_continue 返回False时中止并返回None，已读取的笔记记录仍会保存
+        """
+        files = sorted(files)
+        signature = content_digest("\n".join(
+            f"{os.path.basename(path)}\t{mtime!r}\t{size}" for path, mtime, size in files))
+        key = self.key(directory)
+        row = conn.execute(
+            "SELECT signature, notes, size, words FROM directories WHERE path = ?", (key,)).fetchone()
+        if row is not None and row['signature'] == signature:
+            return row['notes'], row['size'], row['words']
+        
+        # 只取直接位于该文件夹中的笔记记录
+        start, end = self.prefix_range(key)
+        known = {row['path']: row for row in conn.execute(
+            "SELECT path, mtime, size, words FROM notes"
+            " WHERE path >= ? AND path < ? AND instr(substr(path, ?), ?) = 0",
+            (start, end, len(start) + 1, os.sep))}
+        words = 0
+        for path, mtime, size in files:
+            path_key = self.key(path)
+            row = known.pop(path_key, None)
+            if row is None or (row['mtime'], row['size']) != (mtime, size):
+                if should_continue is not None and not should_continue():
+                    conn.commit()
+                    return None
+                self.index_file(conn, path, mtime, size)
+                row = conn.execute("SELECT words FROM notes WHERE path = ?", (path_key,)).fetchone()
+            if row is not None:
+                words += row['words']
+        # 已不存在的笔记
+        conn.executemany("DELETE FROM notes WHERE path = ?", [(path,) for path in known])
+        stats = (len(files), sum(size for _, _, size in files), words)
+        conn.execute(
+            "INSERT OR REPLACE INTO directories (path, signature, notes, size, words) VALUES (?, ?, ?, ?, ?)",
+            (key, signature) + stats)
+        conn.commit()
+        return stats
+
+    def prefix_range(self, root_key):
+        """root 目录下所有路径所在的字符串区间"""
+        prefix = root_key.rstrip(os.sep) + os.sep
+        return prefix, prefix[:-1] + chr(ord(os.sep) + 1)
+
+    def notes(self, root):
+        """root 下所有笔记的记录（字典列表），按路径排序"""
+        try:
+            with closing(self.connect()) as conn:
+                rows = conn.execute(
+                    "SELECT * FROM notes WHERE path >= ? AND path < ? ORDER BY path",
+                    self.prefix_range(self.key(root))).fetchall()
+            return [dict(row) for row in rows]
+        except sqlite3.Error as e:
+            print(f"读取笔记目录失败: {str(e)}")
+            return []
+
+    def get(self, file_path):
+        """单篇笔记的记录，不在目录中或已过期时重新读取"""
+        try:
+            stat = os.stat(file_path)
+        except OSError:
+            return None
+        try:
+            with closing(self.connect()) as conn, conn:
+                row = conn.execute("SELECT * FROM notes WHERE path = ?", (self.key(file_path),)).fetchone()
+                if row is None or (row['mtime'], row['size']) != (stat.st_mtime, stat.st_size):
+                    self.index_file(conn, file_path, stat.st_mtime, stat.st_size)
+                    row = conn.execute("SELECT * FROM notes WHERE path = ?", (self.key(file_path),)).fetchone()
+            return dict(row) if row is not None else None
+        except sqlite3.Error as e:
+            print(f"读取笔记目录失败: {str(e)}")
+            return None
+
+    def update_content(self, file_path, content, digest=None):
+        """笔记刚以 content 写入磁盘（保存队列的后台线程中调用），不必重新读取文件"""
+        if not is_note_file(os.path.basename(file_path)):
+            return
+        try:
+            stat = os.stat(file_path)
+            title, words = note_summary(file_path, content)
+            with closing(self.connect()) as conn, conn:
+                conn.execute(
+                    "INSERT OR REPLACE INTO notes (path, mtime, size, hash, title, words) VALUES (?, ?, ?, ?, ?, ?)",
+                    (self.key(file_path), stat.st_mtime, stat.st_size,
+                     digest or content_digest(content), title, words)
+                )
+        except (OSError, sqlite3.Error) as e:
+            print(f"更新笔记目录失败: {str(e)}")
+
+    def update_file(self, file_path):
+        """笔记已保存或新建，更新它的记录"""
+        if is_note_file(os.path.basename(file_path)):
+            self.get(file_path)
+
+    def remove(self, path):
+        """删除文件或目录（及其下所有笔记）的记录"""
+        path_key = self.key(path)
+        try:
+            with closing(self.connect()) as conn, conn:
+                conn.execute("DELETE FROM notes WHERE path = ?", (path_key,))
+                conn.execute("DELETE FROM notes WHERE path >= ? AND path < ?", self.prefix_range(path_key))
+                conn.execute("DELETE FROM directories WHERE path = ?", (path_key,))
+                conn.execute("DELETE FROM directories WHERE path >= ? AND path < ?", self.prefix_range(path_key))
+        except sqlite3.Error as e:
+            print(f"更新笔记目录失败: {str(e)}")
+
+    def rename(self, old_path, new_path):
+        """文件或目录被重命名或移动，改写其下所有记录的路径"""
+        old_key = self.key(old_path)
+        new_key = self.key(new_path)
+        try:
+            with closing(self.connect()) as conn, conn:
+                conn.execute("DELETE FROM notes WHERE path = ?", (new_key,))
+                conn.execute("UPDATE notes SET path = ? WHERE path = ?", (new_key, old_key))
+                start, end = self.prefix_range(old_key)
+                conn.execute(
+                    "UPDATE OR REPLACE notes SET path = ? || substr(path, ?) WHERE path >= ? AND path < ?",
+                    (new_key, len(old_key) + 1, start, end))
+                # 文件夹统计按路径缓存，移动后重新统计（笔记记录仍然有效，不必重新读取）
+                conn.execute("DELETE FROM directories WHERE path = ?", (old_key,))
+                conn.execute("DELETE FROM directories WHERE path >= ? AND path < ?", (start, end))
+        except sqlite3.Error as e:
+            print(f"更新笔记目录失败: {str(e)}")
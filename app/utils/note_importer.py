@@ -0,0 +1,192 @@
+import os
+import zipfile
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from contextlib import ExitStack
+
+from PyQt5.QtCore import QThread, pyqtSignal
+
+from app.utils.encoding_detector import TextFileReader, detect_encoding, SAMPLE_SIZE
+from app.utils.file_operations import write_file_atomic, copy_file, fsync_enabled
+from app.utils.note_catalog import is_skipped_directory
+
+# 可以导入的文本文件，.txt 导入后转换为 .md
+IMPORT_EXTENSIONS = ('.md', '.txt')
+# 导入主要是磁盘读写，线程数可以多于CPU核数
+IMPORT_WORKERS = 8
+# zip中不导入的目录（macOS打包时附带的资源分支）
+ZIP_SKIPPED_DIRECTORIES = {'__MACOSX'}
+
+
+def is_importable(name):
+    return name.lower().endswith(IMPORT_EXTENSIONS) and not name.startswith('.')
+
+
+def note_name(name):
+    """导入后的文件名，.txt 改为 .md"""
+    if name.lower().endswith('.txt'):
+        return name[:-4] + '.md'
+    return name
+
+
+def is_utf8_file(file_path):
+    """根据文件开头判断是否为UTF-8编码"""
+    with open(file_path, 'rb') as file:
+        sample = file.read(SAMPLE_SIZE)
+    return detect_encoding(sample, len(sample) < SAMPLE_SIZE) in ('utf-8', 'utf-8-sig')
+
+
+def zip_member_name(info):
+    """zip成员的文件名；没有UTF-8标记的旧压缩包（如Windows中文系统打包）按 GB18030 等编码重新解码"""
+    if info.flag_bits & 0x800:
+        return info.filename
+    try:
+        raw = info.filename.encode('cp437')
+    except UnicodeEncodeError:
+        return info.filename
+    return raw.decode(detect_encoding(raw, True, ('utf-8', 'gb18030', 'big5', 'cp437')))
+
+
+class NoteImporter(QThread):
+    """
+    批量导入笔记
+    导入的来源可以是 .md/.txt 文件、文件夹（递归导入其中的笔记，保留目录结构）或zip压缩包。
+    先在后台线程中列出所有要导入的文件并确定不冲突的目标路径，再交给线程池并行复制或转换：
+    UTF-8 编码的 .md 文件直接复制，其他文件边解码边以UTF-8写入，不把整个文件读入内存。
+    每完成一个文件报告一次进度，全部完成后通过 import_finished 发出汇总结果
+    """
+    progress_update = pyqtSignal(int, int)
+    # 汇总结果字典：imported、converted、renamed、skipped、failed、cancelled
+    import_finished = pyqtSignal(object)
+
+    def __init__(self, sources, target_dir):
+        super().__init__()
+        self.sources = sources
+        self.target_dir = target_dir
+        self.running = True
+        # 本次导入已占用的目标路径（规范化后）
+        self.reserved = set()
+
+    def run(self):
+        summary = {'imported': 0, 'converted': 0, 'renamed': 0,
+                   'skipped': [], 'failed': [], 'cancelled': False}
+        with ExitStack() as archives:
+            tasks = []
+            for source in self.sources:
+                if not self.running:
+                    break
+                try:
+                    tasks.extend(self.collect(source, archives, summary))
+                except (OSError, zipfile.BadZipFile) as e:
+                    summary['failed'].append((os.path.basename(source), str(e)))
+            self.import_tasks(tasks, summary)
+        summary['cancelled'] = not self.running
+        self.import_finished.emit(summary)
+
+    def collect(self, source, archives, summary):
+        """列出一个导入来源中的文件，返回任务列表 [(显示名称, 打开函数或源路径, 目标路径)]"""
+        name = os.path.basename(source.rstrip('/\\'))
+        if os.path.isdir(source):
+            return self.collect_directory(source, os.path.join(self.target_dir, name), summary)
+        if name.lower().endswith('.zip'):
+            archive = archives.enter_context(zipfile.ZipFile(source))
+            return self.collect_zip(archive, os.path.join(self.target_dir, os.path.splitext(name)[0]), summary)
+        if is_importable(name):
+            return [(name, source, self.reserve(os.path.join(self.target_dir, note_name(name)), summary))]
+        summary['skipped'].append(name)
+        return []
+
+    def collect_directory(self, directory, target, summary):
+        tasks = []
+        for current, dirs, files in os.walk(directory):
+            if not self.running:
+                break
+            dirs[:] = [d for d in dirs if not is_skipped_directory(d)]
+            relative = os.path.relpath(current, directory)
+            for file_name in files:
+                label = os.path.normpath(os.path.join(os.path.basename(directory), relative, file_name))
+                if not is_importable(file_name):
+                    summary['skipped'].append(label)
+                    continue
+                dst_path = os.path.normpath(os.path.join(target, relative, note_name(file_name)))
+                tasks.append((label, os.path.join(current, file_name), self.reserve(dst_path, summary)))
+        return tasks
+
+    def collect_zip(self, archive, target, summary):
+        tasks = []
+        for info in archive.infolist():
+            if info.is_dir():
+                continue
+            parts = [part for part in zip_member_name(info).replace('\\', '/').split('/') if part not in ('', '.')]
+            label = '/'.join(parts)
+            # 防止成员路径跳出目标目录
+            if not parts or '..' in parts or ':' in parts[0]:
+                summary['failed'].append((label, "压缩包中的路径不安全"))
+                continue
+            if any(is_skipped_directory(part) or part in ZIP_SKIPPED_DIRECTORIES for part in parts[:-1]) \
+                    or not is_importable(parts[-1]):
+                summary['skipped'].append(label)
+                continue
+            dst_path = os.path.join(target, *parts[:-1], note_name(parts[-1]))
+            tasks.append((label, lambda info=info: archive.open(info), self.reserve(dst_path, summary)))
+        return tasks
+
+    def reserve(self, dst_path, summary):
+        """目标文件已存在或已被本次导入的其他文件占用时，改用 "名称 (n).md" """
+        stem, ext = os.path.splitext(dst_path)
+        candidate = dst_path
+        number = 1
+        while os.path.normcase(candidate) in self.reserved or os.path.exists(candidate):
+            candidate = f"{stem} ({number}){ext}"
+            number += 1
+        if candidate != dst_path:
+            summary['renamed'] += 1
+        self.reserved.add(os.path.normcase(candidate))
+        return candidate
+
+    def import_tasks(self, tasks, summary):
+        total = len(tasks)
+        self.progress_update.emit(0, total)
+        # 每批导入读取一次设置
+        fsync = fsync_enabled()
+        with ThreadPoolExecutor(max_workers=IMPORT_WORKERS) as executor:
+            futures = {executor.submit(self.import_one, label, source, dst_path, fsync): label
+                       for label, source, dst_path in tasks}
+            cancelled = False
+            for done, future in enumerate(as_completed(futures), 1):
+                if not self.running and not cancelled:
+                    # 取消尚未开始的任务，正在写入的文件会写完
+                    for pending in futures:
+                        pending.cancel()
+                    cancelled = True
+                if future.cancelled():
+                    continue
+                try:
+                    success, converted, message = future.result()
+                except Exception as e:
+                    success, converted, message = False, False, str(e)
+                if success:
+                    summary['imported'] += 1
+                    summary['converted'] += converted
+                else:
+                    summary['failed'].append((futures[future], message))
+                self.progress_update.emit(done, total)
+
+    def import_one(self, label, source, dst_path, fsync):
+        """
+        导入单个文件，返回 (是否成功, 是否转换了格式或编码, 信息)
+        source 为磁盘上的源路径，或打开zip成员的函数
+        """
+        if isinstance(source, str):
+            if source.lower().endswith('.md') and is_utf8_file(source):
+                if copy_file(source, dst_path):
+                    return True, False, ""
+                return False, False, "复制文件失败"
+            reader = TextFileReader(source)
+        else:
+            reader = TextFileReader(label, file=source())
+        success, message = write_file_atomic(reader.chunks(), dst_path, fsync)
+        converted = label.lower().endswith('.txt') or reader.encoding not in ('utf-8', 'utf-8-sig')
+        return success, success and converted, message
+
+    def stop(self):
+        self.running = False
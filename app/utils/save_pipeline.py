@@ -0,0 +1,110 @@
+from PyQt5.QtCore import QThread, QMutex, QWaitCondition, pyqtSignal
+
+from app.utils.file_operations import write_file_atomic, content_digest, fsync_enabled
+from app.utils.note_catalog import NoteCatalog
+
+
+class SavePipeline(QThread):
+    """
+    写后保存队列
+    手动保存和自动保存都只把内容快照放入队列，由后台线程原子地写入磁盘（按设置fsync），界面不必等待磁盘。
+    同一编辑器对同一文件排队中的多次保存合并为最新的一次；自动保存的内容与上次写入的相同时跳过
+    每个任务带上发起保存的编辑器，完成时原样带回，接收方据此找到标签页，而不是按路径查找
+    """
+    # (发起保存的编辑器, 文件路径, 快照对应的文档修订号, 内容哈希, 是否成功, 信息)
+    save_finished = pyqtSignal(object, str, int, str, bool, str)
+
+    def __init__(self):
+        super().__init__()
+        self.running = True
+        # 后台线程已退出循环，之后不会再处理队列
+        self.exited = False
+        self.mutex = QMutex()
+        self.condition = QWaitCondition()
+        # 队列发生变化或一批写入完成时唤醒等待者
+        self.idle_condition = QWaitCondition()
+        # 等待写入的快照 {(文件路径, 编辑器): (内容, 修订号, 是否强制写入)}，按加入顺序写入
+        self.pending = {}
+        # 正在写入的快照数
+        self.writing = 0
+        # 每个文件最近一次写入内容的哈希
+        self.saved_digests = {}
+
+    def enqueue(self, file_path, content, revision=-1, force=True, owner=None):
+        """
+        加入一个保存任务，替换同一编辑器对同一文件尚未写入的旧快照
+        force 为False时（自动保存）内容与上次写入的相同则跳过写入
+        owner 为发起保存的编辑器，随 save_finished 信号带回
+        """
+        self.mutex.lock()
+        key = (file_path, owner)
+        if key in self.pending:
+            force = force or self.pending.pop(key)[2]
+        self.pending[key] = (content, revision, force)
+        self.condition.wakeOne()
+        self.mutex.unlock()
+
+    def retarget(self, owner, file_path):
+        """编辑器的文件被移动或重命名，把它尚未写入的快照改为写到新路径"""
+        self.mutex.lock()
+        pending = {}
+        for (path, job_owner), job in self.pending.items():
+            if job_owner is owner:
+                path = file_path
+            key = (path, job_owner)
+            if key in pending:
+                # 合并到同一路径时保留较新的快照，强制写入标记取并集
+                job = job[:2] + (job[2] or pending.pop(key)[2],)
+            pending[key] = job
+        self.pending = pending
+        self.mutex.unlock()
+
+    def run(self):
+        while True:
+            self.mutex.lock()
+            # 队列为空时一直等待，由 enqueue、flush 和 stop 唤醒
+            while not self.pending and self.running:
+                self.condition.wait(self.mutex)
+            jobs = self.pending
+            self.pending = {}
+            self.writing = len(jobs)
+            if not jobs:
+                # 已停止且队列为空，唤醒仍在等待的 flush
+                self.exited = True
+                self.idle_condition.wakeAll()
+                self.mutex.unlock()
+                break
+            self.mutex.unlock()
+            # 每次写入时读取设置，修改后立即生效
+            fsync = fsync_enabled()
+            for (file_path, owner), (content, revision, force) in jobs.items():
+                digest = content_digest(content)
+                if not force and self.saved_digests.get(file_path) == digest:
+                    success, message = True, "内容未变化"
+                else:
+                    success, message = write_file_atomic(content, file_path, fsync)
+                    if success:
+                        self.saved_digests[file_path] = digest
+                        NoteCatalog().update_content(file_path, content, digest)
+                self.save_finished.emit(owner, file_path, revision, digest, success, message)
+
+            self.mutex.lock()
+            self.writing = 0
+            self.idle_condition.wakeAll()
+            self.mutex.unlock()
+
+    def flush(self):
+        """等待队列中的保存全部写入磁盘（读取刚保存的文件前调用）"""
+        self.mutex.lock()
+        if self.pending:
+            self.condition.wakeOne()
+        while (self.pending or self.writing) and self.isRunning() and not self.exited:
+            self.idle_condition.wait(self.mutex)
+        self.mutex.unlock()
+
+    def stop(self):
+        """写完已排队的保存后退出"""
+        self.running = False
+        self.mutex.lock()
+        self.condition.wakeOne()
+        self.mutex.unlock()
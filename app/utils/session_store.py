@@ -0,0 +1,70 @@
+import json
+import os
+from collections import OrderedDict
+
+from app.utils.file_operations import write_file_atomic
+
+
+class SessionStore:
+    """
+    每篇笔记的会话状态（光标位置、编辑器和预览的滚动位置）
+    保存在独立于主配置的小文件中，只保留最近打开的 MAX_ENTRIES 篇笔记，按最近使用淘汰
+    """
+
+    MAX_ENTRIES = 500
+
+    def __init__(self, file_path):
+        self.file_path = file_path
+        # {规范化的笔记路径: 状态字典}，最后一项为最近使用
+        self.entries = None
+        self.changed = False
+
+    def key(self, note_path):
+        return os.path.normcase(os.path.abspath(note_path))
+
+    def load(self):
+        """第一次访问时才读取文件"""
+        if self.entries is not None:
+            return
+        self.entries = OrderedDict()
+        if not os.path.exists(self.file_path):
+            return
+        try:
+            with open(self.file_path, 'r', encoding='utf-8') as file:
+                for path, state in json.load(file):
+                    self.entries[path] = state
+        except (OSError, ValueError, TypeError) as e:
+            print(f"读取会话状态失败: {str(e)}")
+            self.entries = OrderedDict()
+
+    def get(self, note_path):
+        """读取笔记的会话状态，没有记录时返回None"""
+        self.load()
+        key = self.key(note_path)
+        state = self.entries.get(key)
+        if state is not None:
+            self.entries.move_to_end(key)
+            self.changed = True
+        return state
+
+    def set(self, note_path, state):
+        """记录笔记的会话状态，超出数量上限时淘汰最久未使用的记录"""
+        self.load()
+        key = self.key(note_path)
+        self.entries[key] = state
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.MAX_ENTRIES:
+            self.entries.popitem(last=False)
+        self.changed = True
+
+    def save(self):
+        """有变化时写入文件（按最近使用顺序保存为列表）"""
+        if not self.changed:
+            return True
+        content = json.dumps(list(self.entries.items()), ensure_ascii=False, separators=(',', ':'))
+        success, message = write_file_atomic(content, self.file_path)
+        if not success:
+            print(f"保存会话状态失败: {message}")
+            return False
+        self.changed = False
+        return True
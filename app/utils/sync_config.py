@@ -52,6 +52,12 @@ class SyncConfig:
         # 更新内部配置字典
         self.config = self.load_config()
             
+    def update_file_mappings(self, removed=(), added=None):
+        """批量修改文件映射"""
+        self.config_manager.update_file_mappings(removed, added)
+        # 更新内部配置字典
+        self.config = self.load_config()
+            
     def update_last_sync_time(self):
         """更新最后同步时间"""
         self.config_manager.update_last_sync_time()
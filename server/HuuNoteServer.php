@@ -3,7 +3,7 @@
  * HuuNoteServer.php
  * 
  * Huu Note 笔记同步服务端
- * 提供笔记的上传、下载、删除、搜索、同步、重命名等功能
+ * 提供笔记的上传、下载、删除、搜索、同步、重命名、批量操作等功能
  */
 
 // 设置时区
@@ -125,6 +125,15 @@ class HuuNoteServer {
                 }
                 break;
                 
+            // 批量删除和重命名
+            case 'batch':
+                if ($method === 'POST') {
+                    $this->batchOperations();
+                } else {
+                    $this->sendResponse(['error' => '无效的请求方法，批量操作需要使用POST'], 405);
+                }
+                break;
+                
             default:
                 $this->sendResponse(['error' => '未找到请求的资源'], 404);
         }
@@ -307,36 +316,43 @@ class HuuNoteServer {
         $apiKey = $this->getApiKeyFromRequest();
         $userPath = $this->getUserStoragePath($apiKey);
         
+        list($statusCode, $result) = $this->deletePath($userPath, $notePath);
+        $this->sendResponse($result, $statusCode);
+    }
+    
+    /**
+     * 删除用户存储中的笔记或文件夹
+     * @param string $userPath 用户存储目录
+     * @param string $notePath 笔记路径
+     * @return array [HTTP状态码, 响应数据]
+     */
+    private function deletePath($userPath, $notePath) {
         // 安全检查：确保路径不包含 ..
         if (strpos($notePath, '..') !== false) {
-            $this->sendResponse(['error' => '无效的笔记路径'], 400);
-            return;
+            return [400, ['error' => '无效的笔记路径']];
         }
         
         // 构建完整路径
         $fullPath = $userPath . '/' . $notePath;
         
         if (!file_exists($fullPath)) {
-            $this->sendResponse(['error' => '笔记或文件夹不存在'], 404);
-            return;
+            return [404, ['error' => '笔记或文件夹不存在']];
         }
         
         // 判断是文件还是目录
         if (is_dir($fullPath)) {
             // 删除目录及其内容
             if ($this->deleteDirectory($fullPath)) {
-                $this->sendResponse(['success' => true, 'path' => $notePath, 'is_dir' => true]);
-            } else {
-                $this->sendResponse(['error' => '删除文件夹失败'], 500);
-            }
-        } else {
-            // 删除文件
-            if (unlink($fullPath)) {
-                $this->sendResponse(['success' => true, 'path' => $notePath, 'is_dir' => false]);
-            } else {
-                $this->sendResponse(['error' => '删除笔记失败'], 500);
+                return [200, ['success' => true, 'path' => $notePath, 'is_dir' => true]];
             }
+            return [500, ['error' => '删除文件夹失败']];
+        }
+        
+        // 删除文件
+        if (unlink($fullPath)) {
+            return [200, ['success' => true, 'path' => $notePath, 'is_dir' => false]];
         }
+        return [500, ['error' => '删除笔记失败']];
     }
     
     /**
@@ -383,13 +399,21 @@ class HuuNoteServer {
             return;
         }
         
-        $oldPath = $requestData['old_path'];
-        $newPath = $requestData['new_path'];
-        
+        list($statusCode, $result) = $this->renamePath($userPath, $requestData['old_path'], $requestData['new_path']);
+        $this->sendResponse($result, $statusCode);
+    }
+    
+    /**
+     * 重命名或移动用户存储中的笔记或文件夹
+     * @param string $userPath 用户存储目录
+     * @param string $oldPath 原路径
+     * @param string $newPath 新路径
+     * @return array [HTTP状态码, 响应数据]
+     */
+    private function renamePath($userPath, $oldPath, $newPath) {
         // 安全检查：确保路径不包含 ..
         if (strpos($oldPath, '..') !== false || strpos($newPath, '..') !== false) {
-            $this->sendResponse(['error' => '无效的路径'], 400);
-            return;
+            return [400, ['error' => '无效的路径']];
         }
         
         // 构建完整路径
@@ -398,38 +422,69 @@ class HuuNoteServer {
         
         // 检查源是否存在
         if (!file_exists($oldFullPath)) {
-            $this->sendResponse(['error' => '源文件或文件夹不存在'], 404);
-            return;
+            return [404, ['error' => '源文件或文件夹不存在']];
         }
         
         // 检查目标是否已存在
         if (file_exists($newFullPath)) {
-            $this->sendResponse(['error' => '目标路径已存在，不能覆盖'], 409);
-            return;
+            return [409, ['error' => '目标路径已存在，不能覆盖']];
         }
         
         // 确保新文件的目录存在
         $newDirectory = dirname($newFullPath);
         if (!file_exists($newDirectory)) {
             if (!mkdir($newDirectory, 0755, true)) {
-                $this->sendResponse(['error' => '无法创建目标目录'], 500);
-                return;
+                return [500, ['error' => '无法创建目标目录']];
             }
         }
         
         // 执行重命名
         if (rename($oldFullPath, $newFullPath)) {
-            $isDir = is_dir($newFullPath);
-            $this->sendResponse([
+            return [200, [
                 'success' => true,
                 'old_path' => $oldPath,
                 'new_path' => $newPath,
-                'is_dir' => $isDir,
+                'is_dir' => is_dir($newFullPath),
                 'last_modified' => filemtime($newFullPath)
-            ]);
-        } else {
-            $this->sendResponse(['error' => '重命名失败'], 500);
+            ]];
+        }
+        return [500, ['error' => '重命名失败']];
+    }
+    
+    /**
+     * 批量删除、重命名和移动
+     * 请求数据：{"operations": [{"op": "delete", "path": ...}, {"op": "rename", "old_path": ..., "new_path": ...}]}
+     * 按顺序执行，单个操作失败不影响其他操作，results 中按顺序返回每个操作的结果
+     */
+    private function batchOperations() {
+        $apiKey = $this->getApiKeyFromRequest();
+        $userPath = $this->getUserStoragePath($apiKey);
+        
+        // 获取请求内容
+        $requestData = json_decode(file_get_contents('php://input'), true);
+        
+        if (!isset($requestData['operations']) || !is_array($requestData['operations'])) {
+            $this->sendResponse(['error' => '缺少必要参数，需要提供operations'], 400);
+            return;
+        }
+        
+        $results = [];
+        foreach ($requestData['operations'] as $operation) {
+            $op = isset($operation['op']) ? $operation['op'] : '';
+            if ($op === 'delete' && isset($operation['path'])) {
+                list($statusCode, $result) = $this->deletePath($userPath, $operation['path']);
+            } elseif ($op === 'rename' && isset($operation['old_path']) && isset($operation['new_path'])) {
+                list($statusCode, $result) = $this->renamePath($userPath, $operation['old_path'], $operation['new_path']);
+            } else {
+                $result = ['error' => '无效的操作'];
+            }
+            if (!isset($result['success'])) {
+                $result['success'] = false;
+            }
+            $results[] = $result;
         }
+        
+        $this->sendResponse(['success' => true, 'results' => $results]);
     }
     
     /**
@@ -0,0 +1,119 @@
+"""
+大笔记打开延迟基准：MarkdownEditor 打开长文档后多久可以编辑
+运行: QT_QPA_PLATFORM=offscreen python tests/bench_markdown_editor_load.py [行数]
+测量块解析器一次性解析全文的耗时（分片解析前打开时同步进行的部分），
+以及 setPlainText 和分块加载（大于256KB的笔记）两种打开方式下：打开调用本身、到第一次输入完成、
+块解析完成和全文高亮完成的耗时。结果为多次重复的中位数（毫秒），后两项在空闲时进行，不阻塞输入
+"""
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from PyQt5.QtGui import QTextDocument
+from PyQt5.QtWidgets import QApplication
+
+from app.editor.block_parser import MarkdownBlockParser
+from app.editor.markdown_editor import MarkdownEditor
+
+
+REPEAT = 5
+# 分块加载时每块的字符数，与 FileLoadWorker 的块大小相近
+CHUNK_CHARS = 64 * 1024
+
+
+def make_document(lines):
+    parts = []
+    for i in range(lines):
+        if i % 40 == 0:
+            parts.append(f"## 第 {i} 行的标题")
+        elif i % 97 == 1:
+            parts.append("```python")
+        elif i % 97 == 6:
+            parts.append("```")
+        elif i % 7 == 0:
+            parts.append("")
+        else:
+            parts.append(f"- 列表项 {i}，包含 **粗体**、`代码` 和 [链接](https://example.com/{i})")
+    return "\n".join(parts)
+
+
+def parse_document(text):
+    """块解析器一次性解析全文的耗时（不含编辑器和高亮）"""
+    document = QTextDocument()
+    document.documentLayout()
+    parser = MarkdownBlockParser(document)
+    document.setPlainText(text)
+    start = time.perf_counter()
+    parser.finish_parse()
+    elapsed = (time.perf_counter() - start) * 1000
+    parser.deleteLater()
+    return elapsed
+
+
+def set_plain_text(editor, text):
+    editor.setPlainText(text)
+
+
+def load_in_chunks(editor, text):
+    # 各块在打开前已追加完成，这里只计算加载完成时的处理
+    editor.finish_loading()
+
+
+def prepare_chunks(app, editor, text):
+    editor.begin_loading()
+    for start in range(0, len(text), CHUNK_CHARS):
+        editor.append_loaded_text(text[start:start + CHUNK_CHARS])
+    app.processEvents()
+
+
+def open_document(app, text, open_action):
+    """返回 (打开调用, 可以编辑, 块解析完成, 全文高亮完成) 的耗时"""
+    editor = MarkdownEditor()
+    editor.resize(1200, 800)
+    editor.show()
+    app.processEvents()
+    if open_action is load_in_chunks:
+        prepare_chunks(app, editor, text)
+
+    start = time.perf_counter()
+    open_action(editor, text)
+    opened = time.perf_counter()
+    # 第一次输入：按键送达编辑器并完成重绘
+    editor.editor.insertPlainText("x")
+    app.processEvents()
+    editor.editor.viewport().repaint()
+    editable = time.perf_counter()
+    while editor.block_parser.parsing:
+        app.processEvents()
+    parsed = time.perf_counter()
+    while not editor.viewport_highlighter.is_finished():
+        app.processEvents()
+    highlighted = time.perf_counter()
+
+    editor.timer.stop()
+    editor.close()
+    editor.deleteLater()
+    app.processEvents()
+    return tuple((end - start) * 1000 for end in (opened, editable, parsed, highlighted))
+
+
+def main():
+    lines = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    app = QApplication.instance() or QApplication(sys.argv)
+    text = make_document(lines)
+
+    parse = statistics.median(parse_document(text) for _ in range(REPEAT))
+    print(f"{lines} 行文档，单位毫秒")
+    print(f"块解析器一次性解析全文: {parse:.1f}")
+    print(f"{'':14}{'打开调用':>10}{'可以编辑':>10}{'块解析完成':>10}{'全文高亮完成':>10}")
+    for title, action in (("setPlainText", set_plain_text), ("分块加载", load_in_chunks)):
+        samples = [open_document(app, text, action) for _ in range(REPEAT)]
+        values = [statistics.median(column) for column in zip(*samples)]
+        print(f"{title:14}" + "".join(f"{value:10.1f}" for value in values))
+
+
+if __name__ == '__main__':
+    main()
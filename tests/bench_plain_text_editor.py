@@ -0,0 +1,113 @@
+"""
+编辑器内核延迟基准：QTextEdit 与 MarkdownTextEdit 在长文档上的打开、输入、全选和滚动耗时
+运行: QT_QPA_PLATFORM=offscreen python tests/bench_plain_text_editor.py [行数]
+每项操作都包含处理事件和重绘。两个编辑器交替执行同一操作，避免先后运行时的内存和缓存状态影响比较；
+结果为多次重复的中位数（毫秒），打开为单次耗时
+"""
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from PyQt5.QtGui import QTextCursor
+from PyQt5.QtWidgets import QApplication, QTextEdit
+
+from app.editor.plain_text_editor import MarkdownTextEdit
+
+
+REPEAT = 100
+
+
+def make_document(lines):
+    parts = []
+    for i in range(lines):
+        if i % 40 == 0:
+            parts.append(f"## 第 {i} 行的标题")
+        elif i % 7 == 0:
+            parts.append("")
+        else:
+            parts.append(f"- 列表项 {i}，包含 **粗体**、`代码` 和 [链接](https://example.com/{i})")
+    return "\n".join(parts)
+
+
+def settle(app, editor):
+    app.processEvents()
+    editor.viewport().repaint()
+
+
+def timed(app, editor, action):
+    start = time.perf_counter()
+    action()
+    settle(app, editor)
+    return (time.perf_counter() - start) * 1000
+
+
+def type_char(editor, i):
+    editor.insertPlainText("x")
+
+
+def select_all(editor, i):
+    if i % 2:
+        editor.moveCursor(QTextCursor.Start)
+    else:
+        editor.selectAll()
+
+
+def wheel_scroll(editor, i):
+    # 滚轮每次约三行；QTextEdit 的滚动条以像素为单位，QPlainTextEdit 以行为单位
+    bar = editor.verticalScrollBar()
+    step = editor.fontMetrics().lineSpacing() if isinstance(editor, QTextEdit) else 1
+    bar.setValue(bar.maximum() // 3 + 3 * (i + 1) * step)
+
+
+def jump_scroll(editor, i):
+    # 拖动滚动条跳转到文档的不同位置
+    bar = editor.verticalScrollBar()
+    bar.setValue(bar.maximum() * (i % 20) // 20)
+
+
+OPERATIONS = (
+    ("输入", type_char),
+    ("全选", select_all),
+    ("滚轮滚动", wheel_scroll),
+    ("跳转滚动", jump_scroll),
+)
+
+
+def main():
+    lines = int(sys.argv[1]) if len(sys.argv) > 1 else 50000
+    app = QApplication.instance() or QApplication(sys.argv)
+    text = make_document(lines)
+
+    rich = QTextEdit()
+    rich.setAcceptRichText(False)
+    editors = {"QTextEdit": rich, "MarkdownTextEdit": MarkdownTextEdit()}
+    results = {name: [] for name in editors}
+
+    for name, editor in editors.items():
+        editor.resize(900, 700)
+        editor.show()
+        results[name].append(timed(app, editor, lambda: editor.setPlainText(text)))
+        cursor = editor.textCursor()
+        cursor.setPosition(len(text) // 2)
+        editor.setTextCursor(cursor)
+        settle(app, editor)
+
+    for _, operation in OPERATIONS:
+        samples = {name: [] for name in editors}
+        for i in range(REPEAT):
+            for name, editor in editors.items():
+                samples[name].append(timed(app, editor, lambda: operation(editor, i)))
+        for name in editors:
+            results[name].append(statistics.median(samples[name]))
+
+    print(f"{lines} 行文档，单位毫秒")
+    print(f"{'':18}{'打开':>10}" + "".join(f"{title:>10}" for title, _ in OPERATIONS))
+    for name, values in results.items():
+        print(f"{name:18}" + "".join(f"{value:10.2f}" for value in values))
+
+
+if __name__ == '__main__':
+    main()
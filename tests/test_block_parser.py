@@ -0,0 +1,94 @@
+"""
+MarkdownBlockParser 分片解析的测试：解析过程中的编辑与完整解析的结果一致
+运行: python -m pytest -q tests
+"""
+import os
+import random
+
+os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+
+import pytest
+from PyQt5.QtGui import QGuiApplication, QTextCursor, QTextDocument
+
+from app.editor.block_parser import MarkdownBlockParser
+
+
+LINES = [
+    '# 标题', '## 二级标题', '正文段落', '', '- 列表项', '  续行', '> 引用', '```', '```python',
+    '~~~', '<div>', '</div>', '<!-- 注释', '-->', '    缩进代码', '| a | b |', '|---|---|',
+]
+
+
+@pytest.fixture(scope='module')
+def app():
+    return QGuiApplication.instance() or QGuiApplication([])
+
+
+def new_document():
+    document = QTextDocument()
+    # 没有布局的文档不发出整篇插入的 contentsChange
+    document.documentLayout()
+    return document
+
+
+def make_text(rng, count):
+    return '\n'.join(rng.choice(LINES) for _ in range(count))
+
+
+def snapshot(parser):
+    return parser.lines, parser.states, parser.headings, parser.block_ranges
+
+
+def reference(text):
+    """不分片的完整解析结果"""
+    document = new_document()
+    parser = MarkdownBlockParser(document)
+    parser.SLICED_PARSE_LINES = float('inf')
+    document.setPlainText(text)
+    return snapshot(parser)
+
+
+def random_edit(rng, document, parser):
+    cursor = QTextCursor(document)
+    if rng.random() < 0.3:
+        # 跨越已解析部分末尾的改动
+        block = document.findBlockByNumber(max(len(parser.lines) - rng.randrange(1, 4), 0))
+        position = block.position()
+    else:
+        position = rng.randrange(document.characterCount())
+    cursor.setPosition(position)
+    if rng.random() < 0.3:
+        cursor.setPosition(min(position + rng.randrange(200), document.characterCount() - 1),
+                           QTextCursor.KeepAnchor)
+    cursor.insertText(rng.choice(['x', '\n', '# 新标题\n', '```\n', '', '<div>\n\n']))
+
+
+@pytest.mark.parametrize('seed', range(8))
+def test_edits_during_sliced_parse(app, seed):
+    rng = random.Random(seed)
+    document = new_document()
+    parser = MarkdownBlockParser(document)
+    parser.SLICED_PARSE_LINES = 500
+    document.setPlainText(make_text(rng, 3000))
+    assert parser.parsing
+
+    while parser.parsing:
+        parser.parse_timer.stop()
+        # 每个时间片只处理少量内容，使编辑落在两个阶段的各个位置
+        parser.parse_slice(0)
+        if rng.random() < 0.5:
+            random_edit(rng, document, parser)
+    assert snapshot(parser) == reference(document.toPlainText())
+
+
+def test_blocks_finish_parse(app):
+    document = new_document()
+    parser = MarkdownBlockParser(document)
+    parser.SLICED_PARSE_LINES = 500
+    text = make_text(random.Random(0), 2000)
+    document.setPlainText(text)
+    assert parser.parsing and len(parser.lines) == 0
+    blocks = parser.blocks()
+    assert not parser.parsing
+    assert snapshot(parser) == reference(text)
+    assert blocks == parser.blocks()
@@ -0,0 +1,144 @@
+"""
+HtmlSanitizer 的模糊测试和线性时间测试
+运行: python -m pytest -q tests
+"""
+import random
+import time
+from html import unescape
+from html.parser import HTMLParser
+
+import pytest
+
+from app.editor.html_sanitizer import HtmlSanitizer, sanitize_html
+
+
+# 模糊测试用的片段，随机拼接后覆盖标签、属性、实体编码和未闭合等情况
+FRAGMENTS = [
+    '<', '>', '/', '"', "'", '=', ' ', '\n', '\t', '\x00', 'text', '中文',
+    '<script>', '</script>', '<SCRIPT ', '<scr', 'ipt>', '<script/x>',
+    '<style>', '</style>', '<svg>', '</svg>', '<img ', '<a ', '<div ',
+    '<iframe>', '</iframe', '<!--', '-->', '<!doctype html>', '<?xml ?>',
+    'onerror=', 'ONLOAD=', ' onclick', 'on\x00load=', 'href=', 'src=',
+    'xlink:href=', 'style=', 'javascript:', 'JaVaScRiPt:', 'java\tscript:',
+    '&#106;avascript:', '&#x6A;avascript:', '&#106avascript:', 'vbscript:',
+    'data:text/html,', 'data:image/png;base64,AA', 'expression(', 'alert(1)',
+    '"javascript:alert(1)"', "'x'", '</', '<b>', '</b>', '<foreignObject>',
+    '<animate attributeName=href to=javascript:alert(1)>', '<use href=',
+]
+
+
+class OutputChecker(HTMLParser):
+    """按浏览器的方式解析过滤结果，收集所有开始标签、属性和 <style> 的内容"""
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.tags = []
+        self.style_text = []
+        self._in_style = False
+
+    def handle_starttag(self, tag, attrs):
+        self.tags.append((tag, attrs))
+        self._in_style = tag == 'style'
+
+    def handle_startendtag(self, tag, attrs):
+        self.tags.append((tag, attrs))
+
+    def handle_endtag(self, tag):
+        if tag == 'style':
+            self._in_style = False
+
+    def handle_data(self, data):
+        if self._in_style:
+            self.style_text.append(data)
+
+
+def normalize_url(value):
+    """去掉控制字符和空白后的小写值，与浏览器解析URL协议的方式一致"""
+    return ''.join(c for c in unescape(value) if ord(c) > 0x20 and c != '\x7f').lower()
+
+
+def assert_safe(html):
+    result = sanitize_html(html)
+    checker = OutputChecker()
+    checker.feed(result)
+    checker.close()
+
+    for tag, attrs in checker.tags:
+        assert tag in HtmlSanitizer.ALLOWED_TAGS, (html, result)
+        for name, value in attrs:
+            assert not name.startswith('on'), (html, result)
+            value = normalize_url(value or '')
+            if name in HtmlSanitizer.URL_ATTRIBUTES:
+                # 相对链接（如 "=/javascript:"）不会被当作协议
+                assert not value.startswith(('javascript:', 'vbscript:', 'data:text')), (html, result)
+            if name == 'style':
+                assert 'javascript:' not in value and 'expression(' not in value, (html, result)
+    assert '<script' not in result.lower(), (html, result)
+    for text in checker.style_text:
+        assert '<' not in text, (html, result)
+        assert 'javascript:' not in text.lower().replace('disabled-javascript:', ''), (html, result)
+    return result
+
+
+@pytest.mark.parametrize('seed', range(20))
+def test_fuzz_allowlist(seed):
+    rng = random.Random(seed)
+    for _ in range(500):
+        html = ''.join(rng.choice(FRAGMENTS) for _ in range(rng.randint(1, 40)))
+        assert_safe(html)
+
+
+@pytest.mark.parametrize('html', [
+    '<script>alert(1)</script>',
+    '<img src=x onerror=alert(1)>',
+    '<a href="jav&#x09;ascript:alert(1)">x</a>',
+    '<a href=" javascript:alert(1)">x</a>',
+    '<svg><style><img src=x onerror=alert(1)></style></svg>',
+    '<style>body{background:url(javascript:alert(1))}</style>',
+    '<div style="width: expression(alert(1))">x</div>',
+    '<iframe src="https://example.com"></iframe>',
+    '<img src="data:image/svg+xml;base64,PHN2Zz4=">',
+    '<svg><use href="javascript:alert(1)"/></svg>',
+])
+def test_known_vectors(html):
+    assert_safe(html)
+
+
+def test_keeps_allowed_markup():
+    html = '<p class="x" data-line="3"><a href="https://example.com" target="_blank">link</a></p>'
+    assert sanitize_html(html) == html
+    assert sanitize_html('<svg viewBox="0 0 1 1"><path d="M0 0"/></svg>') == '<svg viewBox="0 0 1 1"><path d="M0 0" /></svg>'
+    assert sanitize_html('a < b') == 'a &lt; b'
+
+
+# 病态输入：深度嵌套、大量未闭合的标签、超长属性序列和未闭合的引号
+PATHOLOGICAL = {
+    'nested': lambda n: '<div><span>' * n + 'x' + '</span></div>' * n,
+    'unclosed_tags': lambda n: '<div ' * n,
+    'bare_lt': lambda n: '<' * n,
+    'unclosed_end_tags': lambda n: '</a' * n,
+    'attribute_run': lambda n: '<div ' + 'a=1 ' * n + '>',
+    'unquoted_quote': lambda n: '<div a="' + 'x' * n,
+    'unclosed_script': lambda n: '<script>' * n,
+    'unclosed_style': lambda n: '<style>' + '<' * n,
+    'comments': lambda n: '<!--' * n,
+    'mixed': lambda n: '<svg><g onload=x fill="red" d=\'M0\'>&lt;' * n,
+}
+
+
+def best_time(html, repeat=3):
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        sanitize_html(html)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+@pytest.mark.parametrize('name', sorted(PATHOLOGICAL))
+def test_linear_time(name):
+    build = PATHOLOGICAL[name]
+    small = best_time(build(5000))
+    large = best_time(build(40000))
+    # 输入增大8倍，线性算法耗时约增大8倍；平方级算法会增大约64倍
+    assert large < max(small, 0.001) * 20, (name, small, large)